@@ -1,94 +1,381 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from IS_Score.utils import normalizeSpectraBaseline, normalizeProminence, printOutputTable, _checkInput, DebugCollector
+from scipy import signal
+from typing import NamedTuple
+from IS_Score.utils import normalizeSpectraBaseline, normalizeProminence, printOutputTable, _checkInput, _checkBatchInput, DebugCollector
 from IS_Score.band_edges_detection.band_detection import findBands, getBandEdges, _validateBands, getWlenProminences
 from IS_Score.bands_penalization.single_band import getSinglePeakPenalty, getSingleDipPenalty
-from IS_Score.bands_penalization.band_region import getRegionPeakPenalty, getRegionDipPenalty
+from IS_Score.bands_penalization.band_region import (getRegionPeakPenalty, getRegionDipPenalty, regionPeakBands,
+                                                     regionDipBands, getRamanShiftProminences)
 from IS_Score.other_penalization.intensity_penalization import getIntensityPenalization
-from IS_Score.other_penalization.auc_penalization import getAUCPenalty
-from IS_Score.other_penalization.mean_ratio_penalization import getMeanDipsRatioPenalization
+from IS_Score.other_penalization.auc_penalization import getAUCPenalty, getInterpolation
+from IS_Score.other_penalization.mean_ratio_penalization import getMeanDipsRatioPenalization, MEAN_RATIO_WINDOWS
+from IS_Score.instrumentation import stage
 
 
-def getIS_Score(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array, **kwargs):
+# Version of the analysis of the raw spectra, part of the key of the AnalysisCache. Bump it whenever the detection
+# of the bands, of their edges or prominences, or the content of SpectrumAnalysis changes.
+ANALYSIS_VERSION = 1
+
+PENALTY_NAMES = ("Intensity Penalty", "Single Peak Penalty", "Peak Region Penalty", "Single Dip Penalty",
+                 "Dip Region Penalty", "AUC Penalty", "Mean Ratio Penalty")
+
+
+class ISScoreComponents(NamedTuple):
     """
-    Compute the IS-Score for the given raw and baseline-corrected spectra.
+    Lightweight record with the IS-Score and the seven penalties it is computed from.
+    """
+    is_score: float
+    intensity_penalty: float
+    single_peak_penalty: float
+    peak_region_penalty: float
+    single_dip_penalty: float
+    dip_region_penalty: float
+    auc_penalty: float
+    mean_ratio_penalty: float
 
-    Parameters
+
+class SpectrumAnalysis(NamedTuple):
+    """
+    Immutable result of the analysis of a raw spectrum, which does not depend on the baseline.
+
+    It is returned by analyzeSpectrum and can be scored against any number of baselines with scoreBaseline. The
+    arrays are read-only and the bands are stored as tuples.
+
+    Attributes
     ----------
     raw_sp : np.array
         The Raman spectrum.
-    baseline_corrected_sp : np.array
-        The baseline corrected spectrum.
     sp_axis : np.array
         The spectral axis.
+    raw_sp_norm : np.array
+        The Raman spectrum normalized in the range 0-1, used for the peaks detection.
+    neg_sp : np.array
+        The negated Raman spectrum normalized in the range 0-1, used for the dips detection.
+    peaks, peak_edges : tuple
+        The validated peaks and their edges.
+    peaks_prominences : tuple
+        The prominences of the peaks, not yet normalized against the baseline.
+    dips, dips_edges : tuple
+        The validated dips and their edges.
+    dips_prominences : tuple
+        The prominences of the dips, not yet normalized against the baseline.
+    interpolation : np.array
+        The fake overfitting baseline used by the AUC penalty.
+    mean_ratio_sp : tuple
+        The raw spectrum smoothed with each window of ``MEAN_RATIO_WINDOWS``, used by the Mean Ratio penalty.
+    """
+    raw_sp: np.array
+    sp_axis: np.array
+    raw_sp_norm: np.array
+    neg_sp: np.array
+    peaks: tuple
+    peak_edges: tuple
+    peaks_prominences: tuple
+    dips: tuple
+    dips_edges: tuple
+    dips_prominences: tuple
+    interpolation: np.array
+    mean_ratio_sp: tuple
+
+
+def _readOnly(arr: np.array) -> np.array:
+    arr.flags.writeable = False
+    return arr
+
+
+def _normalizeSpectrum(raw_sp: np.array) -> tuple:
+    """
+    Normalize the spectrum and its negation in the range 0-1, for the detection of the peaks and the dips.
 
     Returns
     -------
-    is_score : float
-        A numerical value that assess the baseline fit.
+    raw_sp_norm, neg_sp : tuple
+        The normalized spectrum and the normalized negated spectrum.
     """
-    success = _checkInput(raw_sp, baseline_corrected_sp, sp_axis)
-
-    if not success:
-        return -1
+    raw_sp_norm = (raw_sp - np.min(raw_sp)) / (np.max(raw_sp) - np.min(raw_sp))
+    neg_sp = (-raw_sp_norm - min(-raw_sp_norm)) / (max(-raw_sp_norm) - min(-raw_sp_norm))
+    return raw_sp_norm, neg_sp
 
-    PEAKS_DIPS_TOL = kwargs.pop("peaks_dips_tolerance", {"peaks": 5, "dips": 5})
-    custom_peaks = kwargs.get("custom_peaks", None)
-    custom_dips = kwargs.get("custom_dips", None)
 
+def _meanRatioSpectra(raw_sp: np.array) -> tuple:
+    """
+    Return the raw spectrum smoothed with each window of ``MEAN_RATIO_WINDOWS``, as read-only arrays.
+    """
+    return tuple(_readOnly(signal.savgol_filter(raw_sp, window_length=wl, polyorder=4)) for wl in MEAN_RATIO_WINDOWS)
 
-    raw_sp, baseline_corrected_sp, sp_axis = np.array(raw_sp), np.array(baseline_corrected_sp), np.array(sp_axis)
-    baseline = raw_sp - baseline_corrected_sp
 
-    # Normalize only the spectra for peaks/dips detection
-    raw_sp_norm = (raw_sp - np.min(raw_sp)) / (np.max(raw_sp) - np.min(raw_sp))
+def _analyze(raw_sp, sp_axis, raw_sp_norm, neg_sp, peaks_dips_tol, custom_peaks=None, custom_dips=None):
+    """
+    Run the baseline independent stages of the IS-Score on an already normalized spectrum.
 
-    # Normalize both spectra and baseline for comparison
-    raw_sp_norm_bas, baseline_sp_norm = normalizeSpectraBaseline(raw_sp, baseline)
-    combined_min, combined_max = min(np.min(raw_sp_norm_bas), np.min(baseline_sp_norm)), max(np.max(raw_sp_norm_bas), np.max(baseline_sp_norm))
+    Parameters
+    ----------
+    raw_sp : np.array
+        The Raman spectrum.
+    sp_axis : np.array
+        The spectral axis.
+    raw_sp_norm : np.array
+        The Raman spectrum normalized in the range 0-1, used for the peaks detection.
+    neg_sp : np.array
+        The negated Raman spectrum normalized in the range 0-1, used for the dips detection.
+    peaks_dips_tol : dict
+        The tolerance used for the automatic detection of the peaks and dips.
+    custom_peaks, custom_dips : list, optional
+        The bands to use instead of the automatic detection.
 
+    Returns
+    -------
+    analysis : SpectrumAnalysis
+        The analysis of the spectrum.
+    """
     if custom_peaks is not None:
         peaks = custom_peaks
     else:
-        peaks = findBands(raw_sp_norm, tolerance=PEAKS_DIPS_TOL["peaks"])
-    peak_edges = getBandEdges(raw_sp_norm, peaks)
+        with stage("peak_detection"):
+            peaks = findBands(raw_sp_norm, tolerance=peaks_dips_tol["peaks"])
+    with stage("peak_edges"):
+        peak_edges = getBandEdges(raw_sp_norm, peaks)
 
     # Sanity Check for bands and edges
     peaks, peak_edges = _validateBands(peaks, peak_edges)
-    peaks_prominences = getWlenProminences(raw_sp_norm, peaks, peak_edges)
+    with stage("peak_prominences"):
+        peaks_prominences = getWlenProminences(raw_sp_norm, peaks, peak_edges)
 
-    # Normalize the prominences for good comparison with the baseline
-    peaks_prominences = normalizeProminence(peaks_prominences, combined_max, combined_min)
-
-    peaks_penalization = getSinglePeakPenalty(raw_sp_norm_bas, baseline_sp_norm, peaks, peaks_prominences)
-    peak_region_penalization = getRegionPeakPenalty(raw_sp_norm_bas, baseline_sp_norm, peaks, peak_edges, peaks_prominences)
-
-    neg_sp = (-raw_sp_norm - min(-raw_sp_norm)) / (max(-raw_sp_norm) - min(-raw_sp_norm))
     if custom_dips is not None:
         dips = custom_dips
     else:
-        dips = findBands(neg_sp, tolerance=PEAKS_DIPS_TOL["dips"])
-    dips_edges = getBandEdges(neg_sp, dips)
+        with stage("dip_detection"):
+            dips = findBands(neg_sp, tolerance=peaks_dips_tol["dips"])
+    with stage("dip_edges"):
+        dips_edges = getBandEdges(neg_sp, dips)
     dips, dips_edges = _validateBands(dips, dips_edges)
 
-    dips_prominences = getWlenProminences(neg_sp, dips, dips_edges)
-    dips_prominences = normalizeProminence(dips_prominences, combined_max, combined_min)
+    with stage("dip_prominences"):
+        dips_prominences = getWlenProminences(neg_sp, dips, dips_edges)
 
-    dips_penalization = getSingleDipPenalty(raw_sp_norm_bas, baseline_sp_norm, dips, dips_prominences)
-    dips_region_penalization = getRegionDipPenalty(raw_sp_norm_bas, baseline_sp_norm, dips, dips_edges, dips_prominences)
+    with stage("auc_interpolation"):
+        interpolation = getInterpolation(raw_sp, peaks, peak_edges)
 
-    intensity_penalty = getIntensityPenalization(raw_sp_norm_bas, baseline_sp_norm, peak_edges, dips_edges)
-    auc_penalization = getAUCPenalty(raw_sp, baseline, peaks, peak_edges)
-    mean_ratio_penalization = getMeanDipsRatioPenalization(raw_sp, baseline)
+    # Smoothed spectra used by the Mean Ratio penalty, computed once and shared by all the baselines
+    with stage("mean_ratio_smoothing"):
+        mean_ratio_sp = _meanRatioSpectra(raw_sp)
+
+    return SpectrumAnalysis(_readOnly(raw_sp), _readOnly(sp_axis), _readOnly(raw_sp_norm), _readOnly(neg_sp),
+                            tuple(peaks), tuple(peak_edges), tuple(peaks_prominences),
+                            tuple(dips), tuple(dips_edges), tuple(dips_prominences),
+                            _readOnly(interpolation), mean_ratio_sp)
+
+
+def _finalScore(penalties) -> float:
+    """
+    Sum the seven penalties, ordered as in PENALTY_NAMES, into the IS-Score.
+    """
+    (intensity_penalty, peaks_penalization, peak_region_penalization, dips_penalization,
+     dips_region_penalization, auc_penalization, mean_ratio_penalization) = penalties
 
     final_penalization = (intensity_penalty +
                           peaks_penalization + dips_penalization +
                           peak_region_penalization + dips_region_penalization +
                           auc_penalization + mean_ratio_penalization)
 
-    is_score = round(1 - min(final_penalization, 1), 4)
+    return round(1 - min(final_penalization, 1), 4)
+
+
+def _getPenalties(analysis, baseline, raw_sp_norm_bas, baseline_sp_norm, combined_min, combined_max,
+                  return_bands=False):
+    """
+    Compute the seven penalties of the IS-Score for a single, already analyzed, spectrum.
+
+    Parameters
+    ----------
+    analysis : SpectrumAnalysis
+        The analysis of the Raman spectrum.
+    baseline : np.array
+        The baseline (raw spectrum minus the baseline corrected spectrum).
+    raw_sp_norm_bas, baseline_sp_norm : np.array
+        The Raman spectrum and the baseline normalized together in the range 0-1.
+    combined_min, combined_max : float
+        The minimum and maximum value used for the normalization of the prominences.
+    return_bands : bool, optional
+        If True, return also the normalized prominences and the diagnostics of the band regions, from which the
+        region penalties are computed.
+
+    Returns
+    -------
+    penalties : tuple
+        The penalties ordered as in ``PENALTY_NAMES``. With `return_bands`, the tuple (penalties, peaks_prominences,
+        peak_bands, dips_prominences, dip_bands), with the bands as yielded by regionPeakBands and regionDipBands.
+    """
+    peaks, peak_edges = list(analysis.peaks), list(analysis.peak_edges)
+    dips, dips_edges = list(analysis.dips), list(analysis.dips_edges)
+
+    # Normalize the prominences for good comparison with the baseline
+    peaks_prominences = normalizeProminence(analysis.peaks_prominences, combined_max, combined_min)
+
+    with stage("single_peak_penalty"):
+        peaks_penalization = getSinglePeakPenalty(raw_sp_norm_bas, baseline_sp_norm, peaks, peaks_prominences)
+    with stage("peak_region_penalty"):
+        peak_bands = list(regionPeakBands(raw_sp_norm_bas, baseline_sp_norm, peaks, peak_edges,
+                                          getRamanShiftProminences("peak", raw_sp_norm_bas, baseline_sp_norm, peaks,
+                                                                   peak_edges, peaks_prominences)))
+        peak_region_penalization = getRegionPeakPenalty(raw_sp_norm_bas, baseline_sp_norm, peaks, peak_edges,
+                                                        peaks_prominences, bands=peak_bands)
+
+    dips_prominences = normalizeProminence(analysis.dips_prominences, combined_max, combined_min)
+
+    with stage("single_dip_penalty"):
+        dips_penalization = getSingleDipPenalty(raw_sp_norm_bas, baseline_sp_norm, dips, dips_prominences)
+    with stage("dip_region_penalty"):
+        dip_bands = list(regionDipBands(raw_sp_norm_bas, baseline_sp_norm, dips, dips_edges,
+                                        getRamanShiftProminences("dip", raw_sp_norm_bas, baseline_sp_norm, dips,
+                                                                 dips_edges, dips_prominences)))
+        dips_region_penalization = getRegionDipPenalty(raw_sp_norm_bas, baseline_sp_norm, dips, dips_edges,
+                                                       dips_prominences, bands=dip_bands)
+
+    with stage("intensity_penalty"):
+        intensity_penalty = getIntensityPenalization(raw_sp_norm_bas, baseline_sp_norm, peak_edges, dips_edges)
+    with stage("auc_penalty"):
+        auc_penalization = getAUCPenalty(analysis.raw_sp, baseline, peaks, peak_edges,
+                                         interpolation=analysis.interpolation)
+    with stage("mean_ratio_penalty"):
+        mean_ratio_penalization = getMeanDipsRatioPenalization(analysis.raw_sp, baseline,
+                                                               smoothed_sp=analysis.mean_ratio_sp)
+
+    penalties = (intensity_penalty, peaks_penalization, peak_region_penalization, dips_penalization,
+                 dips_region_penalization, auc_penalization, mean_ratio_penalization)
+    if return_bands:
+        return penalties, peaks_prominences, peak_bands, dips_prominences, dip_bands
+    return penalties
+
+
+def analyzeSpectrum(raw_sp: np.array, sp_axis: np.array, **kwargs) -> SpectrumAnalysis:
+    """
+    Analyze a Raman spectrum once, so that it can be scored against many baselines with scoreBaseline.
+
+    The analysis contains all the stages of the IS-Score which depend only on the raw spectrum: the normalization,
+    the detection of the peaks and dips with their edges and prominences, and the AUC interpolation.
+
+    Parameters
+    ----------
+    raw_sp : np.array
+        The Raman spectrum.
+    sp_axis : np.array
+        The spectral axis.
+
+    Returns
+    -------
+    analysis : SpectrumAnalysis
+        The immutable analysis of the spectrum.
+    """
+    if len(raw_sp) == 0 or len(raw_sp) != len(sp_axis):
+        raise ValueError("Invalid input: the spectrum and the spectral axis must be non-empty and of equal length.")
+
+    PEAKS_DIPS_TOL = kwargs.pop("peaks_dips_tolerance", {"peaks": 5, "dips": 5})
+    custom_peaks = kwargs.get("custom_peaks", None)
+    custom_dips = kwargs.get("custom_dips", None)
+
+    raw_sp, sp_axis = np.array(raw_sp), np.array(sp_axis)
+
+    # Normalize only the spectra for peaks/dips detection
+    raw_sp_norm, neg_sp = _normalizeSpectrum(raw_sp)
+
+    return _analyze(raw_sp, sp_axis, raw_sp_norm, neg_sp, PEAKS_DIPS_TOL, custom_peaks, custom_dips)
+
+
+def getIS_Score(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array, verbose: bool = True,
+                return_components: bool = False, **kwargs):
+    """
+    Compute the IS-Score for the given raw and baseline-corrected spectra.
+
+    Parameters
+    ----------
+    raw_sp : np.array
+        The Raman spectrum.
+    baseline_corrected_sp : np.array
+        The baseline corrected spectrum.
+    sp_axis : np.array
+        The spectral axis.
+    verbose : bool, optional
+        If True (default), print the table with the penalties and the IS-Score.
+    return_components : bool, optional
+        If True, return an ISScoreComponents record with the IS-Score and the seven penalties instead of the
+        IS-Score alone.
+    analysis_cache : AnalysisCache, optional
+        Persistent cache of the analysis of the raw spectra. When given, the detection of the bands is skipped for
+        the spectra already analyzed.
+
+    Returns
+    -------
+    is_score : float or ISScoreComponents
+        A numerical value that assess the baseline fit, or the record with its components if `return_components`
+        is set. -1 is returned if the input is not valid.
+    """
+    success = _checkInput(raw_sp, baseline_corrected_sp, sp_axis)
+
+    if not success:
+        return -1
+
+    analysis_cache = kwargs.pop("analysis_cache", None)
+    if analysis_cache is not None:
+        analysis = analysis_cache.analyzeSpectrum(raw_sp, sp_axis, **kwargs)
+    else:
+        analysis = analyzeSpectrum(raw_sp, sp_axis, **kwargs)
+
+    return scoreBaseline(analysis, baseline_corrected_sp, verbose=verbose, return_components=return_components)
+
+
+def scoreBaseline(analysis: SpectrumAnalysis, baseline_corrected_sp: np.array, verbose: bool = True,
+                  return_components: bool = False):
+    """
+    Compute the IS-Score of a baseline corrected spectrum, reusing the analysis of its raw spectrum.
+
+    Only the penalties which depend on the baseline are computed, so scoring many baselines of the same spectrum
+    costs one analysis plus one cheap pass per baseline.
+
+    Parameters
+    ----------
+    analysis : SpectrumAnalysis
+        The analysis of the raw spectrum, as returned by analyzeSpectrum.
+    baseline_corrected_sp : np.array
+        The baseline corrected spectrum.
+    verbose : bool, optional
+        If True (default), print the table with the penalties and the IS-Score.
+    return_components : bool, optional
+        If True, return an ISScoreComponents record with the IS-Score and the seven penalties instead of the
+        IS-Score alone.
+
+    Returns
+    -------
+    is_score : float or ISScoreComponents
+        A numerical value that assess the baseline fit, or the record with its components if `return_components`
+        is set. -1 is returned if the input is not valid.
+    """
+    raw_sp, sp_axis, raw_sp_norm = analysis.raw_sp, analysis.sp_axis, analysis.raw_sp_norm
+
+    success = _checkInput(raw_sp, baseline_corrected_sp, sp_axis)
+
+    if not success:
+        return -1
+
+    baseline_corrected_sp = np.array(baseline_corrected_sp)
+    baseline = raw_sp - baseline_corrected_sp
+
+    # Normalize both spectra and baseline for comparison
+    raw_sp_norm_bas, baseline_sp_norm = normalizeSpectraBaseline(raw_sp, baseline)
+    combined_min, combined_max = min(np.min(raw_sp_norm_bas), np.min(baseline_sp_norm)), max(np.max(raw_sp_norm_bas), np.max(baseline_sp_norm))
+
+    penalties = _getPenalties(analysis, baseline, raw_sp_norm_bas, baseline_sp_norm, combined_min, combined_max)
+    (intensity_penalty, peaks_penalization, peak_region_penalization, dips_penalization,
+     dips_region_penalization, auc_penalization, mean_ratio_penalization) = penalties
+
+    is_score = _finalScore(penalties)
 
     if DebugCollector.enabled:
+        from IS_Score.renderer import logDebugPlots
+
+        peaks, peak_edges = list(analysis.peaks), list(analysis.peak_edges)
+        dips, dips_edges = list(analysis.dips), list(analysis.dips_edges)
+
         DebugCollector.log("GENERAL", "sp_norm", raw_sp_norm_bas)
         DebugCollector.log("GENERAL", "baseline_norm", baseline_sp_norm)
         DebugCollector.log("GENERAL", "peaks", peaks)
@@ -97,174 +384,87 @@ def getIS_Score(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.a
         DebugCollector.log("GENERAL", "dips_edges", dips_edges)
         DebugCollector.log("GENERAL", "IS-Score", is_score)
 
-        # region Single Peak and Dip plot
-        peaks_penalized = DebugCollector.collected_data['SINGLE_PEAK_PENALIZATION']['peak_penalized']
-        dips_penalized = DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['dip_penalized']
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(sp_axis, raw_sp_norm, color='tab:blue', label="Normalized Spectra", alpha=0.4)
-        ax.plot(sp_axis, baseline_sp_norm, color='tab:orange', label="Normalized Baseline", alpha=0.4)
-        ax.scatter(sp_axis[dips], raw_sp_norm[dips], color='blue', marker='x', s=100, label="Dips")
-        ax.scatter(sp_axis[dips_penalized], raw_sp_norm[dips_penalized], color='darkorange', marker='x', s=100,
-                   label="Dips Penalized")
-        ax.scatter(sp_axis[peaks], raw_sp_norm[peaks], color='green', marker='x', s=100, label="Peaks")
-        ax.scatter(sp_axis[peaks_penalized], raw_sp_norm[peaks_penalized], color='red', marker='x', s=100,
-                   label="Peaks Penalized")
-        if len(DebugCollector.collected_data['SINGLE_PEAK_PENALIZATION']['point_for_penalization']) > 0:
-            ax.scatter(sp_axis[peaks],
-                       DebugCollector.collected_data['SINGLE_PEAK_PENALIZATION']['point_for_penalization'],
-                       color='tab:green', marker='o', alpha=0.4)
-        if len(DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['upper_point_for_penalization']) > 0:
-            ax.scatter(sp_axis[dips],
-                       DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['upper_point_for_penalization'],
-                       color='tab:blue', marker='^', alpha=0.4)
-        if len(DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['lower_point_for_penalization']) > 0:
-            ax.scatter(sp_axis[dips],
-                       DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['lower_point_for_penalization'],
-                       color='tab:blue', marker='^', alpha=0.4)
-        ax.set_xlabel("Raman shift (cm-1)")
-        ax.set_ylabel("Norm. Intensity")
-        ax.grid(alpha=0.4)
-        ax.legend()
-        peaks_penalty = round(DebugCollector.collected_data['SINGLE_PEAK_PENALIZATION']['single_peak_penalization'], 4)
-        dips_penalty = round(DebugCollector.collected_data['SINGLE_DIP_PENALIZATION']['single_dip_penalization'], 4)
-        ax.set_title(f"Peaks and Dips Penalized\n Peaks Value: {peaks_penalty}, Dips Value: {dips_penalty}")
-        # endregion
-        DebugCollector.logPlot("SINGLE_PEAKS_DIPS_PENALIZATION", "plot", fig)
-        plt.close(fig)
-        # region Intensity Penalization plot
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(sp_axis, raw_sp_norm, color='tab:blue', label="Normalized Spectra", alpha=0.4)
-        ax.plot(sp_axis, baseline_sp_norm, color='tab:orange', label="Normalized Baseline", alpha=0.4)
-        ax.scatter(sp_axis[DebugCollector.collected_data["INTENSITY_PENALIZATION"]["filtered_indexes"]],
-                   raw_sp_norm[DebugCollector.collected_data["INTENSITY_PENALIZATION"]["filtered_indexes"]],
-                   c='red', s=25, label="Unsound intensities", alpha=0.5)
-
-        ax.set_xlabel("Raman shift (cm-1)")
-        ax.set_ylabel("Norm. Intensity")
-        ax.grid(alpha=0.4)
-        ax.legend()
-        ax.set_title(
-            f"Intensity Penalty Value: {round(DebugCollector.collected_data['INTENSITY_PENALIZATION']['intensity_penalization'], 4)}")
-        # endregion
-        DebugCollector.logPlot("INTENSITY_PENALIZATION", "plot", fig)
-        plt.close(fig)
-        # region AUC Penalization plot
-        interp = DebugCollector.collected_data['AUC_PENALIZATION']['interpolation']
-        min_ref = min([min(raw_sp), min(baseline), min(interp)])
-        max_ref = max([max(raw_sp), max(baseline), max(interp)])
-
-        spectra_plot = (raw_sp - min_ref) / (max_ref - min_ref)
-        baseline_plot = (baseline - min_ref) / (max_ref - min_ref)
-        interp_plot = (interp - min_ref) / (max_ref - min_ref)
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(sp_axis, spectra_plot, color='tab:blue', label="Normalized Spectra")
-        ax.fill_between(sp_axis, spectra_plot, where=(spectra_plot > 0), alpha=0.3, color='tab:blue')
-        ax.plot(sp_axis, baseline_plot, color='tab:orange', label="Normalized Baseline")
-        ax.fill_between(sp_axis, baseline_plot, where=(baseline_plot > 0), alpha=0.3, color='tab:orange')
-        ax.plot(sp_axis, interp_plot, color='tab:red', label="Interpolation")
-        ax.fill_between(sp_axis, interp_plot, where=(interp_plot > 0), alpha=0.3, color='tab:red')
-        ax.set_xlabel("Raman shift (cm-1)")
-        ax.set_ylabel("Intensity")
-        ax.grid(alpha=0.4)
-        ax.legend()
-        ax.set_title(
-            f"AUC Penalty Value: {round(DebugCollector.collected_data['AUC_PENALIZATION']['auc_penalization'], 4)}")
-        # endregion
-        DebugCollector.logPlot("AUC_PENALIZATION", "plot", fig)
-        plt.close(fig)
-        # region Peak Region plot
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(sp_axis, raw_sp_norm_bas, color='tab:blue', alpha=0.4)
-        ax.plot(sp_axis, baseline_sp_norm, color='tab:orange')
-        ax.scatter(sp_axis[peaks], raw_sp_norm_bas[peaks], color='green', s=100, marker='x')
-        fake_prominences = DebugCollector.collected_data["REGION_PEAK_PENALIZATION"]["raman_shift_prominences"]
-
-        for (s, e), fp_band in zip(peak_edges, fake_prominences):
-            ax.plot(sp_axis[s:e], raw_sp_norm_bas[s:e], color='m')
-            for i, fp in enumerate(fp_band):
-                ax.vlines(sp_axis[s:e][i], ymin=raw_sp_norm_bas[s:e][i] - fp, ymax=raw_sp_norm_bas[s:e][i],
-                          color="lightblue", alpha=0.4)
-
-        for i, (left_edge, right_edge) in enumerate(peak_edges):
-            index_overfitting = DebugCollector.collected_data["REGION_PEAK_PENALIZATION"]["overfitting_index"][i]
-            overfitting = DebugCollector.collected_data["REGION_PEAK_PENALIZATION"]["overfitting"][i]
-
-            index_underfitting = DebugCollector.collected_data["REGION_PEAK_PENALIZATION"]["underfitting_index"][i]
-            underfitting = DebugCollector.collected_data["REGION_PEAK_PENALIZATION"]["underfitting"][i]
-            if len(overfitting) > 0:
-                ax.vlines(x=sp_axis[left_edge:right_edge][index_overfitting],
-                          ymin=baseline_sp_norm[left_edge:right_edge][index_overfitting],
-                          ymax=baseline_sp_norm[left_edge:right_edge][index_overfitting] - overfitting, color='red',
-                          alpha=0.4)
-
-            if len(underfitting) > 0:
-                ax.vlines(x=sp_axis[left_edge:right_edge][index_underfitting],
-                          ymin=baseline_sp_norm[left_edge:right_edge][index_underfitting],
-                          ymax=baseline_sp_norm[left_edge:right_edge][index_underfitting] + underfitting,
-                          color='tab:orange',
-                          alpha=0.4)
-        ax.set_xlabel("Raman shift (cm-1)")
-        ax.set_ylabel("Intensity")
-        ax.grid(alpha=0.4)
-        ax.set_title(
-            f"Peak Region Penalty value {DebugCollector.collected_data['REGION_PEAK_PENALIZATION']['peak_region_penalization']}")
-        ax.legend()
-        # endregion
-        DebugCollector.logPlot("REGION_PEAK_PENALIZATION", "plot", fig)
-        plt.close(fig)
-        # region Dip Region plot
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(sp_axis, raw_sp_norm_bas, color='tab:blue', alpha=0.4)
-        ax.plot(sp_axis, baseline_sp_norm, color='tab:orange')
-        ax.scatter(sp_axis[dips], raw_sp_norm_bas[dips], color='blue', s=100, marker='x')
-        fake_prominences = DebugCollector.collected_data["REGION_DIP_PENALIZATION"]["raman_shift_prominences"]
-
-        for (s, e), fp_band in zip(dips_edges, fake_prominences):
-            ax.plot(sp_axis[s:e], raw_sp_norm_bas[s:e], color='m')
-            for i, fp in enumerate(fp_band):
-                ax.vlines(sp_axis[s:e][i], ymin=raw_sp_norm_bas[s:e][i] - fp, ymax=raw_sp_norm_bas[s:e][i],
-                          color="lightblue", alpha=0.4)
-
-        for i, (left_edge, right_edge) in enumerate(dips_edges):
-            indexes = DebugCollector.collected_data["REGION_DIP_PENALIZATION"]["indexes"][i]
-            overfitting = DebugCollector.collected_data["REGION_DIP_PENALIZATION"]["overfitting"][i]
-            underfitting = DebugCollector.collected_data["REGION_DIP_PENALIZATION"]["underfitting"][i]
-
-            if len(overfitting) > 0:
-                ax.vlines(x=sp_axis[left_edge:right_edge][indexes],
-                          ymin=baseline_sp_norm[left_edge:right_edge][indexes],
-                          ymax=baseline_sp_norm[left_edge:right_edge][indexes] + overfitting, color='red',
-                          alpha=0.4)
-
-            if len(underfitting) > 0:
-                ax.vlines(x=sp_axis[left_edge:right_edge][indexes],
-                          ymin=baseline_sp_norm[left_edge:right_edge][indexes],
-                          ymax=baseline_sp_norm[left_edge:right_edge][indexes] - underfitting,
-                          color='tab:orange',
-                          alpha=0.4)
-        ax.set_xlabel("Raman shift (cm-1)")
-        ax.set_ylabel("Intensity")
-        ax.grid(alpha=0.4)
-        ax.set_title(
-            f"Dip Region Penalty value {round(DebugCollector.collected_data['REGION_DIP_PENALIZATION']['dip_region_penalization'], 4)}")
-        ax.legend()
-        # endregion
-        DebugCollector.logPlot("REGION_DIP_PENALIZATION", "plot", fig)
-        plt.close(fig)
-
-    data = [
-        ["Intensity Penalty", round(intensity_penalty,4)],
-        ["Single Peak Penalty", round(peaks_penalization,4)],
-        ["Peak Region Penalty", round(peak_region_penalization, 4)],
-        ["Single Dip Penalty", round(dips_penalization, 4)],
-        ["Dip Region Penalty", round(dips_region_penalization, 4)],
-        ["AUC Penalty", round(auc_penalization, 4)],
-        ["Mean Ratio Penalty", round(mean_ratio_penalization,4)],
-        ["IS-Score", round(is_score,4)],
-    ]
-
-    printOutputTable(data)
-
-    return is_score
\ No newline at end of file
+        # Only the arrays are recorded, the figures are rendered on the first access
+        logDebugPlots({"sp_axis": sp_axis, "raw_sp": raw_sp, "raw_sp_norm": raw_sp_norm,
+                       "raw_sp_norm_bas": raw_sp_norm_bas, "baseline": baseline, "baseline_sp_norm": baseline_sp_norm,
+                       "peaks": peaks, "peak_edges": peak_edges, "dips": dips, "dips_edges": dips_edges})
+
+    if verbose:
+        data = [
+            ["Intensity Penalty", round(intensity_penalty,4)],
+            ["Single Peak Penalty", round(peaks_penalization,4)],
+            ["Peak Region Penalty", round(peak_region_penalization, 4)],
+            ["Single Dip Penalty", round(dips_penalization, 4)],
+            ["Dip Region Penalty", round(dips_region_penalization, 4)],
+            ["AUC Penalty", round(auc_penalization, 4)],
+            ["Mean Ratio Penalty", round(mean_ratio_penalization,4)],
+            ["IS-Score", round(is_score,4)],
+        ]
+
+        printOutputTable(data)
+
+    if return_components:
+        return ISScoreComponents(is_score, *penalties)
+
+    return is_score
+
+
+def getIS_ScoreBatch(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array, **kwargs) -> tuple:
+    """
+    Compute the IS-Score for a batch of raw and baseline-corrected spectra sharing the same spectral axis.
+
+    This is a convenience loop, not a vectorized implementation: only the normalizations are computed along the
+    batch axis, while the band detection, the penalties and the final score are computed spectrum by spectrum with
+    the same code of getIS_Score, so the scores are identical to the ones of getIS_Score and the cost grows
+    linearly with the number of spectra. No output table is printed.
+
+    Parameters
+    ----------
+    raw_sp : np.array
+        The Raman spectra, with shape (N, L).
+    baseline_corrected_sp : np.array
+        The baseline corrected spectra, with shape (N, L).
+    sp_axis : np.array
+        The spectral axis shared by all the spectra, with shape (L,).
+
+    Returns
+    -------
+    is_scores, penalties : tuple
+        The IS-Score of each spectrum with shape (N,) and the penalties of each spectrum with shape (N, 7),
+        ordered as in ``PENALTY_NAMES``.
+    """
+    success = _checkBatchInput(raw_sp, baseline_corrected_sp, sp_axis)
+
+    if not success:
+        raise ValueError("Invalid input: the spectra must have shape (N, L) and the spectral axis shape (L,).")
+
+    PEAKS_DIPS_TOL = kwargs.pop("peaks_dips_tolerance", {"peaks": 5, "dips": 5})
+    custom_peaks = kwargs.get("custom_peaks", None)
+    custom_dips = kwargs.get("custom_dips", None)
+
+    raw_sp, baseline_corrected_sp, sp_axis = np.asarray(raw_sp), np.asarray(baseline_corrected_sp), np.array(sp_axis)
+    baseline = raw_sp - baseline_corrected_sp
+
+    # Normalize only the spectra for peaks/dips detection
+    raw_min, raw_max = raw_sp.min(axis=1, keepdims=True), raw_sp.max(axis=1, keepdims=True)
+    raw_sp_norm = (raw_sp - raw_min) / (raw_max - raw_min)
+    neg_min, neg_max = (-raw_sp_norm).min(axis=1, keepdims=True), (-raw_sp_norm).max(axis=1, keepdims=True)
+    neg_sp = (-raw_sp_norm - neg_min) / (neg_max - neg_min)
+
+    # Normalize both spectra and baseline for comparison
+    min_val = np.minimum(raw_min, baseline.min(axis=1, keepdims=True))
+    max_val = np.maximum(raw_max, baseline.max(axis=1, keepdims=True))
+    raw_sp_norm_bas = (raw_sp - min_val) / (max_val - min_val)
+    baseline_sp_norm = (baseline - min_val) / (max_val - min_val)
+    combined_min = np.minimum(raw_sp_norm_bas.min(axis=1), baseline_sp_norm.min(axis=1))
+    combined_max = np.maximum(raw_sp_norm_bas.max(axis=1), baseline_sp_norm.max(axis=1))
+
+    is_scores = np.empty(raw_sp.shape[0])
+    penalties = np.empty((raw_sp.shape[0], len(PENALTY_NAMES)))
+    for i in range(raw_sp.shape[0]):
+        analysis = _analyze(raw_sp[i], sp_axis, raw_sp_norm[i], neg_sp[i], PEAKS_DIPS_TOL, custom_peaks, custom_dips)
+        penalties[i] = _getPenalties(analysis, baseline[i], raw_sp_norm_bas[i], baseline_sp_norm[i],
+                                     combined_min[i], combined_max[i])
+        is_scores[i] = _finalScore(penalties[i])
+
+    return is_scores, penalties
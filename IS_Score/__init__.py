@@ -1 +1,7 @@
-from .IS_Score import getIS_Score
\ No newline at end of file
+__version__ = "1.0"
+
+from .IS_Score import getIS_Score, getIS_ScoreBatch, ISScoreComponents, analyzeSpectrum, scoreBaseline, SpectrumAnalysis
+from .cache import AnalysisCache, BaselineCache
+from .result import ISScoreResult, getIS_ScoreResult, scoreBaselineResult, saveResults, loadResults
+from .streaming import StreamingISScorer
+from .instrumentation import StageTimings, timeStages
@@ -0,0 +1,4 @@
+import sys
+from IS_Score.cli import main
+
+sys.exit(main())
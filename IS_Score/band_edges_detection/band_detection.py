@@ -1,9 +1,12 @@
 import io
+import bisect
 import contextlib
 import numpy as np
-from scipy import signal
-from findpeaks import findpeaks
-from collections import Counter
+from scipy import signal, interpolate
+
+# Window lengths of the Savitzky-Golay filters used to confirm the raw bands
+WINDOW_LENGTHS = (20, 30, 40, 50, 60)
+
 
 def findBands(sp: np.array, tolerance: int) -> list:
     """
@@ -22,8 +25,9 @@ def findBands(sp: np.array, tolerance: int) -> list:
         The list containing the detected band.
     """
 
-    bands_raw, _ = signal.find_peaks(sp, prominence=(None, None))
-    raw_prominences = signal.peak_prominences(sp, bands_raw)[0]
+    # The raw peaks and prominences are computed once, the detection of each window keeps the prominent ones
+    bands_raw, info_raw = signal.find_peaks(sp, prominence=(None, None))
+    raw_prominences = info_raw["prominences"]
 
     """
     Exploit all the peaks available of the spectra to define a prominence filter for the computation
@@ -32,26 +36,35 @@ def findBands(sp: np.array, tolerance: int) -> list:
     raw_prominence_filter = [(min(raw_prominences) + max(raw_prominences)) / 5, None]
     band_prominence_filter = [0.005, None]
 
-    raw_bands_counter, common_bands_counter = Counter(), Counter()
+    # Number of windows in which each raw band is a common band, and the first of them
+    common_bands_counter = np.zeros(len(bands_raw), dtype=int)
+    first_window = np.full(len(bands_raw), len(WINDOW_LENGTHS))
 
-    for wl in [20, 30, 40, 50, 60]:
-        bands_raw, info_raw = signal.find_peaks(sp, prominence=raw_prominence_filter)
+    for i, wl in enumerate(WINDOW_LENGTHS):
+        selected = raw_prominences >= raw_prominence_filter[0]
 
         sp_den = signal.savgol_filter(sp, window_length=wl, polyorder=4)
         bands_den, info_den = signal.find_peaks(sp_den, prominence=band_prominence_filter)
 
-        # Find the common bands between the raw and denoised bands
-        common_bands = [raw_band for raw_band in bands_raw if np.isclose(bands_den, raw_band, atol=tolerance).sum() > 0]
+        # Find the common bands between the raw and denoised bands, comparing each raw band with the closest
+        # denoised band with the same tolerance of np.isclose
+        if len(bands_den) > 0:
+            pos = np.clip(np.searchsorted(bands_den, bands_raw), 1, len(bands_den))
+            closest_dist = np.minimum(np.abs(bands_den[pos - 1] - bands_raw),
+                                      np.abs(bands_den[np.minimum(pos, len(bands_den) - 1)] - bands_raw))
+            common = selected & (closest_dist <= tolerance + 1e-05 * np.abs(bands_raw))
 
-        # Count the number of times a peak appears in the common peaks
-        for p in common_bands: common_bands_counter[p] += 1
+            # Count the number of times a peak appears in the common peaks
+            common_bands_counter += common
+            first_window[common & (first_window == len(WINDOW_LENGTHS))] = i
 
         # Update the prominences filters
         raw_prominence_filter = [(min(raw_prominences) + max(raw_prominences)) / ((wl / 10) * 2), None]
         band_prominence_filter[0] += 0.001
 
-    # Retrieve only the peaks common which appears at least 2 times
-    bands = [key for key, value in common_bands_counter.items() if value > 1]
+    # Retrieve only the peaks common which appears at least 2 times, in the order in which they were found
+    repeated = np.flatnonzero(common_bands_counter > 1)
+    bands = list(bands_raw[repeated[np.argsort(first_window[repeated], kind="stable")]])
 
     # Filtering bands which are too close to each other
     filtered_bands = [bands[0]] if bands else []
@@ -62,10 +75,70 @@ def findBands(sp: np.array, tolerance: int) -> list:
     return filtered_bands
 
 
+def _walkBounds(sp: np.array, bounds: np.array, minima: np.array, stops: np.array, forward: bool,
+                max_iter: int, atol: float) -> np.array:
+    """
+    Move the bounds of many bands at once, one sample per step, until their intensity is close to the one of their
+    relative minima.
+
+    Parameters
+    ----------
+    sp : np.array
+        The Raman spectrum.
+    bounds : np.array
+        The starting bound of each band.
+    minima : np.array
+        The relative minima of each band.
+    stops : np.array
+        The index of the neighbouring relative minima, at which a bound stops (-1 if there is none).
+    forward : bool
+        True for the right bounds, which move forwards while they are above the minima, False for the left bounds,
+        which move backwards while they are above the minima.
+    max_iter : int
+        The maximum number of steps.
+    atol : float
+        The absolute tolerance of the comparison with the minima.
+
+    Returns
+    -------
+    bounds : np.array
+        The final bounds.
+    """
+    bounds = bounds.copy()
+    minima_sp = sp[minima]
+    end = len(sp) - 1 if forward else 0
+    active = np.ones(len(bounds), dtype=bool)
+
+    for _ in range(max_iter):
+        bound_sp = sp[bounds]
+        # Same comparison of np.isclose, whose relative tolerance is applied to its second argument
+        if forward:
+            close = np.abs(minima_sp - bound_sp) <= atol + 1e-05 * np.abs(bound_sp)
+        else:
+            close = np.abs(bound_sp - minima_sp) <= atol + 1e-05 * np.abs(minima_sp)
+        active &= ~close & (bounds != end)
+        if not active.any():
+            break
+
+        # Adjust the bound based on the intensity value of the closest relative minima
+        if forward:
+            step = np.where(bound_sp > minima_sp, 1, -1)
+        else:
+            step = np.where(bound_sp < minima_sp, 1, -1)
+        bounds = np.where(active, bounds + step, bounds)
+
+        active &= bounds != stops
+
+    return bounds
+
+
 def _boundEdgesDetection(sp: np.array, bands: list) -> list:
     """
     Find the edges using the bound method.
 
+    Each bound starts from the band mirrored on its closest relative minima and moves towards the intensity of the
+    minima. The bounds of all the bands are moved together, one step at a time.
+
     Parameters
     ----------
     sp : np.array
@@ -85,58 +158,168 @@ def _boundEdgesDetection(sp: np.array, bands: list) -> list:
     den_sp = signal.savgol_filter(sp, window_length=25, polyorder=3)
     den_rel_minima = signal.argrelmin(den_sp, order=5)[0]
 
-    edges = []
-    for band in bands:
-        # Find the relative minima that is closest to the band
-        index_min = np.argmin(np.abs(den_rel_minima - band))
-        minima_index = den_rel_minima[index_min]
+    if len(bands) == 0:
+        return []
+    if len(den_rel_minima) == 0:
+        raise ValueError("Invalid input: the spectrum has no relative minima to bound the bands.")
+
+    # Find the relative minima that is closest to the band, the left one if they are at the same distance
+    bands_arr = np.asarray(bands, dtype=np.int64)
+    pos = np.searchsorted(den_rel_minima, bands_arr)
+    left, right = np.maximum(pos - 1, 0), np.minimum(pos, len(den_rel_minima) - 1)
+    use_left = np.abs(den_rel_minima[left] - bands_arr) <= np.abs(den_rel_minima[right] - bands_arr)
+    index_min = np.where(use_left, left, right)
+    minima_index = den_rel_minima[index_min]
+
+    # If the minima is greater then the band, the bound need to go backwards
+    backwards = minima_index > bands_arr
+    bounds = np.empty(len(bands_arr), dtype=np.int64)
+
+    # Retrieve the previous minima index if available, the left bound can not go below zero
+    previous = np.where(index_min != 0, den_rel_minima[index_min - 1], -1)[backwards]
+    left_bound = np.maximum(bands_arr[backwards] - (minima_index[backwards] - bands_arr[backwards]), 0)
+    bounds[backwards] = _walkBounds(sp, left_bound, minima_index[backwards], previous, False, MAX_ITER, ATOL)
+
+    # Retrieve the next minima index if available. If the bound is greater than the length of the spectra, there
+    # is not enough space to find the edge: set the bound to the last element of the spectra
+    forwards = ~backwards
+    next_index = np.minimum(index_min + 1, len(den_rel_minima) - 1)
+    next = np.where(index_min + 1 < len(den_rel_minima), den_rel_minima[next_index], -1)[forwards]
+    right_bound = np.minimum(bands_arr[forwards] + (bands_arr[forwards] - minima_index[forwards]), len(sp) - 1)
+    bounds[forwards] = _walkBounds(sp, right_bound, minima_index[forwards], next, True, MAX_ITER, ATOL)
+
+    return [(bound, minima) if back else (minima, bound)
+            for bound, minima, back in zip(bounds, minima_index, backwards)]
+
+
+def _interpolateLine(sp: np.array, factor: int) -> np.array:
+    """
+    Interpolate the spectrum by the given factor with a quadratic spline.
+    The original samples are kept as they are, as in the interpolation performed by findpeaks.
 
-        # If the minima is greater then the band, the bound need to go backwards
-        if minima_index > band:
-            left_bound = band - (minima_index - band)
-            # Sanity check
-            left_bound = 0 if left_bound <= 0 else left_bound
+    Parameters
+    ----------
+    sp : np.array
+        The Raman spectrum.
+    factor : int
+        The interpolation factor.
 
-            # Retrieve the previous minima index if available
-            previous = den_rel_minima[index_min - 1] if index_min != 0 else -1
+    Returns
+    -------
+    sp_interp : np.array
+        The interpolated spectrum, with length len(sp) * factor.
+    """
+    n_boost = len(sp) * factor
+    nodes = np.unique(np.floor(np.linspace(0, n_boost - 1, len(sp))).astype(int))
 
-            it = 0
-            while (not (np.isclose(sp[left_bound], sp[minima_index], atol=ATOL))) and (it < MAX_ITER) and (
-                    left_bound != 0):
-                # Adjust the bound based on the intensity value of the closest relative minima
-                left_bound = left_bound + 1 if sp[left_bound] < sp[minima_index] else left_bound - 1
+    spline = interpolate.make_interp_spline(nodes, sp, k=2, check_finite=False)
+    sp_interp = spline(np.arange(n_boost))
+    sp_interp[nodes] = sp
 
-                if (left_bound <= 0) or (previous == left_bound):
-                    break
-                it += 1
+    return sp_interp
 
-            edges.append((left_bound, minima_index))
 
-        else:
-            right_bound = band + (band - minima_index)
+def _peakDetect(sp: np.array, factor: int = 5) -> tuple:
+    """
+    Find the peaks and valleys of the spectrum with the peakdetect method.
 
-            # If the bound is greater than the length of the spectra, there is not enough space to find the edge
-            # Set the bound to the last element of the spectra
-            right_bound = len(sp) - 1 if right_bound >= len(sp) else right_bound
+    This is a NumPy implementation of ``findpeaks(method='peakdetect', lookahead=1, interpolate=factor)``: the
+    spectrum is interpolated, the alternating maxima and minima are detected on the interpolated signal and then
+    mapped back to the indexes of the original spectrum.
+
+    Parameters
+    ----------
+    sp : np.array
+        The Raman spectrum.
+    factor : int
+        The interpolation factor.
 
-            # Retrieve the next minima index if available
-            next = den_rel_minima[index_min + 1] if index_min + 1 < len(den_rel_minima) else -1
+    Returns
+    -------
+    peaks, valleys : tuple
+        The sorted indexes of the peaks and of the valleys of the spectrum.
+    """
+    empty = np.array([], dtype=int)
+    sp_interp = _interpolateLine(sp, factor)
+    n = len(sp_interp)
+
+    # With a lookahead of 1 a maximum is confirmed by the first strict decrease after it, a minimum by the first
+    # strict increase. The last sample is never evaluated.
+    diff = np.diff(sp_interp)
+    decreases = (np.flatnonzero(diff[:n - 2] < 0) + 1).tolist()
+    increases = (np.flatnonzero(diff[:n - 2] > 0) + 1).tolist()
+    if not decreases and not increases:
+        return empty, empty
+
+    # The extremum is placed at the first sample of a plateau
+    plateau_start = np.maximum.accumulate(np.where(np.r_[True, diff != 0], np.arange(n), 0))
+
+    # The first extremum is always at the first sample and is discarded
+    first_dec = decreases[0] if decreases else n
+    first_inc = increases[0] if increases else n
+    seeking_max = first_inc < first_dec
+    start = min(first_dec, first_inc) + 1
+
+    maxima, minima = [], []
+    while True:
+        changes = decreases if seeking_max else increases
+        i = bisect.bisect_left(changes, start + 1)
+        if i == len(changes):
+            break
+        k = changes[i]
+        (maxima if seeking_max else minima).append(max(plateau_start[k - 1], start))
+        # The sample that confirmed the extremum is not part of the following search
+        start = k + 1
+        seeking_max = not seeking_max
+
+    if not maxima or not minima:
+        return empty, empty
+
+    # Scale back to the original spectrum, the first and last samples are considered valleys
+    idx_valleys = np.array([0] + minima + [n - 1])
+    idx_peaks = np.array(maxima)
+    valleys = np.minimum(np.ceil(((idx_valleys / n) * len(sp))).astype(int), len(sp) - 1)
+    peaks = np.minimum(np.ceil(((idx_peaks / n) * len(sp))).astype(int), len(sp) - 1)
+
+    # The scaling is not exact, compare each index with the previous one
+    previous = np.maximum(valleys - 1, 0)
+    valleys = np.where(sp[previous] <= sp[valleys], previous, valleys)
+    previous = np.maximum(peaks - 1, 0)
+    peaks = np.where(sp[previous] >= sp[peaks], previous, peaks)
+
+    return np.unique(peaks), np.unique(valleys)
+
+
+def _findpeaksPeakDetect(sp: np.array, factor: int = 5) -> tuple:
+    """
+    Find the peaks and valleys of the spectrum with the peakdetect method of the findpeaks package.
+
+    Parameters
+    ----------
+    sp : np.array
+        The Raman spectrum.
+    factor : int
+        The interpolation factor.
 
-            it = 0
-            while (not (np.isclose(sp[minima_index], sp[right_bound], atol=ATOL))) and (it < MAX_ITER) and (
-                    right_bound != len(sp) - 1):
-                # Adjust the bound based on the intensity value of the closest relative minima
-                right_bound = right_bound + 1 if sp[right_bound] > sp[minima_index] else right_bound - 1
+    Returns
+    -------
+    peaks, valleys : tuple
+        The sorted indexes of the peaks and of the valleys of the spectrum.
+    """
+    # findpeaks pulls in pandas and its plotting stack, import it only when it is requested
+    from findpeaks import findpeaks
+    with contextlib.redirect_stdout(io.StringIO()):
+        fp = findpeaks(method='peakdetect', lookahead=1, interpolate=factor)
+        bands_results = fp.fit(sp)
 
-                if (right_bound >= len(sp)) or (next == right_bound):
-                    break
-                it += 1
-            edges.append((minima_index, right_bound))
+    band_df = bands_results['df']
+    peaks = band_df.loc[band_df['peak'] == True, 'x'].values
+    valleys = band_df.loc[band_df['valley'] == True, 'x'].values
 
-    return edges
+    return peaks, valleys
 
 
-def getBandEdges(sp: np.array, bands: list) -> list:
+def getBandEdges(sp: np.array, bands: list, peak_detector: str = "native") -> list:
     """
     Find the edges for each band in the list.
 
@@ -146,6 +329,9 @@ def getBandEdges(sp: np.array, bands: list) -> list:
         The Raman spectrum.
     bands : list
         The list containing the bands of which edges need to be detected.
+    peak_detector : str, optional
+        The implementation of the peakdetect method: "native" (default) or "findpeaks", which requires the
+        findpeaks package.
 
     Returns
     -------
@@ -156,26 +342,30 @@ def getBandEdges(sp: np.array, bands: list) -> list:
     bound_edges = _boundEdgesDetection(sp, bands)
 
     den_sp = signal.savgol_filter(sp, window_length=25, polyorder=4)
-    with contextlib.redirect_stdout(io.StringIO()):
-        fp = findpeaks(method='peakdetect', lookahead=1, interpolate=5)
-        bands_results = fp.fit(den_sp)
 
-    mapped_bands = []
-    band_df = bands_results['df']
-    band_only_df = band_df[band_df['peak'] == True]
+    if peak_detector == "findpeaks":
+        detected_peaks, valleys = _findpeaksPeakDetect(den_sp)
+    else:
+        detected_peaks, valleys = _peakDetect(den_sp)
 
     # Filter the bands based on the distance to the closest peak of the additional find peaks methods
-    for band in bands:
-        closest_peak = min(band_only_df['x'], key=lambda x: abs(x - band))
-        if abs(closest_peak - band) <= 8:
-            mapped_bands.append(band)
-
-    # Retrieve the edges with the new method
+    mapped_bands = []
+    if len(detected_peaks) > 0:
+        bands_arr = np.asarray(bands, dtype=int)
+        pos = np.searchsorted(detected_peaks, bands_arr)
+        left_dist = np.abs(bands_arr - detected_peaks[np.maximum(pos - 1, 0)])
+        right_dist = np.abs(detected_peaks[np.minimum(pos, len(detected_peaks) - 1)] - bands_arr)
+        closest_dist = np.minimum(left_dist, right_dist)
+        mapped_bands = [band for band, dist in zip(bands, closest_dist) if dist <= 8]
+
+    # Retrieve the edges with the new method, as the closest valleys on the left and on the right of the band.
+    # If a side has no valley, the edge is set on the band itself so that the bound edges are kept.
     new_edges = []
-    vallyes = band_df[band_df['valley'] == True]
-    for band in mapped_bands:
-        left_edge = vallyes.loc[(vallyes.index < band)].iloc[-1]['x']
-        right_edge = vallyes.loc[(vallyes.index > band)].iloc[0]['x']
+    left_pos = np.searchsorted(valleys, mapped_bands, side='left')
+    right_pos = np.searchsorted(valleys, mapped_bands, side='right')
+    for band, l_pos, r_pos in zip(mapped_bands, left_pos, right_pos):
+        left_edge = valleys[l_pos - 1] if l_pos > 0 else band
+        right_edge = valleys[r_pos] if r_pos < len(valleys) else band
         new_edges.append((left_edge, right_edge))
 
     # Based on the ratio of the length of the edges, chose to keep the old edges or use the new edges
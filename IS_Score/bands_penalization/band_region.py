@@ -29,7 +29,8 @@ def getRamanShiftProminences(type: str, sp: np.array, baseline: np.array, bands:
 
     raman_shift_prominences = []
     for band, prom, (left_edge, right_edge) in zip(bands, prominences, edges):
-        region_diff = np.abs(sp[left_edge:right_edge] - baseline[left_edge:right_edge])
+        region_sp, region_baseline = sp[left_edge:right_edge], baseline[left_edge:right_edge]
+        region_diff = np.abs(region_sp - region_baseline)
 
         if type == "peak":
             band_prominence = prom[0][0]
@@ -38,14 +39,11 @@ def getRamanShiftProminences(type: str, sp: np.array, baseline: np.array, bands:
             band_prominence = np.abs(prom[0][0] / 2)
             band_diff = np.abs(sp[band] - baseline[band])
 
-        band_region_fake_prom = []
-        for i, diff in enumerate(region_diff):
-            prominence_freq = (diff * band_prominence) / band_diff
+        band_region_fake_prom = (region_diff * band_prominence) / band_diff
 
-            if (type == "dip") and (sp[left_edge:right_edge][i] - prominence_freq < 0):
-                prominence_freq = sp[left_edge:right_edge][i]
-
-            band_region_fake_prom.append(prominence_freq)
+        if type == "dip":
+            # The prominence of a dip can not go below zero
+            band_region_fake_prom = np.where(region_sp - band_region_fake_prom < 0, region_sp, band_region_fake_prom)
 
         raman_shift_prominences.append(band_region_fake_prom)
 
@@ -53,7 +51,95 @@ def getRamanShiftProminences(type: str, sp: np.array, baseline: np.array, bands:
 
 
 
-def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: list, prominences: list):
+def regionPeakBands(sp: np.array, baseline: np.array, peaks: list, edges: list, raman_shift_prominences: list):
+    """
+    Compute the diagnostics of each peak region, from which the peak region penalty is computed.
+
+    Parameters
+    ----------
+    sp: np.array
+        The spectra data.
+    baseline: np.array
+        The baseline data.
+    peaks: list
+        The list containing the peaks.
+    edges: list
+        The list containing the edges for each peak.
+    raman_shift_prominences: list
+        The fake prominences of each peak region, as returned by getRamanShiftProminences.
+
+    Yields
+    ------
+    overfitting, overfitting_index, underfitting, underfitting_index, overfitting_penalty, underfitting_penalty: tuple
+        For each peak, the distances from the baseline of the fake prominences below and above it, their indexes
+        relative to the left edge, and the overfitting and underfitting penalties of the region.
+    """
+    for peak, (left_edge, right_edge), fp_band in zip(peaks, edges, raman_shift_prominences):
+        region_sp, region_baseline = sp[left_edge:right_edge], baseline[left_edge:right_edge]
+        fake_prom_intensity = region_sp - fp_band
+
+        # The penalty is computed by checking if the fake prominence is above or below the baseline
+        overfitting_indexes_plot = np.flatnonzero(fake_prom_intensity < region_baseline)
+        underfitting_indexes_plot = np.flatnonzero(fake_prom_intensity > region_baseline)
+        freq_prom_baseline_distance_over = np.abs(fake_prom_intensity[overfitting_indexes_plot] - region_baseline[overfitting_indexes_plot])
+        freq_prom_baseline_distance_under = np.abs(fake_prom_intensity[underfitting_indexes_plot] - region_baseline[underfitting_indexes_plot])
+
+        # We defined an algorithm that finds many more peaks than before, we need to reduce this penalization
+        # I exploit the percentile of the fake prominence distance to the baseline
+        perc_over = np.percentile(freq_prom_baseline_distance_over, 75) if len(freq_prom_baseline_distance_over) > 0 else 0
+        perc_under = np.percentile(freq_prom_baseline_distance_under, 75) if len(freq_prom_baseline_distance_under) > 0 else 0
+
+        tmp = freq_prom_baseline_distance_over[freq_prom_baseline_distance_over < perc_over]
+        tmp2 = freq_prom_baseline_distance_under[freq_prom_baseline_distance_under < perc_under]
+
+        # Round in order to set to zero elements too low
+        mean_over = np.round(np.mean(tmp), decimals=3) if len(tmp) > 0 else 0
+        mean_under = np.round(np.mean(tmp2), 4) if len(tmp2) > 0 else 0
+
+        yield (freq_prom_baseline_distance_over, overfitting_indexes_plot,
+               freq_prom_baseline_distance_under, underfitting_indexes_plot, mean_over, mean_under)
+
+
+def regionDipBands(sp: np.array, baseline: np.array, dips: list, edges: list, raman_shift_prominences: list):
+    """
+    Compute the diagnostics of each dip region, from which the dip region penalty is computed.
+
+    Parameters
+    ----------
+    sp: np.array
+        The spectra data.
+    baseline: np.array
+        The baseline data.
+    dips: list
+        The list containing the dips.
+    edges: list
+        The list containing the edges for each dip.
+    raman_shift_prominences: list
+        The fake prominences of each dip region, as returned by getRamanShiftProminences.
+
+    Yields
+    ------
+    overfitting, underfitting, overfitting_penalty, underfitting_penalty: tuple
+        For each dip, the distances from the baseline of the lowered and raised fake prominences at every point of
+        the region (zero where the baseline is not crossed) and their means.
+    """
+    for dip, (left_edge, right_edge), fp_band in zip(dips, edges, raman_shift_prominences):
+        region_sp, region_baseline = sp[left_edge:right_edge], baseline[left_edge:right_edge]
+
+        lower_intensity = region_sp - fp_band
+        freq_prom_baseline_distance_lower = np.where(lower_intensity > region_baseline,
+                                                     np.abs(lower_intensity - region_baseline), 0)
+
+        greater_intensity = region_sp + fp_band
+        freq_prom_baseline_distance_greater = np.where(greater_intensity < region_baseline,
+                                                       np.abs(greater_intensity - region_baseline), 0)
+
+        yield (freq_prom_baseline_distance_lower, freq_prom_baseline_distance_greater,
+               np.mean(freq_prom_baseline_distance_lower), np.mean(freq_prom_baseline_distance_greater))
+
+
+def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: list, prominences: list,
+                         bands: list = None):
     """
     Compute the peak region penalty.
 
@@ -69,6 +155,9 @@ def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: l
         The list containing the edges for each peak.
     prominences: list
         The list containing the prominences for each peak.
+    bands: list, optional
+        The diagnostics of each peak region, as yielded by regionPeakBands with the same arguments. They are
+        computed if not given.
 
     Returns
     -------
@@ -78,7 +167,10 @@ def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: l
     underfitting_penalties = []
     overfitting_penalties = []
 
-    raman_shift_prominences = getRamanShiftProminences("peak", sp, baseline, peaks, edges, prominences)
+    if bands is None or DebugCollector.enabled:
+        raman_shift_prominences = getRamanShiftProminences("peak", sp, baseline, peaks, edges, prominences)
+    if bands is None:
+        bands = regionPeakBands(sp, baseline, peaks, edges, raman_shift_prominences)
 
     if DebugCollector.enabled:
         DebugCollector.log("REGION_PEAK_PENALIZATION", "overfitting", [])
@@ -89,45 +181,10 @@ def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: l
         DebugCollector.log("REGION_PEAK_PENALIZATION", "underfitting_index", [])
         DebugCollector.log("REGION_PEAK_PENALIZATION", "raman_shift_prominences", raman_shift_prominences)
 
-    for peak, prom, (left_edge, right_edge), fp_band in zip(peaks, prominences, edges, raman_shift_prominences):
-        freq_prom_baseline_distance_over = []
-        freq_prom_baseline_distance_under = []
-
-        overfitting_indexes_plot, underfitting_indexes_plot = [], []
-
-        for i, fp in enumerate(fp_band):
-            baseline_intensity = baseline[left_edge:right_edge][i]
-            spectra_intensity = sp[left_edge:right_edge][i]
-
-            # The penalty is computed by checking if the fake prominence is above or below the baseline
-            if (spectra_intensity - fp) < baseline_intensity:
-                freq_prom_baseline_distance_over.append(np.abs((spectra_intensity - fp) - baseline_intensity))
-                overfitting_indexes_plot.append(i)
-
-            if (spectra_intensity - fp) > baseline_intensity:
-                freq_prom_baseline_distance_under.append(np.abs((spectra_intensity - fp) - baseline_intensity))
-                underfitting_indexes_plot.append(i)
-
-        # We defined an algorithm that finds many more peaks than before, we need to reduce this penalization
-        # I exploit the percentile of the fake prominence distance to the baseline
-        perc_over = np.percentile(freq_prom_baseline_distance_over, 75) if len(freq_prom_baseline_distance_over) > 0 else 0
-        perc_under = np.percentile(freq_prom_baseline_distance_under, 75) if len(freq_prom_baseline_distance_under) > 0 else 0
-
-        tmp = np.array(freq_prom_baseline_distance_over)
-        tmp2 = np.array(freq_prom_baseline_distance_under)
-
-        if len(tmp[tmp < perc_over]) > 0:
-            # Round in order to set to zero elements too low
-            mean_over = np.round(np.mean(tmp[tmp < perc_over]), decimals=3)
-            overfitting_penalties.append(mean_over)
-        else:
-            overfitting_penalties.append(0)
-
-        if len(tmp2[tmp2 < perc_under]) > 0:
-            mean_under = np.round(np.mean(tmp2[tmp2 < perc_under]), 4)
-            underfitting_penalties.append(mean_under)
-        else:
-            underfitting_penalties.append(0)
+    for (freq_prom_baseline_distance_over, overfitting_indexes_plot, freq_prom_baseline_distance_under,
+         underfitting_indexes_plot, mean_over, mean_under) in bands:
+        overfitting_penalties.append(mean_over)
+        underfitting_penalties.append(mean_under)
 
         if DebugCollector.enabled:
             DebugCollector.get("REGION_PEAK_PENALIZATION", "overfitting").append(freq_prom_baseline_distance_over)
@@ -145,7 +202,8 @@ def getRegionPeakPenalty(sp: np.array, baseline: np.array, peaks: list, edges: l
     return peakRegionPenalization
 
 
-def getRegionDipPenalty(sp: np.array, baseline: np.array, dips: list, edges: list, prominences: list):
+def getRegionDipPenalty(sp: np.array, baseline: np.array, dips: list, edges: list, prominences: list,
+                        bands: list = None):
     """
     Compute the dips region penalty.
 
@@ -161,6 +219,9 @@ def getRegionDipPenalty(sp: np.array, baseline: np.array, dips: list, edges: lis
         The list containing the edges for each dip.
     prominences: list
         The list containing the prominences for each dip.
+    bands: list, optional
+        The diagnostics of each dip region, as yielded by regionDipBands with the same arguments. They are computed
+        if not given.
 
     Returns
     -------
@@ -170,7 +231,10 @@ def getRegionDipPenalty(sp: np.array, baseline: np.array, dips: list, edges: lis
 
     lower_penalties, greater_penalties = [], []
 
-    raman_shift_prominences = getRamanShiftProminences("dip", sp, baseline, dips, edges, prominences)
+    if bands is None or DebugCollector.enabled:
+        raman_shift_prominences = getRamanShiftProminences("dip", sp, baseline, dips, edges, prominences)
+    if bands is None:
+        bands = regionDipBands(sp, baseline, dips, edges, raman_shift_prominences)
 
     if DebugCollector.enabled:
         DebugCollector.log("REGION_DIP_PENALIZATION", "overfitting", [])
@@ -178,33 +242,15 @@ def getRegionDipPenalty(sp: np.array, baseline: np.array, dips: list, edges: lis
         DebugCollector.log("REGION_DIP_PENALIZATION", "indexes", [])
         DebugCollector.log("REGION_DIP_PENALIZATION", "raman_shift_prominences", raman_shift_prominences)
 
-    for dip, prom, (left_edge, right_edge), fp_band in zip(dips, prominences, edges, raman_shift_prominences):
-        freq_prom_baseline_distance_lower = []
-        freq_prom_baseline_distance_greater = []
-        indexes = []
-        for i, fp in enumerate(fp_band):
-            baseline_intensity = baseline[left_edge:right_edge][i]
-            spectra_intensity = sp[left_edge:right_edge][i]
-
-            penalty = 0
-            if (spectra_intensity - fp) > baseline_intensity:
-                penalty = np.abs((spectra_intensity - fp) - baseline_intensity)
-            freq_prom_baseline_distance_lower.append(penalty)
-
-            penalty_greater = 0
-            if (spectra_intensity + fp) < baseline_intensity:
-                penalty_greater = np.abs((spectra_intensity + fp) - baseline_intensity)
-            freq_prom_baseline_distance_greater.append(penalty_greater)
-            indexes.append(i)
-
-        lower_penalties.append(np.mean(freq_prom_baseline_distance_lower))
-        greater_penalties.append(np.mean(freq_prom_baseline_distance_greater))
+    for (freq_prom_baseline_distance_lower, freq_prom_baseline_distance_greater,
+         mean_lower, mean_greater) in bands:
+        lower_penalties.append(mean_lower)
+        greater_penalties.append(mean_greater)
 
         if DebugCollector.enabled:
             DebugCollector.get("REGION_DIP_PENALIZATION","overfitting").append(freq_prom_baseline_distance_lower)
             DebugCollector.get("REGION_DIP_PENALIZATION","underfitting").append(freq_prom_baseline_distance_greater)
-            DebugCollector.get("REGION_DIP_PENALIZATION","indexes").append(indexes)
-
+            DebugCollector.get("REGION_DIP_PENALIZATION","indexes").append(np.arange(len(freq_prom_baseline_distance_lower)))
 
     dipRegionPenalization = np.sum(lower_penalties) + np.sum(greater_penalties)
 
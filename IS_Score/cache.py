@@ -0,0 +1,484 @@
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numbers
+from collections import OrderedDict
+import numpy as np
+from IS_Score.IS_Score import ANALYSIS_VERSION, SpectrumAnalysis, analyzeSpectrum, _normalizeSpectrum, _readOnly, _meanRatioSpectra
+
+
+class _BlobStore:
+    """
+    Table of a sqlite file with size-bounded binary blobs, evicting the least recently used ones.
+
+    The connection is opened lazily and is not pickled, so the store can be sent to worker processes. The access
+    times of the hits are kept in memory and written in a single transaction every ``TOUCH_BATCH`` hits, before
+    an eviction and on close, so that reading an entry does not commit to the file.
+    """
+    TOUCH_BATCH = 64
+
+    def __init__(self, path: str, table: str, max_bytes: int):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._touched = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_touched"] = {}
+        return state
+
+    def __len__(self):
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, data BLOB NOT NULL, "
+                               "size INTEGER NOT NULL, last_access INTEGER NOT NULL)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_access ON {self.table} (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def flush(self):
+        """
+        Write the pending access times of the hits.
+        """
+        if not self._touched:
+            return
+        conn = self._connection()
+        conn.executemany(f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                         [(last_access, key) for key, last_access in self._touched.items()])
+        conn.commit()
+        self._touched.clear()
+
+    def clear(self):
+        self._touched.clear()
+        conn = self._connection()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+
+    def size(self) -> int:
+        return self._connection().execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def get(self, key: str):
+        conn = self._connection()
+        row = conn.execute(f"SELECT data FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        self._touched[key] = time.time_ns()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            self.flush()
+        return row[0]
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        # The eviction must see the recent hits
+        self.flush()
+        conn = self._connection()
+        conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                     (key, data, len(data), time.time_ns()))
+
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        while total > self.max_bytes:
+            key, size = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access LIMIT 1").fetchone()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+        conn.commit()
+
+
+class AnalysisCache:
+    """
+    Persistent cache of the baseline independent analysis of the raw spectra.
+
+    The entries are stored in a sqlite file, keyed by the hash of the bytes of the raw spectrum, the detection
+    settings and ``ANALYSIS_VERSION``, so the entries computed by an older detection are not reused. Each entry contains the validated peaks and dips, their edges and
+    prominences and the AUC interpolation, packed in a compressed npz blob. When the total size of the blobs exceeds
+    ``max_bytes`` the least recently used entries are removed.
+
+    The connection is opened lazily, so the cache can be sent to the worker processes of IS_Score.parallel and
+    shared by them.
+
+    Parameters
+    ----------
+    path : str
+        The path of the sqlite file. It is created if it does not exist.
+    max_bytes : int, optional
+        The maximum total size of the stored blobs. Default is 256 MB.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 2 ** 20):
+        self._store = _BlobStore(path, "analysis", max_bytes)
+
+    @property
+    def path(self) -> str:
+        return self._store.path
+
+    @property
+    def max_bytes(self) -> int:
+        return self._store.max_bytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._store)
+
+    def close(self):
+        """
+        Close the connection to the sqlite file. It is opened again on the next access.
+        """
+        self._store.close()
+
+    def clear(self):
+        """
+        Remove all the entries of the cache.
+        """
+        self._store.clear()
+
+    def size(self) -> int:
+        """
+        Return the total size in bytes of the stored blobs.
+        """
+        return self._store.size()
+
+    @staticmethod
+    def key(raw_sp: np.array, **kwargs) -> str:
+        """
+        Compute the key of a raw spectrum and of the detection settings.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        **kwargs
+            The optional parameters of analyzeSpectrum (peaks_dips_tolerance, custom_peaks, custom_dips).
+
+        Returns
+        -------
+        key : str
+            The hexadecimal SHA-256 digest identifying the analysis.
+        """
+        settings = {
+            "peaks_dips_tolerance": kwargs.get("peaks_dips_tolerance", {"peaks": 5, "dips": 5}),
+            "custom_peaks": kwargs.get("custom_peaks", None),
+            "custom_dips": kwargs.get("custom_dips", None),
+            "version": ANALYSIS_VERSION,
+        }
+        digest = hashlib.sha256(np.ascontiguousarray(raw_sp, dtype=np.float64).tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=lambda o: np.asarray(o).tolist()).encode())
+        return digest.hexdigest()
+
+    def get(self, raw_sp: np.array, sp_axis: np.array, **kwargs):
+        """
+        Return the cached analysis of the spectrum.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        **kwargs
+            The optional parameters of analyzeSpectrum.
+
+        Returns
+        -------
+        analysis : SpectrumAnalysis or None
+            The analysis of the spectrum, or None if it is not in the cache.
+        """
+        data = self._store.get(self.key(raw_sp, **kwargs))
+        return None if data is None else _unpackAnalysis(data, raw_sp, sp_axis)
+
+    def put(self, analysis: SpectrumAnalysis, **kwargs):
+        """
+        Store the analysis of a spectrum, evicting the least recently used entries if needed.
+
+        Parameters
+        ----------
+        analysis : SpectrumAnalysis
+            The analysis returned by analyzeSpectrum.
+        **kwargs
+            The optional parameters of analyzeSpectrum used to compute the analysis.
+        """
+        self._store.put(self.key(analysis.raw_sp, **kwargs), _packAnalysis(analysis))
+
+    def analyzeSpectrum(self, raw_sp: np.array, sp_axis: np.array, **kwargs) -> SpectrumAnalysis:
+        """
+        Return the analysis of the spectrum from the cache, computing and storing it if it is missing.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        **kwargs
+            The optional parameters of analyzeSpectrum.
+
+        Returns
+        -------
+        analysis : SpectrumAnalysis
+            The analysis of the spectrum.
+        """
+        analysis = self.get(raw_sp, sp_axis, **kwargs)
+        if analysis is None:
+            analysis = analyzeSpectrum(raw_sp, sp_axis, **dict(kwargs))
+            self.put(analysis, **kwargs)
+        return analysis
+
+
+def _canonicalParam(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_canonicalParam(v) for v in value]
+    return value
+
+
+class BaselineCache:
+    """
+    Cache of the baseline corrected spectra, keyed by the spectrum, the name of the baseline algorithm and its
+    parameters.
+
+    The corrected spectra are kept in an in-memory LRU tier of at most ``max_entries`` entries. If a path is given,
+    they are also stored in a sqlite file, which survives the process. The pipeline uses the cache only in the
+    calling process, so its worker processes never need a copy; if the cache is pickled anyway, the in-memory tier
+    is left out and only the sqlite file is shared.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum number of corrected spectra kept in memory. Default is 256.
+    path : str, optional
+        The path of the sqlite file of the on-disk tier. Default is None (in-memory only).
+    max_bytes : int, optional
+        The maximum total size of the corrected spectra stored on disk. Default is 256 MB.
+    """
+
+    def __init__(self, max_entries: int = 256, path: str = None, max_bytes: int = 256 * 2 ** 20):
+        self.max_entries = max_entries
+        self.hits, self.misses = 0, 0
+        self._memory = OrderedDict()
+        self._store = None if path is None else _BlobStore(path, "baseline", max_bytes)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_memory"] = OrderedDict()
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def close(self):
+        """
+        Close the connection to the sqlite file of the on-disk tier, if any.
+        """
+        if self._store is not None:
+            self._store.close()
+
+    def clear(self):
+        """
+        Remove all the entries of both tiers.
+        """
+        self._memory.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    @staticmethod
+    def key(raw_sp: np.array, sp_axis: np.array, algorithm: str, params: dict = None) -> str:
+        """
+        Compute the key of a baseline correction.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis, None if the algorithm does not use it.
+        algorithm : str
+            The name of the baseline algorithm.
+        params : dict, optional
+            The parameters of the algorithm. The order of the keys does not matter, and the numbers are compared
+            by value, so ``{"lam": 100000}`` and ``{"lam": 1e5}`` give the same key.
+
+        Returns
+        -------
+        key : str
+            The hexadecimal SHA-256 digest identifying the corrected spectrum.
+        """
+        digest = hashlib.sha256(np.ascontiguousarray(raw_sp, dtype=np.float64).tobytes())
+        if sp_axis is not None:
+            digest.update(np.ascontiguousarray(sp_axis, dtype=np.float64).tobytes())
+        params = sorted((str(k), _canonicalParam(v)) for k, v in (params or {}).items())
+        digest.update(json.dumps([algorithm, params], default=lambda o: np.asarray(o).tolist()).encode())
+        return digest.hexdigest()
+
+    def _remember(self, key: str, corrected: np.array):
+        self._memory[key] = corrected
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, raw_sp: np.array, sp_axis: np.array, algorithm: str, params: dict = None):
+        """
+        Return a copy of the cached corrected spectrum, or None if it is not in the cache.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        algorithm : str
+            The name of the baseline algorithm.
+        params : dict, optional
+            The parameters of the algorithm.
+        """
+        key = self.key(raw_sp, sp_axis, algorithm, params)
+        corrected = self._memory.get(key)
+        if corrected is not None:
+            self._memory.move_to_end(key)
+        elif self._store is not None:
+            data = self._store.get(key)
+            if data is not None:
+                corrected = _readOnly(np.load(io.BytesIO(data), allow_pickle=False))
+                self._remember(key, corrected)
+
+        if corrected is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return corrected.copy()
+
+    def put(self, raw_sp: np.array, sp_axis: np.array, algorithm: str, params: dict, corrected: np.array):
+        """
+        Store the corrected spectrum in both tiers.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        algorithm : str
+            The name of the baseline algorithm.
+        params : dict
+            The parameters of the algorithm.
+        corrected : np.array
+            The baseline corrected spectrum.
+        """
+        key = self.key(raw_sp, sp_axis, algorithm, params)
+        corrected = _readOnly(np.array(corrected))
+        self._remember(key, corrected)
+        if self._store is not None:
+            buffer = io.BytesIO()
+            np.save(buffer, corrected, allow_pickle=False)
+            self._store.put(key, buffer.getvalue())
+
+    def apply(self, func, raw_sp: np.array, sp_axis: np.array, algorithm: str, params: dict = None) -> np.array:
+        """
+        Return the corrected spectrum from the cache, computing and storing it if it is missing.
+
+        Parameters
+        ----------
+        func : callable
+            ``f(raw_sp, sp_axis)`` returning the corrected spectrum.
+        raw_sp : np.array
+            The Raman spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        algorithm : str
+            The name of the baseline algorithm.
+        params : dict, optional
+            The parameters of the algorithm, already set in func.
+
+        Returns
+        -------
+        corrected : np.array
+            The baseline corrected spectrum.
+        """
+        corrected = self.get(raw_sp, sp_axis, algorithm, params)
+        if corrected is None:
+            corrected = func(np.array(raw_sp), sp_axis)
+            self.put(raw_sp, sp_axis, algorithm, params, corrected)
+        return corrected
+
+
+def _packProminences(prominences: tuple) -> tuple:
+    prom = np.array([p[0] for p, _, _ in prominences], dtype=np.float64)
+    bases = np.array([(l[0], r[0]) for _, l, r in prominences], dtype=np.intp).reshape(-1, 2)
+    return prom, bases
+
+
+def _unpackProminences(prom: np.array, bases: np.array) -> tuple:
+    return tuple((np.array([p]), np.array([l]), np.array([r])) for p, (l, r) in zip(prom, bases))
+
+
+def _packAnalysis(analysis: SpectrumAnalysis) -> bytes:
+    """
+    Pack the baseline independent bands of the analysis in a compressed npz blob.
+    """
+    peaks_prom, peaks_bases = _packProminences(analysis.peaks_prominences)
+    dips_prom, dips_bases = _packProminences(analysis.dips_prominences)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer,
+                        peaks=np.array(analysis.peaks, dtype=np.int64),
+                        peak_edges=np.array(analysis.peak_edges, dtype=np.int64).reshape(-1, 2),
+                        peaks_prom=peaks_prom, peaks_bases=peaks_bases,
+                        dips=np.array(analysis.dips, dtype=np.int64),
+                        dips_edges=np.array(analysis.dips_edges, dtype=np.int64).reshape(-1, 2),
+                        dips_prom=dips_prom, dips_bases=dips_bases,
+                        interpolation=analysis.interpolation)
+    return buffer.getvalue()
+
+
+def _unpackAnalysis(data: bytes, raw_sp: np.array, sp_axis: np.array) -> SpectrumAnalysis:
+    """
+    Rebuild the analysis of the spectrum from a blob created by _packAnalysis.
+    """
+    raw_sp, sp_axis = np.array(raw_sp), np.array(sp_axis)
+    raw_sp_norm, neg_sp = _normalizeSpectrum(raw_sp)
+
+    with np.load(io.BytesIO(data)) as blob:
+        peaks, dips = tuple(blob["peaks"].tolist()), tuple(blob["dips"].tolist())
+        peak_edges = tuple(tuple(edges) for edges in blob["peak_edges"].tolist())
+        dips_edges = tuple(tuple(edges) for edges in blob["dips_edges"].tolist())
+        peaks_prominences = _unpackProminences(blob["peaks_prom"], blob["peaks_bases"])
+        dips_prominences = _unpackProminences(blob["dips_prom"], blob["dips_bases"])
+        interpolation = blob["interpolation"]
+
+    return SpectrumAnalysis(_readOnly(raw_sp), _readOnly(sp_axis), _readOnly(raw_sp_norm), _readOnly(neg_sp),
+                            peaks, peak_edges, peaks_prominences, dips, dips_edges, dips_prominences,
+                            _readOnly(interpolation), _meanRatioSpectra(raw_sp))
@@ -0,0 +1,174 @@
+import os
+import csv
+import sys
+import glob
+import time
+import argparse
+
+import numpy as np
+
+from IS_Score.cache import BaselineCache
+from IS_Score.loader import SPECTRUM_EXTENSIONS, isPackedDataset, openPackedDataset, packFolder
+from IS_Score.pipeline import scoreFiles, folderEntries, readFiles, datasetEntries, readDataset
+
+
+def _inputEntries(inputs: list, corrected_folder: str = None) -> list:
+    """
+    Expand the directories, glob patterns and files given on the command line into (name, raw_path, corrected_path)
+    entries. The spectra of a directory are named by their path relative to it, the others by their path.
+    """
+    entries = []
+    for item in inputs:
+        if os.path.isdir(item):
+            entries.extend(folderEntries(item, corrected_folder))
+            continue
+
+        paths = sorted(glob.glob(item)) if glob.has_magic(item) else [item]
+        for path in paths:
+            if not path.endswith(SPECTRUM_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            corrected_path = None
+            if corrected_folder is not None:
+                corrected_path = os.path.join(corrected_folder, os.path.basename(path))
+            entries.append((path, path, corrected_path))
+    return entries
+
+
+def _manifestEntries(manifest: str) -> list:
+    """
+    Read a manifest: a CSV file with the path of a raw spectrum and, optionally, of its corrected spectrum on each
+    row. Relative paths are resolved from the directory of the manifest.
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    entries = []
+    with open(manifest, newline="") as f:
+        for row in csv.reader(f):
+            row = [el.strip() for el in row]
+            if not row or not row[0] or row[0].startswith("#") or row[0] == "raw":
+                continue
+            raw_path = os.path.join(base, row[0])
+            corrected_path = os.path.join(base, row[1]) if len(row) > 1 and row[1] else None
+            entries.append((row[0], raw_path, corrected_path))
+    return entries
+
+
+def buildParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="is-score",
+        description="Score the baseline correction of many Raman spectra with the IS-Score, without the GUI.")
+    parser.add_argument("inputs", nargs="*",
+                        help="Directories, glob patterns or files (.txt/.csv) with the raw spectra, or the directory "
+                             "of a packed dataset.")
+    parser.add_argument("--manifest",
+                        help="CSV file with the path of a raw spectrum and, optionally, of its corrected spectrum "
+                             "on each row.")
+    parser.add_argument("--corrected",
+                        help="Directory (or packed dataset) with the baseline corrected spectra, with the same "
+                             "names of the raw spectra.")
+    parser.add_argument("--baseline", action="append", default=[],
+                        help="Baseline algorithm of the GUI registry, optionally with its parameters, e.g. "
+                             "'ASLS(lam=100000.0,p=0.01)'. Can be repeated.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes. 0 uses one process per CPU. Default: 1.")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="Number of spectra sent to a worker at once. Default: 16.")
+    parser.add_argument("--output", default="is_score_results.csv",
+                        help="CSV file with one (filename, baseline, is_score, error) record per row. "
+                             "Default: is_score_results.csv.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue a previous run, skipping the spectra already in the output. Without it the "
+                             "output is overwritten.")
+    parser.add_argument("--baseline-cache", metavar="FILE",
+                        help="sqlite file caching the corrected spectra of the --baseline algorithms, so that a new "
+                             "run only computes the baselines not seen before.")
+    parser.add_argument("--peaks-tolerance", type=int, default=5,
+                        help="Tolerance for the automatic detection of the peaks. Default: 5.")
+    parser.add_argument("--dips-tolerance", type=int, default=5,
+                        help="Tolerance for the automatic detection of the dips. Default: 5.")
+    parser.add_argument("--pack", metavar="DATASET",
+                        help="Convert the input directory to a packed dataset in DATASET instead of scoring it.")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="Type used to store the spectra of a packed dataset. Default: float64.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print the progress.")
+    return parser
+
+
+def printSummary(summary, latencies: list, elapsed: float, stream=sys.stdout):
+    """
+    Print the throughput of the run: spectra per second and the p50/p99 latency per spectrum.
+    """
+    print(f"Scored {summary.n_spectra} spectra ({summary.n_scores} scores) in {elapsed:.2f} s", file=stream)
+    if summary.n_skipped:
+        print(f"Skipped {summary.n_skipped} spectra already in the output", file=stream)
+    if latencies:
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(f"Throughput: {summary.n_spectra / elapsed:.2f} spectra/s", file=stream)
+        print(f"Latency per spectrum: p50 {p50:.1f} ms, p99 {p99:.1f} ms", file=stream)
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of the ``is-score`` command line.
+
+    Parameters
+    ----------
+    argv : list, optional
+        The command line arguments. Default is ``sys.argv[1:]``.
+
+    Returns
+    -------
+    exit_code : int
+        0 on success, 2 if the arguments are not valid.
+    """
+    parser = buildParser()
+    args = parser.parse_args(argv)
+
+    if args.pack is not None:
+        if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+            parser.error("--pack converts exactly one input directory")
+        dataset = packFolder(args.inputs[0], args.pack, dtype=np.dtype(args.dtype))
+        print(f"Packed {len(dataset.names)} spectra of {len(dataset.sp_axis)} points in {args.pack}")
+        return 0
+
+    reader = readFiles
+    if any(isPackedDataset(item) for item in args.inputs):
+        if len(args.inputs) != 1 or args.manifest is not None:
+            parser.error("a packed dataset must be the only input")
+        dataset = openPackedDataset(args.inputs[0])
+        corrected = None if args.corrected is None else openPackedDataset(args.corrected)
+        entries, reader = datasetEntries(dataset, corrected), readDataset(dataset, corrected)
+    else:
+        entries = _inputEntries(args.inputs, args.corrected)
+    if args.manifest is not None:
+        entries.extend(_manifestEntries(args.manifest))
+    if not entries:
+        parser.error("no spectra found in the inputs")
+    if not args.baseline and all(corrected_path is None for _, _, corrected_path in entries):
+        parser.error("give at least one --baseline, the --corrected directory or a manifest with corrected spectra")
+
+    baselines = {}
+    if args.baseline:
+        # The registry depends on ramanspy, which is needed only for the named baselines
+        from IS_Score_GUI.models.baseline_algorithms import NamedBaseline
+        baselines = {label: NamedBaseline(label) for label in args.baseline}
+
+    baseline_cache = None if args.baseline_cache is None else BaselineCache(path=args.baseline_cache)
+
+    latencies, done, total = [], 0, len(entries)
+
+    def onResult(scored):
+        nonlocal done
+        done += 1
+        # The files which could not be read were not scored
+        if scored.raw_sp is not None:
+            latencies.append(scored.elapsed)
+        if not args.quiet:
+            print(f"[{done}/{total}] {scored.filename}", file=sys.stderr)
+
+    start = time.perf_counter()
+    summary = scoreFiles(entries, args.output, baselines,
+                         workers=args.workers or None, chunksize=args.chunk_size, resume=args.resume,
+                         on_result=onResult, reader=reader, baseline_cache=baseline_cache,
+                         peaks_dips_tolerance={"peaks": args.peaks_tolerance, "dips": args.dips_tolerance})
+    printSummary(summary, latencies, time.perf_counter() - start)
+    return 0
@@ -0,0 +1,210 @@
+import time
+import contextlib
+import contextvars
+import tracemalloc
+
+import numpy as np
+
+# Stages timed inside getIS_Score, in order of execution
+ANALYSIS_STAGES = ("peak_detection", "peak_edges", "peak_prominences", "dip_detection", "dip_edges",
+                   "dip_prominences", "auc_interpolation", "mean_ratio_smoothing")
+PENALTY_STAGES = ("intensity_penalty", "single_peak_penalty", "peak_region_penalty", "single_dip_penalty",
+                  "dip_region_penalty", "auc_penalty", "mean_ratio_penalty")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageTimings:
+    """
+    Wall time and memory allocated by each stage of the IS-Score, collected inside timeStages.
+
+    Every execution of a stage adds a sample, so the timings of a batch of spectra hold one sample per spectrum
+    for each stage.
+
+    Attributes
+    ----------
+    seconds : dict
+        The wall times of each stage, in the form {stage: [seconds, ...]}.
+    allocated_bytes : dict
+        The peak of the memory allocated by each execution of a stage, in the same form. Empty unless the
+        allocations are traced.
+    """
+    __slots__ = ("seconds", "allocated_bytes", "trace_allocations", "callback")
+
+    def __init__(self, trace_allocations: bool = False, callback=None):
+        self.seconds = {}
+        self.allocated_bytes = {}
+        self.trace_allocations = trace_allocations
+        self.callback = callback
+
+    def record(self, stage: str, seconds: float, allocated_bytes: int = None):
+        """
+        Add a sample of a stage and pass it to the callback, if any.
+        """
+        self.seconds.setdefault(stage, []).append(seconds)
+        if allocated_bytes is not None:
+            self.allocated_bytes.setdefault(stage, []).append(allocated_bytes)
+        if self.callback is not None:
+            self.callback(stage, seconds, allocated_bytes)
+
+    def summary(self, quantiles: tuple = QUANTILES) -> dict:
+        """
+        Aggregate the samples of each stage.
+
+        Parameters
+        ----------
+        quantiles : tuple, optional
+            The quantiles of the distribution of the samples. Default is the p50, p95 and p99.
+
+        Returns
+        -------
+        summary : dict
+            For each stage, the number of samples ``count``, the total time ``sum`` and the quantiles of the wall
+            time as ``p50``, ``p95``, ... in seconds. If the allocations are traced, the same quantiles of the
+            allocated memory are added as ``allocated_bytes_p50``, ...
+        """
+        summary = {}
+        for stage, seconds in self.seconds.items():
+            stage_summary = {"count": len(seconds), "sum": float(np.sum(seconds))}
+            stage_summary.update(_quantiles(seconds, quantiles))
+            if stage in self.allocated_bytes:
+                stage_summary.update({f"allocated_bytes_{name}": value for name, value in
+                                      _quantiles(self.allocated_bytes[stage], quantiles).items()})
+            summary[stage] = stage_summary
+        return summary
+
+    def toPrometheus(self, prefix: str = "is_score_stage", quantiles: tuple = QUANTILES) -> str:
+        """
+        Export the samples in the Prometheus text format, as a summary for each metric labelled by stage.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            The prefix of the metric names. Default is "is_score_stage", which gives the metrics
+            ``is_score_stage_seconds`` and ``is_score_stage_allocated_bytes``.
+        quantiles : tuple, optional
+            The quantiles of the summaries. Default is the p50, p95 and p99.
+
+        Returns
+        -------
+        text : str
+            The metrics, ready to be served on a /metrics endpoint.
+        """
+        lines = []
+        for metric, samples, description in (("seconds", self.seconds, "Wall time of the stages of the IS-Score."),
+                                             ("allocated_bytes", self.allocated_bytes,
+                                              "Peak memory allocated by the stages of the IS-Score.")):
+            if not samples:
+                continue
+            name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} summary")
+            for stage, values in samples.items():
+                for q in quantiles:
+                    lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {float(np.quantile(values, q))!r}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {float(np.sum(values))!r}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {len(values)}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """
+        Remove all the samples.
+        """
+        self.seconds.clear()
+        self.allocated_bytes.clear()
+
+
+def _quantiles(values: list, quantiles: tuple) -> dict:
+    return {f"p{q * 100:g}": float(value) for q, value in zip(quantiles, np.quantile(values, quantiles))}
+
+
+# The timings of the current thread or asyncio task, None when the instrumentation is disabled
+_stage_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+class _Stage:
+    """
+    Time a single execution of a stage into the current timings.
+    """
+    __slots__ = ("timings", "name", "start", "memory")
+
+    def __init__(self, timings: StageTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        if self.timings.trace_allocations:
+            tracemalloc.reset_peak()
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        allocated_bytes = None
+        if self.timings.trace_allocations:
+            allocated_bytes = max(tracemalloc.get_traced_memory()[1] - self.memory, 0)
+        self.timings.record(self.name, seconds, allocated_bytes)
+        return False
+
+
+_DISABLED = contextlib.nullcontext()
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage of the IS-Score, if the instrumentation is enabled in the current context.
+
+    When it is disabled, a shared no-op context manager is returned, so the only cost is the lookup of a context
+    variable.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    """
+    timings = _stage_timings.get()
+    if timings is None:
+        return _DISABLED
+    return _Stage(timings, name)
+
+
+@contextlib.contextmanager
+def timeStages(trace_allocations: bool = False, callback=None, timings: StageTimings = None):
+    """
+    Record the wall time of each stage of the IS-Score computed inside the block.
+
+    The timed stages are the detection of the peaks and dips, of their edges and prominences, the AUC interpolation,
+    the smoothing of the Mean Ratio penalty and each of the seven penalties. Like the DebugCollector, the timings
+    are held in a context variable, so each thread and each asyncio task records only its own stages. The stages
+    computed in other processes, e.g. by ``IS_Score.parallel.scoreMany``, are not recorded.
+
+    Parameters
+    ----------
+    trace_allocations : bool, optional
+        If True, record also the peak of the memory allocated by each stage with tracemalloc, which is started for
+        the block if it is not already tracing. Tracing the allocations slows down the whole program noticeably.
+    callback : callable, optional
+        Function called as ``callback(stage, seconds, allocated_bytes)`` after each stage, e.g. to feed an
+        external metrics client. ``allocated_bytes`` is None unless the allocations are traced.
+    timings : StageTimings, optional
+        Timings to add the samples to, e.g. to aggregate several blocks. A new one is created by default. Its own
+        ``trace_allocations`` and ``callback`` are used, so they can not be given together with it.
+
+    Yields
+    ------
+    timings : StageTimings
+        The samples recorded inside the block.
+    """
+    if timings is None:
+        timings = StageTimings(trace_allocations, callback)
+    elif trace_allocations or callback is not None:
+        raise ValueError("Invalid input: trace_allocations and callback are set on the timings, not with them.")
+    start_tracing = timings.trace_allocations and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+        if start_tracing:
+            tracemalloc.stop()
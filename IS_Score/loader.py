@@ -0,0 +1,257 @@
+import os
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+
+SPECTRUM_EXTENSIONS = (".txt", ".csv")
+
+PACKED_SPECTRA = "spectra.npy"
+PACKED_AXIS = "axis.npy"
+PACKED_NAMES = "names.txt"
+
+
+class PackedDataset(NamedTuple):
+    """
+    A folder of spectra packed in a single (N, L) matrix with a shared spectral axis.
+
+    Attributes
+    ----------
+    sp_axis : np.array
+        The spectral axis shared by all the spectra, with shape (L,).
+    spectra : np.array
+        The spectra, with shape (N, L). When opened with openPackedDataset it is a read-only memory map, so only the
+        rows which are accessed are read from disk.
+    names : list
+        The name of each spectrum.
+    """
+    sp_axis: np.array
+    spectra: np.array
+    names: list
+
+
+def _sniffDelimiter(line: str):
+    """
+    Return the delimiter of a data line: ",", ";" or None for any whitespace.
+    """
+    for delimiter in (",", ";"):
+        if delimiter in line:
+            return delimiter
+    return None
+
+
+def _parseText(text: str):
+    """
+    Parse a two columns text with the fast NumPy parser, returning None if the text is not a plain numeric table.
+    """
+    lines = text.lstrip().split("\n", 1)
+    if not lines[0]:
+        return None
+    delimiter = _sniffDelimiter(lines[0])
+    if delimiter is not None:
+        text = text.replace(delimiter, " ")
+
+    text = text.strip()
+    n_columns = len(text.split("\n", 1)[0].split())
+    with warnings.catch_warnings():
+        # The parser stops with a warning at the first token which is not a number (headers, comments...)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            values = np.fromstring(text, dtype=np.float64, sep=" ")
+        except ValueError:
+            return None
+
+    n_lines = text.count("\n") + 1
+    if n_columns < 2 or values.size != n_lines * n_columns:
+        return None
+    return values.reshape(n_lines, n_columns)
+
+
+def _sortByAxis(sp_axis: np.array, sp_data: np.array) -> tuple:
+    """
+    Sort the spectrum by the spectral axis, skipping the sort if the axis is already in ascending order.
+    """
+    diff = np.diff(sp_axis)
+    if np.all(diff >= 0):
+        return sp_axis, sp_data
+    if np.all(diff < 0):
+        return sp_axis[::-1], sp_data[::-1]
+
+    order = np.argsort(sp_axis, kind="stable")
+    return sp_axis[order], sp_data[order]
+
+
+def listSpectraFiles(folder: str) -> list:
+    """
+    Return the names of the spectra files in the folder, sorted so that the order is the same on every run.
+    """
+    return sorted(f for f in os.listdir(folder)
+                  if f.endswith(SPECTRUM_EXTENSIONS) and os.path.isfile(os.path.join(folder, f)))
+
+
+def loadSpectrumFile(file_path: str, sort: bool = True) -> tuple:
+    """
+    Load a spectrum from a two columns text file, the first column being the spectral axis.
+
+    The delimiter (whitespace, comma or semicolon) is detected from the first line. Plain numeric files are parsed
+    with the fast NumPy text parser, the others (e.g. with a header or comments) fall back to np.loadtxt.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the .txt or .csv file.
+    sort : bool, optional
+        If True (default), sort the spectrum by the spectral axis in ascending order.
+
+    Returns
+    -------
+    spectral_axis, spectral_data : tuple
+        The spectral axis and the corresponding intensities, or (None, None) if the format is not supported.
+    """
+    if not file_path.endswith(SPECTRUM_EXTENSIONS):
+        return None, None
+
+    with open(file_path) as f:
+        text = f.read()
+
+    table = _parseText(text)
+    if table is None:
+        first_line = next((line for line in text.splitlines() if line.strip() and not line.startswith("#")), "")
+        table = np.loadtxt(file_path, delimiter=_sniffDelimiter(first_line), ndmin=2)
+
+    sp_axis, sp_data = table[:, 0], table[:, 1]
+    if sort:
+        sp_axis, sp_data = _sortByAxis(sp_axis, sp_data)
+    return sp_axis, sp_data
+
+
+def writePackedDataset(path: str, sp_axis: np.array, spectra: np.array, names: list = None, dtype=np.float64):
+    """
+    Write a packed dataset: the (N, L) matrix of the spectra, their shared axis and their names.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the dataset. It is created if it does not exist.
+    sp_axis : np.array
+        The spectral axis shared by all the spectra, with shape (L,).
+    spectra : np.array
+        The spectra, with shape (N, L).
+    names : list, optional
+        The name of each spectrum. Default is the index of the spectrum.
+    dtype : np.dtype, optional
+        The type used to store the spectra, float64 (default) or float32.
+    """
+    spectra = np.asarray(spectra)
+    if spectra.ndim != 2 or spectra.shape[1] != len(sp_axis):
+        raise ValueError("Invalid input: the spectra must have shape (N, L) and the spectral axis shape (L,).")
+    names = [str(i) for i in range(spectra.shape[0])] if names is None else [str(name) for name in names]
+    if len(names) != spectra.shape[0]:
+        raise ValueError("Invalid input: the number of names must match the number of spectra.")
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, PACKED_AXIS), np.asarray(sp_axis, dtype=np.float64))
+    np.save(os.path.join(path, PACKED_SPECTRA), spectra.astype(dtype, copy=False))
+    with open(os.path.join(path, PACKED_NAMES), "w") as f:
+        f.writelines(f"{name}\n" for name in names)
+
+
+def openPackedDataset(path: str, mmap: bool = True) -> PackedDataset:
+    """
+    Open a packed dataset written by writePackedDataset.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the dataset.
+    mmap : bool, optional
+        If True (default), the spectra are memory mapped instead of being read in memory.
+
+    Returns
+    -------
+    dataset : PackedDataset
+        The axis, the spectra and their names.
+    """
+    sp_axis = np.load(os.path.join(path, PACKED_AXIS))
+    spectra = np.load(os.path.join(path, PACKED_SPECTRA), mmap_mode="r" if mmap else None)
+    with open(os.path.join(path, PACKED_NAMES)) as f:
+        names = f.read().splitlines()
+    return PackedDataset(sp_axis, spectra, names)
+
+
+def isPackedDataset(path: str) -> bool:
+    """
+    Return True if the path is the directory of a packed dataset.
+    """
+    return os.path.isfile(os.path.join(path, PACKED_SPECTRA)) and os.path.isfile(os.path.join(path, PACKED_AXIS))
+
+
+def packFolder(folder: str, path: str, dtype=np.float64, resample: bool = True) -> PackedDataset:
+    """
+    Convert a folder of spectra files into a packed dataset.
+
+    The spectra are streamed one at a time into a memory-mapped .npy file, so the memory usage does not depend on
+    the number of spectra. If all the spectra share the same axis, it is stored once and the spectra are copied as
+    they are. Otherwise the spectra are interpolated on a uniform grid over the range covered by all of them, with
+    the number of points of the longest one, and a warning is issued.
+
+    Parameters
+    ----------
+    folder : str
+        The folder with the spectra files (.txt/.csv).
+    path : str
+        The directory of the dataset. It is created if it does not exist.
+    dtype : np.dtype, optional
+        The type used to store the spectra, float64 (default) or float32.
+    resample : bool, optional
+        If True (default), spectra with different axes are resampled on a common grid. If False, a ValueError is
+        raised instead.
+
+    Returns
+    -------
+    dataset : PackedDataset
+        The packed dataset, opened with openPackedDataset.
+    """
+    files = listSpectraFiles(folder)
+    if not files:
+        raise ValueError(f"Invalid input: no spectra files in {folder}.")
+
+    os.makedirs(path, exist_ok=True)
+    # The axis is written last, so an interrupted conversion is not recognized as a packed dataset
+    axis_path, spectra_path = os.path.join(path, PACKED_AXIS), os.path.join(path, PACKED_SPECTRA)
+    if os.path.exists(axis_path):
+        os.remove(axis_path)
+
+    sp_axis, spectra, shared = None, None, True
+    low, high, length = -np.inf, np.inf, 0
+    for i, f in enumerate(files):
+        file_axis, sp_data = loadSpectrumFile(os.path.join(folder, f))
+        if sp_axis is None:
+            sp_axis = file_axis
+            spectra = np.lib.format.open_memmap(spectra_path, mode="w+", dtype=dtype, shape=(len(files), len(sp_axis)))
+
+        if shared and (len(file_axis) != len(sp_axis) or not np.array_equal(file_axis, sp_axis)):
+            if not resample:
+                raise ValueError(f"Invalid input: the spectral axis of {f} differs from the one of {files[0]}.")
+            shared = False
+        if shared:
+            spectra[i] = sp_data
+        low, high, length = max(low, file_axis[0]), min(high, file_axis[-1]), max(length, len(file_axis))
+
+    if not shared:
+        if low >= high:
+            raise ValueError("Invalid input: the spectral axes of the spectra do not overlap.")
+        warnings.warn(f"The spectra of {folder} have different spectral axes: they are resampled on {length} points "
+                      f"between {low} and {high}.")
+        del spectra
+        sp_axis = np.linspace(low, high, length)
+        spectra = np.lib.format.open_memmap(spectra_path, mode="w+", dtype=dtype, shape=(len(files), length))
+        for i, f in enumerate(files):
+            spectra[i] = np.interp(sp_axis, *loadSpectrumFile(os.path.join(folder, f)))
+
+    spectra.flush()
+    del spectra
+    with open(os.path.join(path, PACKED_NAMES), "w") as f:
+        f.writelines(f"{name}\n" for name in files)
+    np.save(axis_path, np.asarray(sp_axis, dtype=np.float64))
+    return openPackedDataset(path)
@@ -118,7 +118,7 @@ def getInterpolation(sp: np.array, peaks: list, peak_edges: list):
     return mean_interp
 
 
-def getAUCPenalty(sp: np.array, baseline: np.array, peaks: list, peak_edges: list):
+def getAUCPenalty(sp: np.array, baseline: np.array, peaks: list, peak_edges: list, interpolation: np.array = None):
     """
     Return the AUC penalty.
 
@@ -132,6 +132,8 @@ def getAUCPenalty(sp: np.array, baseline: np.array, peaks: list, peak_edges: lis
         List of peak.
     peak_edges: list
         List of tuples defining the start and end indices of the peak edges.
+    interpolation : np.array, optional
+        The fake overfitting baseline returned by getInterpolation. It is computed if not given.
 
     Returns
     -------
@@ -139,7 +141,8 @@ def getAUCPenalty(sp: np.array, baseline: np.array, peaks: list, peak_edges: lis
         The AUC penalty.
     """
 
-    interpolation = getInterpolation(sp, peaks, peak_edges)
+    if interpolation is None:
+        interpolation = getInterpolation(sp, peaks, peak_edges)
 
     sp_area, sp_abs_corrected_area = np.trapz(sp), np.trapz(abs(sp - baseline))
     sp_corrected_area = np.trapz(sp - baseline)
@@ -2,7 +2,11 @@ import numpy as np
 from scipy import signal
 from IS_Score.utils import normalizeSpectraBaseline, DebugCollector
 
-def getMeanDipsRatioPenalization(sp: np.array, baseline: np.array):
+# Window lengths of the Savitzky-Golay filters applied to the spectrum
+MEAN_RATIO_WINDOWS = (8, 16, 32, 40)
+
+
+def getMeanDipsRatioPenalization(sp: np.array, baseline: np.array, smoothed_sp: tuple = None):
     """
     Return the Mean Dips Ratio penalization.
 
@@ -12,17 +16,22 @@ def getMeanDipsRatioPenalization(sp: np.array, baseline: np.array):
         The Raman spectrum.
     baseline: np.array
         The baseline spectrum.
+    smoothed_sp : tuple, optional
+        The spectrum smoothed with each window of ``MEAN_RATIO_WINDOWS``, as stored by analyzeSpectrum. It is
+        computed if not given.
 
     Returns
     -------
     mean_ratio_penalty: float
         The Mean Ratio Dips penalty.
     """
+    if smoothed_sp is None:
+        smoothed_sp = [signal.savgol_filter(sp, window_length=wl, polyorder=4) for wl in MEAN_RATIO_WINDOWS]
+
     diffGreaterDips, ratioList = [], []
     mean_ratio_penalty = 0
 
-    for wl in [8, 16, 32, 40]:
-        sp_den = signal.savgol_filter(sp, window_length=wl, polyorder=4)
+    for sp_den in smoothed_sp:
         neg_sp_norm = (-sp_den - min(-sp_den)) / (max(-sp_den) - min(-sp_den))
 
         dips, _ = signal.find_peaks(neg_sp_norm, prominence=(None, None))
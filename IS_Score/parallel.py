@@ -0,0 +1,181 @@
+import os
+import itertools
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from IS_Score.IS_Score import getIS_Score
+
+
+class ScoreFailure(NamedTuple):
+    """
+    Record returned in place of the IS-Score when the scoring of a spectrum fails.
+
+    Attributes
+    ----------
+    index : int
+        The position of the spectrum in the input sequence.
+    error : str
+        The representation of the exception raised while scoring the spectrum.
+    """
+    index: int
+    error: str
+
+
+def _scoreChunk(start: int, chunk: list, kwargs: dict) -> list:
+    """
+    Score a chunk of spectra inside a worker process.
+
+    Parameters
+    ----------
+    start : int
+        The index of the first spectrum of the chunk in the input sequence.
+    chunk : list
+        The list of (raw_sp, baseline_corrected_sp, sp_axis) tuples.
+    kwargs : dict
+        The optional parameters forwarded to getIS_Score.
+
+    Returns
+    -------
+    results : list
+        The IS-Score of each spectrum, or a ScoreFailure if the scoring failed.
+    """
+    results = []
+    for i, (raw_sp, baseline_corrected_sp, sp_axis) in enumerate(chunk):
+        try:
+            results.append(getIS_Score(raw_sp, baseline_corrected_sp, sp_axis, verbose=False, **dict(kwargs)))
+        except Exception as e:
+            results.append(ScoreFailure(start + i, repr(e)))
+    return results
+
+
+def _chunked(pairs, chunksize: int):
+    """
+    Split an iterable of spectra in consecutive chunks without materializing it.
+
+    Yields
+    ------
+    start, chunk : tuple
+        The index of the first element of the chunk and the chunk itself.
+    """
+    iterator, start = iter(pairs), 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _iterChunks(func, items, workers: int, chunksize: int, max_pending: int, extra, on_error):
+    """
+    Apply ``func(start, chunk, extra)`` to consecutive chunks of the items over a pool of processes, yielding the
+    results of the chunks in input order.
+
+    At most ``max_pending`` chunks are in flight at any time. If a chunk can not be processed by a worker,
+    ``on_error(start, chunk, exception)`` provides its results instead. Closing the generator cancels the chunks
+    not yet started and returns without waiting for the running ones.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, chunksize)
+
+    if workers == 1:
+        for start, chunk in _chunked(items, chunksize):
+            yield from func(start, chunk, extra)
+        return
+
+    max_pending = max_pending or 2 * workers
+    chunks = _chunked(items, chunksize)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    try:
+        done_chunks, next_start = {}, 0
+        exhausted = False
+        while True:
+            # Keep the pool busy without reading the whole input
+            while not exhausted and len(pending) + len(done_chunks) < max_pending:
+                try:
+                    start, chunk = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, start, chunk, extra)] = (start, chunk)
+
+            # Emit the chunks that are complete and next in order
+            while next_start in done_chunks:
+                results = done_chunks.pop(next_start)
+                next_start += len(results)
+                yield from results
+
+            if not pending:
+                if exhausted and not done_chunks:
+                    return
+                continue
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                start, chunk = pending.pop(future)
+                try:
+                    done_chunks[start] = future.result()
+                except Exception as e:
+                    # The worker itself failed (e.g. the chunk could not be pickled)
+                    done_chunks[start] = on_error(start, chunk, e)
+    finally:
+        # If the consumer stops early (e.g. a cancelled run) the queued chunks are cancelled and the ones being
+        # processed are not awaited
+        executor.shutdown(wait=not pending, cancel_futures=True)
+
+
+def _chunkFailures(start: int, chunk: list, error: Exception) -> list:
+    return [ScoreFailure(start + i, repr(error)) for i in range(len(chunk))]
+
+
+def iterScoreMany(pairs, workers: int = None, chunksize: int = 16, max_pending: int = None, **kwargs):
+    """
+    Score many spectra over a pool of processes, yielding the results in input order.
+
+    The input is consumed lazily: at most ``max_pending`` chunks are in flight at any time, so the memory usage is
+    bounded by the chunk size and not by the size of the dataset.
+
+    Parameters
+    ----------
+    pairs : iterable
+        Iterable of (raw_sp, baseline_corrected_sp, sp_axis) tuples.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs. With 1 the spectra are scored in the
+        calling process.
+    chunksize : int, optional
+        The number of spectra sent to a worker at once.
+    max_pending : int, optional
+        The maximum number of chunks submitted and not yet consumed. Default is twice the number of workers.
+    **kwargs
+        Optional parameters forwarded to getIS_Score.
+
+    Yields
+    ------
+    result : float or ScoreFailure
+        The IS-Score of each spectrum, or a ScoreFailure if the scoring of that spectrum raised an exception.
+    """
+    yield from _iterChunks(_scoreChunk, pairs, workers, chunksize, max_pending, kwargs, _chunkFailures)
+
+
+def scoreMany(pairs, workers: int = None, chunksize: int = 16, **kwargs) -> list:
+    """
+    Score many spectra over a pool of processes.
+
+    Parameters
+    ----------
+    pairs : iterable
+        Iterable of (raw_sp, baseline_corrected_sp, sp_axis) tuples.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+    chunksize : int, optional
+        The number of spectra sent to a worker at once.
+    **kwargs
+        Optional parameters forwarded to getIS_Score.
+
+    Returns
+    -------
+    results : list
+        The IS-Score of each spectrum in input order, or a ScoreFailure for the spectra that could not be scored.
+    """
+    return list(iterScoreMany(pairs, workers=workers, chunksize=chunksize, **kwargs))
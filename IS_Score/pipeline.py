@@ -0,0 +1,620 @@
+import os
+import csv
+import time
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from IS_Score.IS_Score import analyzeSpectrum, scoreBaseline
+from IS_Score.parallel import _iterChunks
+from IS_Score.loader import loadSpectrumFile, listSpectraFiles, openPackedDataset
+
+CSV_HEADER = ["filename", "baseline", "is_score", "error"]
+# Name of the baseline used for the spectra read from the corrected folder
+CORRECTED_BASELINE = "corrected"
+
+
+class ScoredSpectrum(NamedTuple):
+    """
+    The scores of one spectrum against all the baselines.
+
+    Attributes
+    ----------
+    filename : str
+        The name of the spectrum file, relative to the folder.
+    sp_axis : np.array
+        The spectral axis, None if the file could not be read.
+    raw_sp : np.array
+        The Raman spectrum, None if the file could not be read.
+    scores : list
+        The (baseline, is_score, error) tuples. The IS-Score is NaN and the error is not empty if the baseline or
+        the scoring failed.
+    elapsed : float
+        The time in seconds spent to score the spectrum against all the baselines.
+    """
+    filename: str
+    sp_axis: np.array
+    raw_sp: np.array
+    scores: list
+    elapsed: float
+
+
+class FolderSummary(NamedTuple):
+    """
+    Summary of a run of scoreFolder.
+
+    Attributes
+    ----------
+    n_spectra : int
+        The number of spectra scored in this run.
+    n_skipped : int
+        The number of spectra skipped because they were already in the output.
+    n_scores : int
+        The number of records written in this run.
+    sp_axis, mean_spectrum : np.array
+        The axis and the mean of all the raw spectra in the output, None if there are none.
+    """
+    n_spectra: int
+    n_skipped: int
+    n_scores: int
+    sp_axis: np.array
+    mean_spectrum: np.array
+
+
+def folderEntries(folder: str, corrected_folder: str = None) -> list:
+    """
+    Return the entries of the spectra files of a folder, in the format accepted by readFiles and scoreFiles.
+
+    Parameters
+    ----------
+    folder : str
+        The folder with the raw spectra.
+    corrected_folder : str, optional
+        The folder with the baseline corrected spectra, with the same file names of the raw spectra.
+
+    Returns
+    -------
+    entries : list
+        The (name, raw_path, corrected_path) tuples, the name being the file name relative to the folder.
+    """
+    return [(f, os.path.join(folder, f), None if corrected_folder is None else os.path.join(corrected_folder, f))
+            for f in listSpectraFiles(folder)]
+
+
+def readFiles(entries):
+    """
+    Read the spectra one at a time.
+
+    A file which can not be read does not stop the reading: its error is yielded in place of the spectrum.
+
+    Parameters
+    ----------
+    entries : iterable
+        Iterable of (name, raw_path, corrected_path) tuples. The corrected path can be None.
+
+    Yields
+    ------
+    name, sp_axis, raw_sp, corrected_sp, error : tuple
+        The spectrum, with the corrected spectrum or None if no corrected path is given. If the raw or the
+        corrected file can not be read, the arrays are None and error is the representation of the exception,
+        otherwise it is an empty string.
+    """
+    for name, raw_path, corrected_path in entries:
+        try:
+            sp_axis, raw_sp = _loadFile(raw_path)
+            corrected_sp = None
+            if corrected_path is not None:
+                _, corrected_sp = _loadFile(corrected_path)
+        except Exception as e:
+            yield name, None, None, None, repr(e)
+            continue
+        yield name, sp_axis, raw_sp, corrected_sp, ""
+
+
+def _loadFile(path: str) -> tuple:
+    sp_axis, sp = loadSpectrumFile(path)
+    if sp is None:
+        raise ValueError(f"Unsupported spectrum file format: {path}")
+    return sp_axis, sp
+
+
+def datasetEntries(dataset, corrected=None) -> list:
+    """
+    Return the entries of the spectra of a packed dataset, in the format accepted by the reader of readDataset.
+
+    Parameters
+    ----------
+    dataset : PackedDataset
+        The packed dataset with the raw spectra.
+    corrected : PackedDataset, optional
+        The packed dataset with the baseline corrected spectra. They are matched to the raw spectra by name.
+
+    Returns
+    -------
+    entries : list
+        The (name, raw_index, corrected_index) tuples. The corrected index is None for the spectra without a
+        corrected spectrum.
+    """
+    corrected_index = {} if corrected is None else {name: i for i, name in enumerate(corrected.names)}
+    return [(name, i, corrected_index.get(name)) for i, name in enumerate(dataset.names)]
+
+
+def readDataset(dataset, corrected=None):
+    """
+    Return a reader of the rows of a packed dataset, to be used in place of readFiles.
+
+    Parameters
+    ----------
+    dataset : PackedDataset
+        The packed dataset with the raw spectra.
+    corrected : PackedDataset, optional
+        The packed dataset with the baseline corrected spectra.
+
+    Returns
+    -------
+    reader : callable
+        Generator function taking the (name, raw_index, corrected_index) entries returned by datasetEntries and
+        yielding the (name, sp_axis, raw_sp, corrected_sp, error) tuples, as readFiles. The spectral axis is shared
+        by all the spectra and only the rows which are read are loaded from disk.
+    """
+    if corrected is not None and not np.array_equal(corrected.sp_axis, dataset.sp_axis):
+        raise ValueError("Invalid input: the raw and the corrected datasets have different spectral axes.")
+
+    def reader(entries):
+        for name, raw_index, corrected_index in entries:
+            try:
+                raw_sp = np.array(dataset.spectra[raw_index], dtype=np.float64)
+                corrected_sp = None
+                if corrected_index is not None:
+                    corrected_sp = np.array(corrected.spectra[corrected_index], dtype=np.float64)
+            except Exception as e:
+                yield name, None, None, None, repr(e)
+                continue
+            yield name, dataset.sp_axis, raw_sp, corrected_sp, ""
+
+    return reader
+
+
+def _cacheKey(baseline, name: str) -> tuple:
+    """
+    Return the (algorithm, params) pair under which the corrections of a baseline are stored in a BaselineCache: its
+    ``cache_key`` attribute if it has one, e.g. NamedBaseline, otherwise its name without parameters.
+    """
+    return getattr(baseline, "cache_key", None) or (name, None)
+
+
+def _lookupBaselines(spectra, baselines: dict, baseline_cache):
+    """
+    Add to each spectrum the corrections of its baselines already in the cache, looked up in the calling process.
+    """
+    for filename, sp_axis, raw_sp, corrected_sp, names in spectra:
+        cached = {}
+        if baseline_cache is not None:
+            for name in names:
+                if name != CORRECTED_BASELINE and name in baselines:
+                    corrected = baseline_cache.get(raw_sp, sp_axis, *_cacheKey(baselines[name], name))
+                    if corrected is not None:
+                        cached[name] = corrected
+        yield filename, sp_axis, raw_sp, corrected_sp, names, cached
+
+
+def _scoreSpectra(start: int, chunk: list, extra: tuple) -> list:
+    """
+    Score a chunk of spectra against the baselines inside a worker process.
+
+    Each result is paired with the corrections computed for it, which are returned to the calling process to be
+    stored in the baseline cache, if any.
+    """
+    baselines, kwargs, return_corrected = extra
+    results = []
+    for filename, sp_axis, raw_sp, corrected_sp, names, cached in chunk:
+        t0 = time.perf_counter()
+        scores, computed = [], {}
+        if not names:
+            results.append((ScoredSpectrum(filename, sp_axis, raw_sp, scores, 0.0), computed))
+            continue
+        try:
+            analysis = analyzeSpectrum(raw_sp, sp_axis, **dict(kwargs))
+        except Exception as e:
+            analysis, error = None, repr(e)
+
+        for name in names:
+            if analysis is None:
+                scores.append((name, float("nan"), error))
+                continue
+            try:
+                if name == CORRECTED_BASELINE:
+                    corrected = corrected_sp
+                elif name in cached:
+                    corrected = cached[name]
+                else:
+                    corrected = baselines[name](np.array(raw_sp), sp_axis)
+                    if return_corrected:
+                        computed[name] = corrected
+                scores.append((name, float(scoreBaseline(analysis, corrected, verbose=False)), ""))
+            except Exception as e:
+                scores.append((name, float("nan"), repr(e)))
+        results.append((ScoredSpectrum(filename, sp_axis, raw_sp, scores, time.perf_counter() - t0), computed))
+    return results
+
+
+def _chunkFailures(start: int, chunk: list, error: Exception) -> list:
+    # The worker itself failed (e.g. a baseline could not be pickled): every score of the chunk is an error
+    return [(ScoredSpectrum(filename, sp_axis, raw_sp, [(name, float("nan"), repr(error)) for name in names], 0.0), {})
+            for filename, sp_axis, raw_sp, _, names, _ in chunk]
+
+
+def scoreSpectra(spectra, baselines: dict = None, workers: int = 1, chunksize: int = 16, baseline_cache=None,
+                 **kwargs):
+    """
+    Score a stream of spectra against the baselines, yielding the results in input order.
+
+    Parameters
+    ----------
+    spectra : iterable
+        Iterable of (filename, sp_axis, raw_sp, corrected_sp, baseline_names) tuples. The corrected spectrum is
+        used for the baseline named ``CORRECTED_BASELINE``.
+    baselines : dict, optional
+        The baseline algorithms, as a mapping from the name to a callable ``f(raw_sp, sp_axis)`` returning the
+        corrected spectrum (e.g. the apply method of a BaselineAlgorithm).
+    workers : int, optional
+        The number of worker processes. With 1 (default) the spectra are scored in the calling process.
+    chunksize : int, optional
+        The number of spectra sent to a worker at once.
+    baseline_cache : BaselineCache, optional
+        Cache of the corrected spectra, keyed by the ``cache_key`` (algorithm, params) of each baseline if it has
+        one, e.g. NamedBaseline, otherwise by the name of the baseline. The cache is used only in the calling
+        process: the cached corrections are sent to the workers with the spectra, and the ones computed by the
+        workers are sent back and stored, so an in-memory cache is enough to reuse them in a new run.
+    **kwargs
+        Optional parameters forwarded to analyzeSpectrum.
+
+    Yields
+    ------
+    scored : ScoredSpectrum
+        The scores of each spectrum.
+    """
+    baselines = baselines or {}
+    extra = (baselines, kwargs, baseline_cache is not None)
+    stream = _iterChunks(_scoreSpectra, _lookupBaselines(spectra, baselines, baseline_cache), workers, chunksize,
+                         None, extra, _chunkFailures)
+    try:
+        for scored, computed in stream:
+            for name, corrected in computed.items():
+                baseline_cache.put(scored.raw_sp, scored.sp_axis, *_cacheKey(baselines[name], name), corrected)
+            yield scored
+    finally:
+        stream.close()
+
+
+class CSVResultWriter:
+    """
+    Append-only CSV sink with one (filename, baseline, is_score, error) record per row.
+
+    Every record is flushed as soon as it is written, so a crashed run loses at most the record being written. A
+    truncated last line is removed when the file is opened again.
+
+    Parameters
+    ----------
+    path : str
+        The path of the CSV file.
+    fsync : bool, optional
+        If True, force the records to disk after each spectrum.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._writer = None
+        self.n_records = 0
+
+    def completed(self, n_records: int = 0) -> tuple:
+        """
+        Return the baselines already written for each file, and count the records of the file.
+
+        Parameters
+        ----------
+        n_records : int, optional
+            The number of records, from the start of the file, of which the files are also returned.
+
+        Returns
+        -------
+        completed, recorded : tuple
+            Mapping from the file name to the set of baselines already scored, and the set of the files with a
+            record among the first ``n_records`` ones.
+        """
+        completed, recorded = {}, set()
+        self.n_records = 0
+        if not os.path.exists(self.path):
+            return completed, recorded
+        self._dropPartialLine()
+        with open(self.path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) == len(CSV_HEADER):
+                    completed.setdefault(row[0], set()).add(row[1])
+                    if self.n_records < n_records:
+                        recorded.add(row[0])
+                    self.n_records += 1
+        return completed, recorded
+
+    def _dropPartialLine(self):
+        # Only the tail of the file is read, looking backwards for the last complete line
+        with open(self.path, "rb+") as f:
+            end = pos = f.seek(0, os.SEEK_END)
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                block = f.read(step)
+                if pos + step == end and block.endswith(b"\n"):
+                    return
+                index = block.rfind(b"\n")
+                if index >= 0:
+                    f.truncate(pos + index + 1)
+                    return
+            f.truncate(0)
+
+    def open(self):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if not new_file:
+            self._dropPartialLine()
+        self._file = open(self.path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(CSV_HEADER)
+            self._file.flush()
+            self.n_records = 0
+        return self
+
+    def write(self, scored: ScoredSpectrum):
+        """
+        Append the scores of a spectrum.
+        """
+        for name, score, error in scored.scores:
+            self._writer.writerow([scored.filename, name, score, error])
+        self.n_records += len(scored.scores)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RunningMean:
+    """
+    Running mean of spectra in O(L) memory.
+
+    The spectra with a different length of the first one are interpolated on its axis. The state can be saved to
+    and restored from a .npz file, together with ``n_records``, the number of records of the output CSV whose
+    spectra are in the mean: a resumed run adds again only the spectra of the records written after it, so each
+    spectrum is added exactly once whatever the order of the entries.
+    """
+
+    def __init__(self):
+        self.sp_axis, self.total, self.count, self.n_records = None, None, 0, 0
+
+    def add(self, sp_axis: np.array, sp: np.array):
+        if self.sp_axis is None:
+            self.sp_axis, self.total = np.array(sp_axis, dtype=float), np.zeros(len(sp))
+        if len(sp) != len(self.sp_axis) or not np.array_equal(sp_axis, self.sp_axis):
+            sp = np.interp(self.sp_axis, sp_axis, sp)
+        self.total += sp
+        self.count += 1
+
+    @property
+    def mean(self):
+        return None if self.count == 0 else self.total / self.count
+
+    def save(self, path: str):
+        # Written to a temporary file and renamed, so that a crash never leaves a corrupted state
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, sp_axis=self.sp_axis, total=self.total, count=self.count, n_records=self.n_records)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        running = cls()
+        if os.path.exists(path):
+            with np.load(path) as state:
+                # The states saved without the number of records can not be resumed, the mean starts again
+                if "n_records" not in state:
+                    return running
+                running.sp_axis, running.total = state["sp_axis"], state["total"]
+                running.count, running.n_records = int(state["count"]), int(state["n_records"])
+        return running
+
+
+def scoreFiles(entries: list, output: str, baselines: dict = None, workers: int = 1, chunksize: int = 16,
+               resume: bool = True, checkpoint_every: int = 100, on_result=None, reader=readFiles,
+               baseline_cache=None, **kwargs) -> FolderSummary:
+    """
+    Score a list of spectra files, writing each score to an append-only CSV file as soon as it is computed.
+
+    The files are processed as a stream (reader, scorer, writer), so the memory usage does not grow with the number
+    of files. The running mean of the raw spectra is saved next to the output (``<output>.mean.npz``). With
+    ``resume`` the files already in the output are skipped, so an interrupted run continues from the last written
+    record. A file which can not be read gets an error record with a NaN IS-Score for each baseline, as a baseline
+    or a score which fails, and the run goes on.
+
+    Parameters
+    ----------
+    entries : list
+        The (name, raw_path, corrected_path) tuples of the spectra, as returned by folderEntries, or the entries
+        returned by datasetEntries together with the reader of readDataset. The name identifies the spectrum in the output. The spectra with a corrected path are also scored as the baseline
+        ``CORRECTED_BASELINE``.
+    output : str
+        The path of the CSV file.
+    baselines : dict, optional
+        The baseline algorithms, as a mapping from the name to a callable ``f(raw_sp, sp_axis)`` returning the
+        corrected spectrum.
+    workers : int, optional
+        The number of worker processes. With 1 (default) the spectra are scored in the calling process.
+    chunksize : int, optional
+        The number of spectra sent to a worker at once.
+    resume : bool, optional
+        If True (default), skip the spectra already in the output. If False, the output is overwritten.
+    checkpoint_every : int, optional
+        The number of spectra between two saves of the running mean.
+    on_result : callable, optional
+        Called with each ScoredSpectrum after it is written.
+    reader : callable, optional
+        Generator function reading the entries, readFiles (default) or the reader returned by readDataset.
+    baseline_cache : BaselineCache, optional
+        Cache of the corrected spectra. With an on-disk tier, a new run with more baselines only computes the new
+        ones, even without ``resume``.
+    **kwargs
+        Optional parameters forwarded to analyzeSpectrum.
+
+    Returns
+    -------
+    summary : FolderSummary
+        The number of spectra scored and the mean spectrum.
+    """
+    baselines = baselines or {}
+    if not baselines and all(corrected_path is None for _, _, corrected_path in entries):
+        raise ValueError("No baseline to score: give the baselines or the corrected spectra.")
+
+    mean_path = f"{output}.mean.npz"
+    if not resume:
+        for path in (output, mean_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    writer = CSVResultWriter(output)
+    running = RunningMean.load(mean_path)
+    # The spectra in the saved mean are the ones of its first records of the output
+    completed, in_mean = writer.completed(running.n_records)
+    if running.n_records > writer.n_records:
+        # The output is not the one of the saved mean, which starts again
+        running, in_mean = RunningMean(), set()
+
+    plan, n_skipped = [], 0
+    for i, (name, raw_path, corrected_path) in enumerate(entries):
+        expected = list(baselines) + ([CORRECTED_BASELINE] if corrected_path is not None else [])
+        missing = [baseline for baseline in expected if baseline not in completed.get(name, ())]
+        n_skipped += bool(expected) and not missing
+        # A file already scored but not in the saved mean (its records were written after the last checkpoint) is
+        # read again only for the mean
+        add_to_mean = bool(expected) and name not in in_mean
+        if missing or add_to_mean:
+            plan.append((i, missing, add_to_mean))
+    del completed, in_mean
+
+    n_spectra, n_scores, since_checkpoint = 0, 0, 0
+
+    def record(scored):
+        nonlocal n_spectra, n_scores
+        writer.write(scored)
+        n_spectra += 1
+        n_scores += len(scored.scores)
+        if on_result is not None:
+            on_result(scored)
+
+    # The spectra are scored in input order, so the flags of the spectra sent to the scorer are queued with them
+    add_to_mean_queue = deque()
+
+    # The spectra which can not be read are recorded as errors while reading, without reaching the scorer
+    def source():
+        spectra = reader(entries[i] for i, _, _ in plan)
+        for (name, sp_axis, raw_sp, corrected_sp, error), (_, missing, add_to_mean) in zip(spectra, plan):
+            if error:
+                if missing:
+                    record(ScoredSpectrum(name, None, None, [(b, float("nan"), error) for b in missing], 0.0))
+                continue
+            add_to_mean_queue.append(add_to_mean)
+            yield name, sp_axis, raw_sp, corrected_sp, missing
+
+    with writer:
+        scored_stream = scoreSpectra(source(), baselines, workers=workers, chunksize=chunksize,
+                                     baseline_cache=baseline_cache, **kwargs)
+        for scored in scored_stream:
+            if add_to_mean_queue.popleft():
+                running.add(scored.sp_axis, scored.raw_sp)
+            if scored.scores:
+                record(scored)
+
+            since_checkpoint += 1
+            if since_checkpoint == checkpoint_every:
+                running.n_records = writer.n_records
+                running.save(mean_path)
+                since_checkpoint = 0
+
+    if running.count > 0:
+        running.n_records = writer.n_records
+        running.save(mean_path)
+
+    return FolderSummary(n_spectra, n_skipped, n_scores, running.sp_axis, running.mean)
+
+
+def scoreFolder(folder: str, output: str, baselines: dict = None, corrected_folder: str = None, **kwargs) -> FolderSummary:
+    """
+    Score all the spectra of a folder, writing each score to an append-only CSV file as soon as it is computed.
+
+    Parameters
+    ----------
+    folder : str
+        The folder with the raw spectra.
+    output : str
+        The path of the CSV file.
+    baselines : dict, optional
+        The baseline algorithms, as a mapping from the name to a callable ``f(raw_sp, sp_axis)`` returning the
+        corrected spectrum.
+    corrected_folder : str, optional
+        The folder with the baseline corrected spectra, scored as the baseline ``CORRECTED_BASELINE``.
+    **kwargs
+        Optional parameters forwarded to scoreFiles (workers, chunksize, resume, checkpoint_every, on_result,
+        baseline_cache) and to analyzeSpectrum.
+
+    Returns
+    -------
+    summary : FolderSummary
+        The number of spectra scored and the mean spectrum.
+    """
+    return scoreFiles(folderEntries(folder, corrected_folder), output, baselines, **kwargs)
+
+
+def scoreDataset(path: str, output: str, baselines: dict = None, corrected_path: str = None,
+                 **kwargs) -> FolderSummary:
+    """
+    Score all the spectra of a packed dataset, writing each score to an append-only CSV file as soon as it is
+    computed.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the packed dataset with the raw spectra, as written by packFolder.
+    output : str
+        The path of the CSV file.
+    baselines : dict, optional
+        The baseline algorithms, as a mapping from the name to a callable ``f(raw_sp, sp_axis)`` returning the
+        corrected spectrum.
+    corrected_path : str, optional
+        The directory of the packed dataset with the baseline corrected spectra, scored as the baseline
+        ``CORRECTED_BASELINE``.
+    **kwargs
+        Optional parameters forwarded to scoreFiles (workers, chunksize, resume, checkpoint_every, on_result,
+        baseline_cache) and to analyzeSpectrum.
+
+    Returns
+    -------
+    summary : FolderSummary
+        The number of spectra scored and the mean spectrum.
+    """
+    dataset = openPackedDataset(path)
+    corrected = None if corrected_path is None else openPackedDataset(corrected_path)
+    return scoreFiles(datasetEntries(dataset, corrected), output, baselines, reader=readDataset(dataset, corrected),
+                      **kwargs)
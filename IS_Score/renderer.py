@@ -0,0 +1,296 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from IS_Score.utils import DebugCollector
+
+
+def verticalLines(ax, x: np.array, ymin: np.array, ymax: np.array, **kwargs):
+    """
+    Draw vertical lines from ymin to ymax at each x as a single LineCollection.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    x, ymin, ymax : np.array
+        The position and the limits of each line.
+    **kwargs
+        Optional properties of the LineCollection (color, alpha, ...).
+
+    Returns
+    -------
+    collection : matplotlib.collections.LineCollection
+        The lines added to the axes.
+    """
+    from matplotlib.collections import LineCollection
+
+    x = np.asarray(x, dtype=float).ravel()
+    segments = np.empty((len(x), 2, 2))
+    segments[:, :, 0] = x[:, None]
+    segments[:, 0, 1] = np.broadcast_to(ymin, x.shape)
+    segments[:, 1, 1] = np.broadcast_to(ymax, x.shape)
+
+    collection = LineCollection(segments, **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def prominenceLines(sp_axis: np.array, sp_norm: np.array, edges: list, prominences: list) -> tuple:
+    """
+    Return the lines of the Raman shift prominences of all the bands, from the spectrum down by the prominence.
+
+    Parameters
+    ----------
+    sp_axis : np.array
+        The spectral axis.
+    sp_norm : np.array
+        The normalized spectrum.
+    edges : list
+        The (start, end) edges of each band.
+    prominences : list
+        The prominence of each Raman shift of each band, starting from its left edge.
+
+    Returns
+    -------
+    x, ymin, ymax : tuple
+        The position and the limits of each line.
+    """
+    x, ymin, ymax = [np.empty(0)], [np.empty(0)], [np.empty(0)]
+    for (s, e), band_prominences in zip(edges, prominences):
+        band_prominences = np.asarray(band_prominences, dtype=float).ravel()
+        top = sp_norm[s:e][:len(band_prominences)]
+        x.append(sp_axis[s:e][:len(band_prominences)])
+        ymin.append(top - band_prominences)
+        ymax.append(top)
+    return np.concatenate(x), np.concatenate(ymin), np.concatenate(ymax)
+
+
+def fittingLines(sp_axis: np.array, baseline_norm: np.array, edges: list, indexes: list, distances: list,
+                 sign: int) -> tuple:
+    """
+    Return the lines of the overfitting or underfitting distances of all the bands, starting from the baseline.
+
+    Parameters
+    ----------
+    sp_axis : np.array
+        The spectral axis.
+    baseline_norm : np.array
+        The normalized baseline.
+    edges : list
+        The (start, end) edges of each band.
+    indexes : list
+        The indexes of the penalized Raman shifts of each band, relative to its left edge.
+    distances : list
+        The distance of each penalized Raman shift of each band.
+    sign : int
+        1 to draw the lines above the baseline, -1 below.
+
+    Returns
+    -------
+    x, ymin, ymax : tuple
+        The position and the limits of each line.
+    """
+    x, ymin, ymax = [np.empty(0)], [np.empty(0)], [np.empty(0)]
+    for (s, e), band_indexes, band_distances in zip(edges, indexes, distances):
+        if len(band_distances) == 0:
+            continue
+        start = baseline_norm[s:e][band_indexes]
+        x.append(np.asarray(sp_axis[s:e][band_indexes], dtype=float).ravel())
+        ymin.append(np.asarray(start, dtype=float).ravel())
+        ymax.append(np.asarray(start + sign * np.asarray(band_distances), dtype=float).ravel())
+    return np.concatenate(x), np.concatenate(ymin), np.concatenate(ymax)
+
+
+def drawSinglePeakDipPenalization(ax, inputs: dict, data: dict):
+    sp_axis, raw_sp_norm, baseline_sp_norm = inputs["sp_axis"], inputs["raw_sp_norm"], inputs["baseline_sp_norm"]
+    peaks, dips = inputs["peaks"], inputs["dips"]
+    single_peak, single_dip = data['SINGLE_PEAK_PENALIZATION'], data['SINGLE_DIP_PENALIZATION']
+    peaks_penalized, dips_penalized = single_peak['peak_penalized'], single_dip['dip_penalized']
+
+    ax.plot(sp_axis, raw_sp_norm, color='tab:blue', label="Normalized Spectra", alpha=0.4)
+    ax.plot(sp_axis, baseline_sp_norm, color='tab:orange', label="Normalized Baseline", alpha=0.4)
+    ax.scatter(sp_axis[dips], raw_sp_norm[dips], color='blue', marker='x', s=100, label="Dips")
+    ax.scatter(sp_axis[dips_penalized], raw_sp_norm[dips_penalized], color='darkorange', marker='x', s=100,
+               label="Dips Penalized")
+    ax.scatter(sp_axis[peaks], raw_sp_norm[peaks], color='green', marker='x', s=100, label="Peaks")
+    ax.scatter(sp_axis[peaks_penalized], raw_sp_norm[peaks_penalized], color='red', marker='x', s=100,
+               label="Peaks Penalized")
+    if len(single_peak['point_for_penalization']) > 0:
+        ax.scatter(sp_axis[peaks], single_peak['point_for_penalization'], color='tab:green', marker='o', alpha=0.4)
+    if len(single_dip['upper_point_for_penalization']) > 0:
+        ax.scatter(sp_axis[dips], single_dip['upper_point_for_penalization'], color='tab:blue', marker='^', alpha=0.4)
+    if len(single_dip['lower_point_for_penalization']) > 0:
+        ax.scatter(sp_axis[dips], single_dip['lower_point_for_penalization'], color='tab:blue', marker='^', alpha=0.4)
+    ax.set_xlabel("Raman shift (cm-1)")
+    ax.set_ylabel("Norm. Intensity")
+    ax.grid(alpha=0.4)
+    ax.legend()
+    peaks_penalty = round(single_peak['single_peak_penalization'], 4)
+    dips_penalty = round(single_dip['single_dip_penalization'], 4)
+    ax.set_title(f"Peaks and Dips Penalized\n Peaks Value: {peaks_penalty}, Dips Value: {dips_penalty}")
+
+
+def drawIntensityPenalization(ax, inputs: dict, data: dict):
+    sp_axis, raw_sp_norm, baseline_sp_norm = inputs["sp_axis"], inputs["raw_sp_norm"], inputs["baseline_sp_norm"]
+    filtered_indexes = data["INTENSITY_PENALIZATION"]["filtered_indexes"]
+
+    ax.plot(sp_axis, raw_sp_norm, color='tab:blue', label="Normalized Spectra", alpha=0.4)
+    ax.plot(sp_axis, baseline_sp_norm, color='tab:orange', label="Normalized Baseline", alpha=0.4)
+    ax.scatter(sp_axis[filtered_indexes], raw_sp_norm[filtered_indexes], c='red', s=25, label="Unsound intensities",
+               alpha=0.5)
+    ax.set_xlabel("Raman shift (cm-1)")
+    ax.set_ylabel("Norm. Intensity")
+    ax.grid(alpha=0.4)
+    ax.legend()
+    ax.set_title(f"Intensity Penalty Value: {round(data['INTENSITY_PENALIZATION']['intensity_penalization'], 4)}")
+
+
+def drawAUCPenalization(ax, inputs: dict, data: dict):
+    sp_axis, raw_sp, baseline = inputs["sp_axis"], inputs["raw_sp"], inputs["baseline"]
+    interp = data['AUC_PENALIZATION']['interpolation']
+    min_ref = min([min(raw_sp), min(baseline), min(interp)])
+    max_ref = max([max(raw_sp), max(baseline), max(interp)])
+
+    spectra_plot = (raw_sp - min_ref) / (max_ref - min_ref)
+    baseline_plot = (baseline - min_ref) / (max_ref - min_ref)
+    interp_plot = (interp - min_ref) / (max_ref - min_ref)
+
+    ax.plot(sp_axis, spectra_plot, color='tab:blue', label="Normalized Spectra")
+    ax.fill_between(sp_axis, spectra_plot, where=(spectra_plot > 0), alpha=0.3, color='tab:blue')
+    ax.plot(sp_axis, baseline_plot, color='tab:orange', label="Normalized Baseline")
+    ax.fill_between(sp_axis, baseline_plot, where=(baseline_plot > 0), alpha=0.3, color='tab:orange')
+    ax.plot(sp_axis, interp_plot, color='tab:red', label="Interpolation")
+    ax.fill_between(sp_axis, interp_plot, where=(interp_plot > 0), alpha=0.3, color='tab:red')
+    ax.set_xlabel("Raman shift (cm-1)")
+    ax.set_ylabel("Intensity")
+    ax.grid(alpha=0.4)
+    ax.legend()
+    ax.set_title(f"AUC Penalty Value: {round(data['AUC_PENALIZATION']['auc_penalization'], 4)}")
+
+
+def drawPeakRegionPenalization(ax, inputs: dict, data: dict):
+    sp_axis, sp_norm, baseline_sp_norm = inputs["sp_axis"], inputs["raw_sp_norm_bas"], inputs["baseline_sp_norm"]
+    peaks, peak_edges = inputs["peaks"], inputs["peak_edges"]
+    region = data["REGION_PEAK_PENALIZATION"]
+
+    ax.plot(sp_axis, sp_norm, color='tab:blue', alpha=0.4)
+    ax.plot(sp_axis, baseline_sp_norm, color='tab:orange')
+    ax.scatter(sp_axis[peaks], sp_norm[peaks], color='green', s=100, marker='x')
+    for s, e in peak_edges:
+        ax.plot(sp_axis[s:e], sp_norm[s:e], color='m')
+
+    verticalLines(ax, *prominenceLines(sp_axis, sp_norm, peak_edges, region["raman_shift_prominences"]),
+                  color="lightblue", alpha=0.4)
+    verticalLines(ax, *fittingLines(sp_axis, baseline_sp_norm, peak_edges, region["overfitting_index"],
+                                    region["overfitting"], -1), color='red', alpha=0.4)
+    verticalLines(ax, *fittingLines(sp_axis, baseline_sp_norm, peak_edges, region["underfitting_index"],
+                                    region["underfitting"], 1), color='tab:orange', alpha=0.4)
+    ax.set_xlabel("Raman shift (cm-1)")
+    ax.set_ylabel("Intensity")
+    ax.grid(alpha=0.4)
+    ax.set_title(f"Peak Region Penalty value {region['peak_region_penalization']}")
+
+
+def drawDipRegionPenalization(ax, inputs: dict, data: dict):
+    sp_axis, sp_norm, baseline_sp_norm = inputs["sp_axis"], inputs["raw_sp_norm_bas"], inputs["baseline_sp_norm"]
+    dips, dips_edges = inputs["dips"], inputs["dips_edges"]
+    region = data["REGION_DIP_PENALIZATION"]
+
+    ax.plot(sp_axis, sp_norm, color='tab:blue', alpha=0.4)
+    ax.plot(sp_axis, baseline_sp_norm, color='tab:orange')
+    ax.scatter(sp_axis[dips], sp_norm[dips], color='blue', s=100, marker='x')
+    for s, e in dips_edges:
+        ax.plot(sp_axis[s:e], sp_norm[s:e], color='m')
+
+    verticalLines(ax, *prominenceLines(sp_axis, sp_norm, dips_edges, region["raman_shift_prominences"]),
+                  color="lightblue", alpha=0.4)
+    verticalLines(ax, *fittingLines(sp_axis, baseline_sp_norm, dips_edges, region["indexes"], region["overfitting"],
+                                    1), color='red', alpha=0.4)
+    verticalLines(ax, *fittingLines(sp_axis, baseline_sp_norm, dips_edges, region["indexes"], region["underfitting"],
+                                    -1), color='tab:orange', alpha=0.4)
+    ax.set_xlabel("Raman shift (cm-1)")
+    ax.set_ylabel("Intensity")
+    ax.grid(alpha=0.4)
+    ax.set_title(f"Dip Region Penalty value {round(region['dip_region_penalization'], 4)}")
+
+
+# Debug plots of getIS_Score: category of DebugCollector.allPlot() and function drawing it
+DEBUG_PLOTS = {
+    "SINGLE_PEAKS_DIPS_PENALIZATION": drawSinglePeakDipPenalization,
+    "INTENSITY_PENALIZATION": drawIntensityPenalization,
+    "AUC_PENALIZATION": drawAUCPenalization,
+    "REGION_PEAK_PENALIZATION": drawPeakRegionPenalization,
+    "REGION_DIP_PENALIZATION": drawDipRegionPenalization,
+}
+
+
+def renderFigure(draw, inputs: dict, data: dict):
+    """
+    Render a debug plot in a new figure.
+
+    Parameters
+    ----------
+    draw : callable
+        The function drawing the plot, one of the values of ``DEBUG_PLOTS``.
+    inputs : dict
+        The spectra of the scoring (sp_axis, raw_sp, raw_sp_norm, raw_sp_norm_bas, baseline, baseline_sp_norm) and
+        the detected bands (peaks, peak_edges, dips, dips_edges).
+    data : dict
+        The data collected by DebugCollector during the scoring.
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+        The figure, already closed so that it is not shown by ``plt.show()`` unless requested.
+    """
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    draw(ax, inputs, data)
+    plt.close(fig)
+    return fig
+
+
+class LazyPlot(Mapping):
+    """
+    Entry of DebugCollector.allPlot() whose ``plot`` figure is rendered on the first access and then kept.
+
+    It behaves as a read-only dict with the single key ``plot``.
+    """
+
+    def __init__(self, draw, inputs: dict, data: dict):
+        self._render = (draw, inputs, data)
+        self._figure = None
+
+    def __getitem__(self, key):
+        if key != "plot":
+            raise KeyError(key)
+        if self._figure is None:
+            self._figure = renderFigure(*self._render)
+            self._render = None
+        return self._figure
+
+    def __iter__(self):
+        return iter(("plot",))
+
+    def __len__(self):
+        return 1
+
+
+def logDebugPlots(inputs: dict):
+    """
+    Register the debug plots of a scoring in the current DebugCollector record, without rendering them.
+
+    The data collected so far is copied, so a plot accessed after another scoring on the same record still shows
+    the data of its own scoring.
+
+    Parameters
+    ----------
+    inputs : dict
+        The spectra and the bands of the scoring, as described in renderFigure.
+    """
+    data = {category: dict(values) for category, values in DebugCollector.collected_data.items()}
+    for category, draw in DEBUG_PLOTS.items():
+        DebugCollector.plot_data[category] = LazyPlot(draw, inputs, data)
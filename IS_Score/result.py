@@ -0,0 +1,333 @@
+from dataclasses import dataclass
+import numpy as np
+from IS_Score.utils import normalizeSpectraBaseline, _checkInput
+from IS_Score.IS_Score import (PENALTY_NAMES, ISScoreComponents, SpectrumAnalysis, analyzeSpectrum, _getPenalties,
+                               _finalScore)
+
+# Fields with one row per result in a bulk file, the others have a variable length
+_FIXED_FIELDS = ("is_score", "penalties")
+
+
+@dataclass(eq=False)
+class ISScoreResult:
+    """
+    IS-Score of a baseline with the diagnostics of each band, stored in NumPy arrays.
+
+    The per-point diagnostics of the band regions are concatenated in flat arrays: the values of the i-th band are
+    ``values[offsets[i]:offsets[i + 1]]``. The record is cheap to pickle and to save with ``save`` or, for many
+    results, with ``saveResults``.
+
+    Attributes
+    ----------
+    is_score : float
+        The IS-Score.
+    penalties : np.array
+        The seven penalties, with shape (7,) and ordered as in ``PENALTY_NAMES``.
+    peaks, dips : np.array
+        The index of each peak and dip, with shape (n,).
+    peak_edges, dip_edges : np.array
+        The left and right edge of each band region, with shape (n, 2).
+    peak_prominences, dip_prominences : np.array
+        The prominences of the bands, normalized against the baseline as in the penalties.
+    peak_overfitting_penalties, peak_underfitting_penalties : np.array
+        The overfitting and underfitting penalty of each peak region, with shape (n,).
+    peak_overfitting, peak_underfitting : np.array
+        The distances from the baseline of the fake prominences below (overfitting) and above (underfitting) it.
+    peak_overfitting_index, peak_underfitting_index : np.array
+        The index in the spectrum of each distance.
+    peak_overfitting_offsets, peak_underfitting_offsets : np.array
+        The offsets of each peak in the flat arrays, with shape (n + 1,).
+    dip_overfitting_penalties, dip_underfitting_penalties : np.array
+        The overfitting and underfitting penalty of each dip region, with shape (n,).
+    dip_overfitting, dip_underfitting : np.array
+        The distances from the baseline at every point of the dip regions, zero where it is not crossed.
+    dip_offsets : np.array
+        The offsets of each dip in the flat arrays, with shape (n + 1,). The points of the i-th dip are
+        ``dip_edges[i, 0]`` to ``dip_edges[i, 1]``.
+    """
+    __slots__ = ("is_score", "penalties",
+                 "peaks", "peak_edges", "peak_prominences",
+                 "peak_overfitting_penalties", "peak_underfitting_penalties",
+                 "peak_overfitting", "peak_overfitting_index", "peak_overfitting_offsets",
+                 "peak_underfitting", "peak_underfitting_index", "peak_underfitting_offsets",
+                 "dips", "dip_edges", "dip_prominences",
+                 "dip_overfitting_penalties", "dip_underfitting_penalties",
+                 "dip_overfitting", "dip_underfitting", "dip_offsets")
+
+    is_score: float
+    penalties: np.ndarray
+    peaks: np.ndarray
+    peak_edges: np.ndarray
+    peak_prominences: np.ndarray
+    peak_overfitting_penalties: np.ndarray
+    peak_underfitting_penalties: np.ndarray
+    peak_overfitting: np.ndarray
+    peak_overfitting_index: np.ndarray
+    peak_overfitting_offsets: np.ndarray
+    peak_underfitting: np.ndarray
+    peak_underfitting_index: np.ndarray
+    peak_underfitting_offsets: np.ndarray
+    dips: np.ndarray
+    dip_edges: np.ndarray
+    dip_prominences: np.ndarray
+    dip_overfitting_penalties: np.ndarray
+    dip_underfitting_penalties: np.ndarray
+    dip_overfitting: np.ndarray
+    dip_underfitting: np.ndarray
+    dip_offsets: np.ndarray
+
+    def components(self) -> ISScoreComponents:
+        """
+        Return the IS-Score and the seven penalties as an ISScoreComponents record.
+        """
+        return ISScoreComponents(self.is_score, *(float(p) for p in self.penalties))
+
+    def peakRegion(self, i: int) -> tuple:
+        """
+        Return the overfitting indexes and distances and the underfitting indexes and distances of the i-th peak.
+        """
+        over, under = slice(*self.peak_overfitting_offsets[i:i + 2]), slice(*self.peak_underfitting_offsets[i:i + 2])
+        return (self.peak_overfitting_index[over], self.peak_overfitting[over],
+                self.peak_underfitting_index[under], self.peak_underfitting[under])
+
+    def dipRegion(self, i: int) -> tuple:
+        """
+        Return the indexes of the region of the i-th dip and its overfitting and underfitting distances.
+        """
+        region = slice(*self.dip_offsets[i:i + 2])
+        return np.arange(*self.dip_edges[i]), self.dip_overfitting[region], self.dip_underfitting[region]
+
+    def toArrays(self) -> dict:
+        """
+        Return the fields as a dictionary of arrays, the IS-Score being a 0-d array.
+        """
+        return {name: np.asarray(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def fromArrays(cls, arrays) -> "ISScoreResult":
+        """
+        Build the record from a mapping of arrays, such as the one returned by toArrays or an opened .npz file.
+        """
+        values = {name: np.asarray(arrays[name]) for name in cls.__slots__}
+        values["is_score"] = float(values["is_score"])
+        return cls(**values)
+
+    def save(self, path: str):
+        """
+        Save the record in an uncompressed .npz file.
+        """
+        np.savez(path, **self.toArrays())
+
+    @classmethod
+    def load(cls, path: str) -> "ISScoreResult":
+        """
+        Load a record saved with save.
+        """
+        with np.load(path) as arrays:
+            return cls.fromArrays(arrays)
+
+
+def _flatten(arrays: list, dtype) -> tuple:
+    """
+    Concatenate the per-band arrays, returning the flat array and the offsets of each band.
+    """
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(arr) for arr in arrays])
+    flat = np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.empty(0, dtype=dtype)
+    return flat, offsets
+
+
+def _bands(bands: tuple, edges: tuple, prominences: list) -> tuple:
+    return (np.asarray(bands, dtype=np.int64).reshape(-1),
+            np.asarray(edges, dtype=np.int64).reshape(-1, 2),
+            np.array([np.ravel(prom[0])[0] for prom in prominences], dtype=np.float64))
+
+
+def scoreBaselineResult(analysis: SpectrumAnalysis, baseline_corrected_sp: np.array) -> ISScoreResult:
+    """
+    Compute the IS-Score of a baseline corrected spectrum with the diagnostics of each band.
+
+    The penalties are the same of scoreBaseline, while the diagnostics of the band regions are computed without
+    enabling the DebugCollector.
+
+    Parameters
+    ----------
+    analysis : SpectrumAnalysis
+        The analysis of the raw spectrum, as returned by analyzeSpectrum.
+    baseline_corrected_sp : np.array
+        The baseline corrected spectrum.
+
+    Returns
+    -------
+    result : ISScoreResult
+        The IS-Score, the penalties and the diagnostics of the peaks and dips.
+    """
+    raw_sp, sp_axis = analysis.raw_sp, analysis.sp_axis
+
+    if not _checkInput(raw_sp, baseline_corrected_sp, sp_axis):
+        raise ValueError("Invalid input: the spectra and the spectral axis must be non-empty and of equal length.")
+
+    baseline = raw_sp - np.array(baseline_corrected_sp)
+
+    raw_sp_norm_bas, baseline_sp_norm = normalizeSpectraBaseline(raw_sp, baseline)
+    combined_min, combined_max = min(np.min(raw_sp_norm_bas), np.min(baseline_sp_norm)), max(np.max(raw_sp_norm_bas), np.max(baseline_sp_norm))
+
+    # The diagnostics of the band regions are the ones the region penalties are computed from
+    penalties, peaks_prominences, peak_bands, dips_prominences, dip_bands = _getPenalties(
+        analysis, baseline, raw_sp_norm_bas, baseline_sp_norm, combined_min, combined_max, return_bands=True)
+    is_score = float(_finalScore(penalties))
+
+    peaks, peak_edges = list(analysis.peaks), list(analysis.peak_edges)
+    left_edges = [left_edge for left_edge, _ in peak_edges]
+
+    peak_overfitting, peak_overfitting_offsets = _flatten([band[0] for band in peak_bands], np.float64)
+    peak_overfitting_index, _ = _flatten([band[1] + left for band, left in zip(peak_bands, left_edges)], np.int64)
+    peak_underfitting, peak_underfitting_offsets = _flatten([band[2] for band in peak_bands], np.float64)
+    peak_underfitting_index, _ = _flatten([band[3] + left for band, left in zip(peak_bands, left_edges)], np.int64)
+
+    dips, dips_edges = list(analysis.dips), list(analysis.dips_edges)
+    dip_overfitting, dip_offsets = _flatten([band[0] for band in dip_bands], np.float64)
+    dip_underfitting, _ = _flatten([band[1] for band in dip_bands], np.float64)
+
+    return ISScoreResult(
+        is_score, np.array(penalties, dtype=np.float64),
+        *_bands(peaks, peak_edges, peaks_prominences),
+        np.array([band[4] for band in peak_bands], dtype=np.float64),
+        np.array([band[5] for band in peak_bands], dtype=np.float64),
+        peak_overfitting, peak_overfitting_index, peak_overfitting_offsets,
+        peak_underfitting, peak_underfitting_index, peak_underfitting_offsets,
+        *_bands(dips, dips_edges, dips_prominences),
+        np.array([band[2] for band in dip_bands], dtype=np.float64),
+        np.array([band[3] for band in dip_bands], dtype=np.float64),
+        dip_overfitting, dip_underfitting, dip_offsets)
+
+
+def getIS_ScoreResult(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array, **kwargs) -> ISScoreResult:
+    """
+    Compute the IS-Score with the diagnostics of each band. The optional parameters are the ones of getIS_Score.
+
+    Parameters
+    ----------
+    raw_sp : np.array
+        The Raman spectrum.
+    baseline_corrected_sp : np.array
+        The baseline corrected spectrum.
+    sp_axis : np.array
+        The spectral axis.
+
+    Returns
+    -------
+    result : ISScoreResult
+        The IS-Score, the penalties and the diagnostics of the peaks and dips.
+    """
+    if not _checkInput(raw_sp, baseline_corrected_sp, sp_axis):
+        raise ValueError("Invalid input: the spectra and the spectral axis must be non-empty and of equal length.")
+
+    analysis_cache = kwargs.pop("analysis_cache", None)
+    if analysis_cache is not None:
+        analysis = analysis_cache.analyzeSpectrum(raw_sp, sp_axis, **kwargs)
+    else:
+        analysis = analyzeSpectrum(raw_sp, sp_axis, **kwargs)
+    return scoreBaselineResult(analysis, baseline_corrected_sp)
+
+
+def saveResults(path: str, results: list, names: list = None):
+    """
+    Save many results in a single uncompressed .npz file for bulk analysis.
+
+    Each field of the results is concatenated in one array, so that e.g. ``peak_overfitting_penalties`` holds the
+    penalties of all the peaks of all the results. The number of elements of each result is stored in the
+    ``<field>_counts`` array, and ``is_score``/``penalties`` have one row per result.
+
+    Parameters
+    ----------
+    path : str
+        The path of the .npz file.
+    results : list
+        The ISScoreResult records.
+    names : list, optional
+        The name of each result, e.g. the file and the baseline. Default is the index of the result.
+    """
+    names = [str(i) for i in range(len(results))] if names is None else [str(name) for name in names]
+    if len(names) != len(results):
+        raise ValueError("Invalid input: the number of names must match the number of results.")
+
+    arrays = {"names": np.array(names, dtype=str),
+              "is_score": np.array([result.is_score for result in results], dtype=np.float64),
+              "penalties": np.array([result.penalties for result in results], dtype=np.float64).reshape(-1, len(PENALTY_NAMES))}
+    for name in ISScoreResult.__slots__:
+        if name in _FIXED_FIELDS:
+            continue
+        values = [getattr(result, name) for result in results]
+        arrays[f"{name}_counts"] = np.array([len(value) for value in values], dtype=np.int64)
+        if values:
+            arrays[name] = np.concatenate(values)
+        else:
+            arrays[name] = np.empty((0, 2) if name.endswith("_edges") else 0)
+    np.savez(path, **arrays)
+
+
+def loadResults(path: str) -> tuple:
+    """
+    Load the results saved with saveResults.
+
+    Parameters
+    ----------
+    path : str
+        The path of the .npz file.
+
+    Returns
+    -------
+    names, results : tuple
+        The name of each result and the ISScoreResult records.
+    """
+    with np.load(path) as arrays:
+        names = arrays["names"].tolist()
+        columns = {name: np.split(arrays[name], np.cumsum(arrays[f"{name}_counts"])[:-1])
+                   for name in ISScoreResult.__slots__ if name not in _FIXED_FIELDS}
+        results = [ISScoreResult.fromArrays({"is_score": arrays["is_score"][i], "penalties": arrays["penalties"][i],
+                                             **{name: column[i] for name, column in columns.items()}})
+                   for i in range(len(names))]
+    return names, results
+
+
+def resultsToArrow(results: list, names: list = None):
+    """
+    Convert many results to an Arrow table with one row per result, the per-band fields being list columns.
+
+    The flat arrays are passed to Arrow without copies of the values. It requires the optional pyarrow dependency.
+
+    Parameters
+    ----------
+    results : list
+        The ISScoreResult records.
+    names : list, optional
+        The name of each result. Default is the index of the result.
+
+    Returns
+    -------
+    table : pyarrow.Table
+        The table, e.g. to be written with ``pyarrow.parquet.write_table``.
+    """
+    import pyarrow as pa
+
+    names = [str(i) for i in range(len(results))] if names is None else [str(name) for name in names]
+    columns = {"name": pa.array(names, type=pa.string()),
+               "is_score": pa.array([result.is_score for result in results], type=pa.float64())}
+    for i, penalty in enumerate(PENALTY_NAMES):
+        columns[penalty.lower().replace(" ", "_")] = pa.array([result.penalties[i] for result in results],
+                                                              type=pa.float64())
+
+    for name in ISScoreResult.__slots__:
+        if name in _FIXED_FIELDS:
+            continue
+        values = [getattr(result, name) for result in results]
+        offsets = np.zeros(len(values) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(value) for value in values])
+        if name.endswith("_edges"):
+            flat = np.concatenate(values).reshape(-1) if values else np.empty(0, dtype=np.int64)
+            items = pa.FixedSizeListArray.from_arrays(pa.array(flat), 2)
+        else:
+            items = pa.array(np.concatenate(values) if values else np.empty(0))
+        columns[name] = pa.ListArray.from_arrays(pa.array(offsets), items)
+    return pa.table(columns)
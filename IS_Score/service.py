@@ -0,0 +1,403 @@
+import sys
+import json
+import asyncio
+import argparse
+import multiprocessing
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from IS_Score.utils import _checkInput
+from IS_Score.parallel import ScoreFailure
+from IS_Score.IS_Score import getIS_Score, getIS_ScoreBatch, ISScoreComponents, PENALTY_NAMES
+
+# Largest request body accepted by the server, in bytes
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+def _scoreBatch(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array, kwargs: dict) -> list:
+    """
+    Score a micro-batch of spectra sharing the same spectral axis inside a worker.
+
+    Returns
+    -------
+    results : list
+        The ISScoreComponents of each spectrum, or a ScoreFailure if its scoring failed.
+    """
+    try:
+        is_scores, penalties = getIS_ScoreBatch(raw_sp, baseline_corrected_sp, sp_axis, **dict(kwargs))
+        return [ISScoreComponents(float(is_score), *map(float, row)) for is_score, row in zip(is_scores, penalties)]
+    except Exception:
+        pass
+
+    # A spectrum of the batch failed: score them one by one so that the others are not affected
+    results = []
+    for i in range(len(raw_sp)):
+        try:
+            results.append(getIS_Score(raw_sp[i], baseline_corrected_sp[i], sp_axis, verbose=False,
+                                       return_components=True, **dict(kwargs)))
+        except Exception as e:
+            results.append(ScoreFailure(i, repr(e)))
+    return results
+
+
+class AsyncISScorer:
+    """
+    Score spectra from asyncio code without blocking the event loop.
+
+    The requests are put in a bounded queue, so the callers wait when it is full. A dispatcher collects the requests
+    which arrive within ``batch_window`` seconds into micro-batches of spectra with the same spectral axis, and
+    scores each of them with getIS_ScoreBatch on an executor. At most ``max_in_flight`` batches are submitted at
+    the same time.
+
+    Parameters
+    ----------
+    workers : int, optional
+        The number of worker processes of the executor created by the scorer. Default is the number of CPUs.
+    executor : concurrent.futures.Executor, optional
+        The executor used instead of a new process pool. It is not shut down by close.
+    max_queue : int, optional
+        The maximum number of requests waiting to be batched. Default is 1024.
+    max_in_flight : int, optional
+        The maximum number of batches being scored. Default is twice the number of workers.
+    max_batch : int, optional
+        The maximum number of spectra of a batch. Default is 64.
+    batch_window : float, optional
+        The time in seconds the dispatcher waits for more requests after the first one of a batch. Default is 0.002.
+
+    The other keyword arguments (``peaks_dips_tolerance``, ``custom_peaks``, ``custom_dips``) are passed to
+    getIS_ScoreBatch for every request.
+
+    Examples
+    --------
+    >>> async with AsyncISScorer(workers=4) as scorer:
+    ...     scores = await asyncio.gather(*(scorer.score(raw, corrected, axis) for raw, corrected in frames))
+    """
+
+    def __init__(self, workers: int = None, executor=None, max_queue: int = 1024, max_in_flight: int = None,
+                 max_batch: int = 64, batch_window: float = 0.002, **kwargs):
+        self._owns_executor = executor is None
+        if executor is None:
+            # Forked workers would inherit the sockets of the server, keeping the closed connections open
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._executor = executor
+        workers = getattr(self._executor, "_max_workers", None) or 1
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight or 2 * workers
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window
+        self.kwargs = kwargs
+
+        self.n_requests = 0
+        self.n_batches = 0
+        self._queue = None
+        self._slots = None
+        self._dispatcher = None
+        self._running = set()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def queued(self) -> int:
+        """
+        The number of requests waiting to be batched.
+        """
+        return 0 if self._queue is None else self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of batches being scored.
+        """
+        return len(self._running)
+
+    def start(self):
+        """
+        Start the dispatcher in the running event loop. It is called by the first request if needed.
+        """
+        if self._dispatcher is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def close(self):
+        """
+        Stop the dispatcher, wait for the batches being scored and shut down the executor created by the scorer.
+        The requests still in the queue are cancelled.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            await asyncio.gather(*self._running, return_exceptions=True)
+            while not self._queue.empty():
+                self._queue.get_nowait()[-1].cancel()
+            self._dispatcher = None
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def score(self, raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array,
+                    return_components: bool = False):
+        """
+        Compute the IS-Score of a spectrum. No output table is printed.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum.
+        baseline_corrected_sp : np.array
+            The baseline corrected spectrum.
+        sp_axis : np.array
+            The spectral axis.
+        return_components : bool, optional
+            If True, return an ISScoreComponents record with the IS-Score and the seven penalties instead of the
+            IS-Score alone.
+
+        Returns
+        -------
+        is_score : float or ISScoreComponents
+            A numerical value that assess the baseline fit, or the record with its components if
+            `return_components` is set. -1 is returned if the input is not valid.
+        """
+        if not _checkInput(raw_sp, baseline_corrected_sp, sp_axis):
+            return -1
+
+        self.start()
+        sp_axis = np.asarray(sp_axis, dtype=np.float64)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((sp_axis.tobytes(), np.asarray(raw_sp, dtype=np.float64),
+                               np.asarray(baseline_corrected_sp, dtype=np.float64), sp_axis, future))
+        self.n_requests += 1
+
+        result = await future
+        if isinstance(result, ScoreFailure):
+            raise RuntimeError(f"The scoring of the spectrum failed: {result.error}")
+        return result if return_components else result.is_score
+
+    async def _dispatch(self):
+        groups = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                groups = [batch]
+                if self.batch_window > 0 and len(batch) < self.max_batch:
+                    await asyncio.sleep(self.batch_window)
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                # Only the spectra with the same spectral axis can be scored together
+                by_axis = {}
+                for item in batch:
+                    by_axis.setdefault(item[0], []).append(item)
+                groups = list(by_axis.values())
+
+                while groups:
+                    await self._slots.acquire()
+                    task = asyncio.get_running_loop().create_task(self._run(groups.pop()))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+        except asyncio.CancelledError:
+            # The requests taken from the queue and not yet submitted are cancelled with the dispatcher
+            for group in groups:
+                for item in group:
+                    item[-1].cancel()
+            raise
+
+    async def _run(self, group: list):
+        try:
+            raw_sp = np.stack([item[1] for item in group])
+            corrected_sp = np.stack([item[2] for item in group])
+            loop = asyncio.get_running_loop()
+            self.n_batches += 1
+            try:
+                results = await loop.run_in_executor(self._executor, _scoreBatch, raw_sp, corrected_sp,
+                                                     group[0][3], self.kwargs)
+            except Exception as e:
+                results = [ScoreFailure(i, repr(e)) for i in range(len(group))]
+
+            for item, result in zip(group, results):
+                if not item[-1].done():
+                    item[-1].set_result(result)
+        finally:
+            self._slots.release()
+
+
+def encodePayload(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array = None) -> bytes:
+    """
+    Encode a spectrum in the body of a request to the scoring server: the raw spectrum, the baseline corrected
+    spectrum and, if the server has no fixed spectral axis, the spectral axis, as consecutive float32 values in
+    little-endian order.
+    """
+    arrays = [raw_sp, baseline_corrected_sp] + ([] if sp_axis is None else [sp_axis])
+    return b"".join(np.asarray(arr, dtype="<f4").tobytes() for arr in arrays)
+
+
+def decodePayload(body: bytes, sp_axis: np.array = None) -> tuple:
+    """
+    Decode the body of a request written by encodePayload.
+
+    Returns
+    -------
+    raw_sp, baseline_corrected_sp, sp_axis : tuple
+        The spectra and the spectral axis, as float64 arrays.
+    """
+    n_arrays = 2 if sp_axis is not None else 3
+    if len(body) == 0 or len(body) % (4 * n_arrays) != 0:
+        raise ValueError(f"the payload must contain {n_arrays} float32 arrays of the same length")
+    arrays = np.frombuffer(body, dtype="<f4").astype(np.float64).reshape(n_arrays, -1)
+    if sp_axis is not None:
+        if arrays.shape[1] != len(sp_axis):
+            raise ValueError(f"the spectra must have {len(sp_axis)} points, as the spectral axis of the server")
+        return arrays[0], arrays[1], np.asarray(sp_axis, dtype=np.float64)
+    return arrays[0], arrays[1], arrays[2]
+
+
+async def _respond(scorer: AsyncISScorer, method: str, path: str, body: bytes, sp_axis: np.array) -> tuple:
+    if path == "/health":
+        if method != "GET":
+            return 405, {"error": "use GET"}
+        return 200, {"status": "ok", "queued": scorer.queued, "in_flight": scorer.in_flight}
+    if path != "/score":
+        return 404, {"error": f"unknown path {path}"}
+    if method != "POST":
+        return 405, {"error": "use POST"}
+
+    try:
+        raw_sp, corrected_sp, axis = decodePayload(body, sp_axis)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    try:
+        result = await scorer.score(raw_sp, corrected_sp, axis, return_components=True)
+    except Exception as e:
+        return 500, {"error": str(e)}
+    if result == -1:
+        return 422, {"error": "the spectra and the spectral axis are not valid"}
+    return 200, {"is_score": result.is_score, "penalties": dict(zip(PENALTY_NAMES, result[1:]))}
+
+
+async def _handleConnection(reader, writer, scorer: AsyncISScorer, sp_axis: np.array):
+    """
+    Serve the HTTP/1.1 requests of a connection, keeping it open until the client closes it.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            parts = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = headers.get("content-length", "0")
+            length = int(length) if length.isdigit() else -1
+            if len(parts) != 3 or length < 0:
+                status, payload = 400, {"error": "malformed request"}
+            elif length > MAX_PAYLOAD:
+                status, payload = 413, {"error": f"the payload is larger than {MAX_PAYLOAD} bytes"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await _respond(scorer, parts[0], urlsplit(parts[1]).path, body, sp_axis)
+
+            close = status in (400, 413) or parts[2] == "HTTP/1.0" or headers.get("connection", "").lower() == "close"
+            data = json.dumps(payload).encode()
+            writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                         .encode("latin-1") + data)
+            await writer.drain()
+            if close:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def startServer(scorer: AsyncISScorer, host: str = "127.0.0.1", port: int = 8765, path: str = None,
+                      sp_axis: np.array = None) -> asyncio.AbstractServer:
+    """
+    Start a local HTTP server scoring the spectra posted to ``/score``.
+
+    The body of a request is written by encodePayload: the raw and the baseline corrected spectrum and, if the
+    server has no fixed spectral axis, the spectral axis, as float32 values. The response is a JSON object with the
+    IS-Score and the seven penalties. The concurrent requests are micro-batched by the scorer. ``GET /health``
+    returns the number of queued requests and of batches being scored.
+
+    Parameters
+    ----------
+    scorer : AsyncISScorer
+        The scorer of the requests.
+    host : str, optional
+        The address of the server. Default is localhost.
+    port : int, optional
+        The port of the server, 0 to choose a free one. Default is 8765.
+    path : str, optional
+        If given, the server listens on this Unix socket instead of host and port.
+    sp_axis : np.array, optional
+        The spectral axis shared by all the spectra, so that the requests contain only the spectra.
+
+    Returns
+    -------
+    server : asyncio.AbstractServer
+        The server, already accepting connections.
+    """
+    scorer.start()
+
+    async def handler(reader, writer):
+        await _handleConnection(reader, writer, scorer, sp_axis)
+
+    if path is not None:
+        return await asyncio.start_unix_server(handler, path=path)
+    return await asyncio.start_server(handler, host=host, port=port)
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of ``python -m IS_Score.service``, which serves the IS-Score until it is interrupted.
+    """
+    parser = argparse.ArgumentParser(prog="python -m IS_Score.service",
+                                     description="Serve the IS-Score over HTTP on localhost or on a Unix socket.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the server. Default: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server. Default: 8765.")
+    parser.add_argument("--unix", metavar="PATH", help="Listen on this Unix socket instead of host and port.")
+    parser.add_argument("--axis", metavar="FILE",
+                        help="Spectrum file (.txt/.csv) whose spectral axis is shared by all the requests.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes. Default: one per CPU.")
+    parser.add_argument("--max-batch", type=int, default=64, help="Maximum spectra per batch. Default: 64.")
+    args = parser.parse_args(argv)
+
+    sp_axis = None
+    if args.axis is not None:
+        from IS_Score.loader import loadSpectrumFile
+        sp_axis, _ = loadSpectrumFile(args.axis)
+
+    async def serve():
+        async with AsyncISScorer(workers=args.workers, max_batch=args.max_batch) as scorer:
+            server = await startServer(scorer, args.host, args.port, args.unix, sp_axis)
+            print(f"Serving the IS-Score on {args.unix or f'http://{args.host}:{args.port}'}", file=sys.stderr)
+            async with server:
+                await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import numpy as np
+from IS_Score.instrumentation import stage
+from IS_Score.band_edges_detection.band_detection import getWlenProminences
+from IS_Score.other_penalization.auc_penalization import getInterpolation
+from IS_Score.IS_Score import SpectrumAnalysis, analyzeSpectrum, scoreBaseline, _normalizeSpectrum, _readOnly, _meanRatioSpectra
+
+
+def _localMaxima(sp: np.array, bands: tuple, reach: int, edges: tuple = None) -> np.array:
+    """
+    Return the index of the maximum of the spectrum within `reach` samples of each band, and strictly inside its
+    edges if they are given.
+    """
+    if len(bands) == 0:
+        return np.zeros(0, dtype=int)
+    bands = np.asarray(bands, dtype=int)
+    window = np.clip(bands[:, None] + np.arange(-reach, reach + 1), 0, len(sp) - 1)
+    values = sp[window]
+    if edges is not None:
+        edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+        values = np.where((window > edges[:, :1]) & (window < edges[:, 1:]), values, -np.inf)
+    return window[np.arange(len(bands)), np.argmax(values, axis=1)]
+
+
+def warmAnalysis(reference: SpectrumAnalysis, raw_sp: np.array, tolerance: dict = None) -> SpectrumAnalysis:
+    """
+    Analyze a Raman spectrum reusing the bands and edges of the analysis of a similar spectrum.
+
+    Only the stages which depend on the intensities are computed again: the normalization, the prominences of the
+    bands and the AUC interpolation. The detection of the bands and of their edges is skipped, each band is only
+    moved to the maximum of the spectrum within the tolerance and inside its edges.
+
+    Parameters
+    ----------
+    reference : SpectrumAnalysis
+        The analysis of a spectrum with the same spectral axis, e.g. the previous frame of a time series.
+    raw_sp : np.array
+        The Raman spectrum.
+    tolerance : dict, optional
+        The tolerance of the peaks and of the dips, as the ``peaks_dips_tolerance`` of analyzeSpectrum. Default is
+        5 samples for both.
+
+    Returns
+    -------
+    analysis : SpectrumAnalysis
+        The analysis of the spectrum, with the edges of the reference.
+    """
+    if len(raw_sp) != len(reference.raw_sp):
+        raise ValueError("Invalid input: the spectrum must have the same length of the reference spectrum.")
+
+    raw_sp = np.array(raw_sp)
+    raw_sp_norm, neg_sp = _normalizeSpectrum(raw_sp)
+    tolerance = {"peaks": 5, "dips": 5} if tolerance is None else tolerance
+
+    # The noise moves the maximum of the bands by a few samples from one frame to the next
+    peaks = tuple(_localMaxima(raw_sp_norm, reference.peaks, tolerance["peaks"], reference.peak_edges))
+    dips = tuple(_localMaxima(neg_sp, reference.dips, tolerance["dips"], reference.dips_edges))
+
+    with stage("peak_prominences"):
+        peaks_prominences = getWlenProminences(raw_sp_norm, peaks, reference.peak_edges)
+    with stage("dip_prominences"):
+        dips_prominences = getWlenProminences(neg_sp, dips, reference.dips_edges)
+    with stage("auc_interpolation"):
+        interpolation = getInterpolation(raw_sp, list(peaks), list(reference.peak_edges))
+
+    # Smoothed spectra used by the Mean Ratio penalty
+    with stage("mean_ratio_smoothing"):
+        mean_ratio_sp = _meanRatioSpectra(raw_sp)
+
+    return SpectrumAnalysis(_readOnly(raw_sp), reference.sp_axis, _readOnly(raw_sp_norm), _readOnly(neg_sp),
+                            peaks, reference.peak_edges, tuple(peaks_prominences),
+                            dips, reference.dips_edges, tuple(dips_prominences),
+                            _readOnly(interpolation), mean_ratio_sp)
+
+
+class StreamingISScorer:
+    """
+    Stateful scorer for a time series of Raman spectra, such as the frames streamed by a spectrometer.
+
+    Consecutive frames differ only slightly, so the bands and edges detected on a frame are reused for the following
+    ones and only the stages which depend on the intensities are computed again (see warmAnalysis). The full
+    detection runs again when a drift test trips against the frame of the last detection:
+
+    - the normalized L2 change ``||x - x_ref|| / ||x_ref||`` of the spectrum normalized in the range 0-1 is above
+      ``drift_threshold``;
+    - the maximum of a peak or of a dip moved by more than its ``peaks_dips_tolerance``.
+
+    Parameters
+    ----------
+    sp_axis : np.array
+        The spectral axis shared by all the frames.
+    drift_threshold : float, optional
+        The normalized L2 change above which the bands are detected again. Default is 0.05.
+    max_warm_frames : int, optional
+        If given, the bands are detected again after this number of consecutive warm frames.
+
+    The other keyword arguments (``peaks_dips_tolerance``, ``custom_peaks``, ``custom_dips``) are passed to
+    analyzeSpectrum.
+    """
+
+    def __init__(self, sp_axis: np.array, drift_threshold: float = 0.05, max_warm_frames: int = None, **kwargs):
+        self.sp_axis = np.array(sp_axis)
+        self.drift_threshold = drift_threshold
+        self.max_warm_frames = max_warm_frames
+        self.kwargs = kwargs
+        self.tolerance = kwargs.get("peaks_dips_tolerance", {"peaks": 5, "dips": 5})
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the previous frames, so that the next frame runs the full detection.
+        """
+        self.reference = None
+        self.n_frames = 0
+        self.n_detections = 0
+        self.warm_frames = 0
+        self.last_drift = None
+
+    def drift(self, raw_sp_norm: np.array, neg_sp: np.array) -> bool:
+        """
+        Return True if the normalized spectrum drifted from the one of the last detection.
+        """
+        reference = self.reference
+        reference_norm = np.linalg.norm(reference.raw_sp_norm)
+        self.last_drift = np.linalg.norm(raw_sp_norm - reference.raw_sp_norm) / reference_norm if reference_norm else np.inf
+        if not self.last_drift <= self.drift_threshold:
+            return True
+
+        for sp, bands, tolerance in ((raw_sp_norm, reference.peaks, self.tolerance["peaks"]),
+                                     (neg_sp, reference.dips, self.tolerance["dips"])):
+            if np.any(np.abs(_localMaxima(sp, bands, tolerance + 1) - np.asarray(bands, dtype=int)) > tolerance):
+                return True
+        return False
+
+    def analyze(self, raw_sp: np.array) -> SpectrumAnalysis:
+        """
+        Analyze the next frame, reusing the bands of the last detection unless the drift test trips.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum of the frame.
+
+        Returns
+        -------
+        analysis : SpectrumAnalysis
+            The analysis of the frame.
+        """
+        if len(raw_sp) != len(self.sp_axis):
+            raise ValueError("Invalid input: the spectrum and the spectral axis must be of equal length.")
+
+        self.n_frames += 1
+        warm = self.reference is not None
+        if warm and self.max_warm_frames is not None and self.warm_frames >= self.max_warm_frames:
+            warm = False
+        if warm and not self.drift(*_normalizeSpectrum(np.asarray(raw_sp, dtype=float))):
+            self.warm_frames += 1
+            return warmAnalysis(self.reference, raw_sp, self.tolerance)
+
+        self.reference = analyzeSpectrum(raw_sp, self.sp_axis, **self.kwargs)
+        self.n_detections += 1
+        self.warm_frames = 0
+        return self.reference
+
+    def score(self, raw_sp: np.array, baseline_corrected_sp: np.array, return_components: bool = False):
+        """
+        Compute the IS-Score of the next frame. No output table is printed.
+
+        Parameters
+        ----------
+        raw_sp : np.array
+            The Raman spectrum of the frame.
+        baseline_corrected_sp : np.array
+            The baseline corrected spectrum of the frame.
+        return_components : bool, optional
+            If True, return an ISScoreComponents record with the IS-Score and the seven penalties instead of the
+            IS-Score alone.
+
+        Returns
+        -------
+        is_score : float or ISScoreComponents
+            A numerical value that assess the baseline fit, or the record with its components if
+            `return_components` is set.
+        """
+        return scoreBaseline(self.analyze(raw_sp), baseline_corrected_sp, verbose=False,
+                             return_components=return_components)
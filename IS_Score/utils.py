@@ -1,43 +1,135 @@
+import contextlib
+import contextvars
+
 import numpy as np
 
 
-class DebugCollector:
+class DebugRecord:
+    """
+    Debug information collected inside a scope of DebugCollector.
+
+    Attributes
+    ----------
+    collected_data : dict
+        Dictionary to store general debug data in the form {category: {subkey: value}}.
+    plot_data : dict
+        Dictionary to store plot-related debug data in the same format.
+    """
+    __slots__ = ("collected_data", "plot_data")
+
+    def __init__(self):
+        self.collected_data = {}
+        self.plot_data = {}
+
+    def log(self, category, subkey, value):
+        self.collected_data.setdefault(category, {})[subkey] = value
+
+    def logPlot(self, category, subkey, value):
+        self.plot_data.setdefault(category, {})[subkey] = value
+
+    def get(self, category, subkey=None):
+        if category not in self.collected_data:
+            return None
+        if subkey:
+            return self.collected_data[category].get(subkey)
+        return self.collected_data[category]
+
+    def getPlot(self, category, subkey=None):
+        if category not in self.plot_data:
+            return None
+        if subkey:
+            return self.plot_data[category].get(subkey)
+        return self.plot_data[category]
+
+    def all(self):
+        return self.collected_data
+
+    def allPlot(self):
+        return self.plot_data
+
+
+# The record of the current thread or asyncio task, None when the collector is disabled
+_debug_record = contextvars.ContextVar("debug_record", default=None)
+
+
+class _DebugCollectorMeta(type):
+    """
+    Expose the state of the current context as class attributes of DebugCollector.
+    """
+
+    @property
+    def enabled(cls):
+        return _debug_record.get() is not None
+
+    @property
+    def collected_data(cls):
+        record = _debug_record.get()
+        return {} if record is None else record.collected_data
+
+    @property
+    def plot_data(cls):
+        record = _debug_record.get()
+        return {} if record is None else record.plot_data
+
+
+class DebugCollector(metaclass=_DebugCollectorMeta):
     """
     Utility class for collecting debugging information during algorithm execution.
 
     This class allows logging and retrieving arbitrary debug information grouped by categories and subkeys.
-    It supports separate storage for general data and plot-specific data. Logging can be enabled or disabled globally.
+    It supports separate storage for general data and plot-specific data. The data is stored in a DebugRecord held
+    in a context variable. A new thread starts with the collector disabled, so a collector activated in the main
+    thread does not collect the data of the worker threads. An asyncio task instead inherits the record of the
+    context which creates it: after ``activate``, all the tasks created later log into the same record. Only
+    ``scope`` gives a separate record to a block of code, so use it inside each thread or task whose data must be
+    kept apart.
 
     Attributes
     ----------
     enabled : bool
-        Indicates whether data collection is active.
+        Indicates whether data collection is active in the current context.
     collected_data : dict
         Dictionary to store general debug data in the form {category: {subkey: value}}.
     plot_data : dict
         Dictionary to store plot-related debug data in the same format.
     """
-    enabled = False
-    collected_data = {}
-    plot_data = {}
 
     @classmethod
     def activate(cls):
         """
-        Enable the debug collector and reset previously collected data.
+        Enable the debug collector in the current context and reset previously collected data.
+
+        The new record is shared with the asyncio tasks created afterwards from this context, but not with the other
+        threads. Use ``scope`` to collect the data of each task separately.
         """
-        cls.enabled = True
-        cls.collected_data = {}
-        cls.plot_data = {}
+        _debug_record.set(DebugRecord())
 
     @classmethod
     def deactivate(cls):
         """
-        Disable the debug collector and clear previously collected data.
+        Disable the debug collector in the current context and clear previously collected data.
+        """
+        _debug_record.set(None)
+
+    @classmethod
+    @contextlib.contextmanager
+    def scope(cls):
+        """
+        Collect the debug data of a block of code in a new record, restoring the previous state at the end.
+
+        Scopes can be nested: the data logged inside the inner scope is stored only in its record.
+
+        Yields
+        ------
+        record : DebugRecord
+            The record with the data logged inside the block.
         """
-        cls.enabled = False
-        cls.collected_data = {}
-        cls.plot_data = {}
+        record = DebugRecord()
+        token = _debug_record.set(record)
+        try:
+            yield record
+        finally:
+            _debug_record.reset(token)
 
     @classmethod
     def log(cls, category, subkey, value):
@@ -53,10 +145,9 @@ class DebugCollector:
         value : Any
             The value to store.
         """
-        if cls.enabled:
-            if category not in cls.collected_data:
-                cls.collected_data[category] = {}
-            cls.collected_data[category][subkey] = value
+        record = _debug_record.get()
+        if record is not None:
+            record.log(category, subkey, value)
 
     @classmethod
     def logPlot(cls, category, subkey, value):
@@ -72,10 +163,9 @@ class DebugCollector:
         value : Any
             The value to store.
         """
-        if cls.enabled:
-            if category not in cls.plot_data:
-                cls.plot_data[category] = {}
-            cls.plot_data[category][subkey] = value
+        record = _debug_record.get()
+        if record is not None:
+            record.logPlot(category, subkey, value)
 
     @classmethod
     def get(cls, category, subkey=None):
@@ -94,11 +184,8 @@ class DebugCollector:
         Any or dict or None
             The requested value, dictionary of subkeys, or None if not found.
         """
-        if category not in cls.collected_data:
-            return None
-        if subkey:
-            return cls.collected_data[category].get(subkey)
-        return cls.collected_data[category]
+        record = _debug_record.get()
+        return None if record is None else record.get(category, subkey)
 
     @classmethod
     def getPlot(cls, category, subkey=None):
@@ -117,11 +204,8 @@ class DebugCollector:
         Any or dict or None
             The requested value, dictionary of subkeys, or None if not found.
         """
-        if category not in cls.plot_data:
-            return None
-        if subkey:
-            return cls.plot_data[category].get(subkey)
-        return cls.plot_data[category]
+        record = _debug_record.get()
+        return None if record is None else record.getPlot(category, subkey)
 
     @classmethod
     def all(cls):
@@ -237,4 +321,34 @@ def _checkInput(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.a
     if len(raw_sp) != len(baseline_corrected_sp) or len(raw_sp) != len(sp_axis) or len(baseline_corrected_sp) != len(
             sp_axis):
         return False
+    return True
+
+def _checkBatchInput(raw_sp: np.array, baseline_corrected_sp: np.array, sp_axis: np.array):
+    """
+    Check if the input data of a batch is valid.
+
+    Parameters
+    ----------
+    raw_sp: np.array
+        The raw Raman spectra, with shape (N, L).
+
+    baseline_corrected_sp : np.array
+        The baseline-corrected spectra, with shape (N, L).
+
+    sp_axis : np.array
+        The spectral axis shared by all the spectra, with shape (L,).
+
+    Returns
+    -------
+    bool
+        True if the input data is valid, False otherwise.
+
+    """
+    raw_shape, corrected_shape, axis_shape = np.shape(raw_sp), np.shape(baseline_corrected_sp), np.shape(sp_axis)
+    if len(raw_shape) != 2 or len(axis_shape) != 1:
+        return False
+    if raw_shape != corrected_shape or raw_shape[1] != axis_shape[0]:
+        return False
+    if raw_shape[0] == 0 or raw_shape[1] == 0:
+        return False
     return True
\ No newline at end of file
@@ -1,3 +1,9 @@
-from .IS_Score_GUI import runGUI
-
 __all__ = ["runGUI"]
+
+
+def __getattr__(name):
+    # The GUI is imported on first access, so that the models can be used without PyQt5
+    if name == "runGUI":
+        from .IS_Score_GUI import runGUI
+        return runGUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,5 @@
+import os
+
 INTENSITY_PLT = "Intensity Penalized"
 PEAKS_DIPS_PLT = "Peaks and Dips Penalized"
 UNDERFITTING_PLT = "AUC Penalization"
@@ -10,4 +12,12 @@ PLACEHOLDERS = {
     "p": "p",
     "poly_order": "Poly Order",
     "min_bubble_widths": "Min Bubble Width"
-}
\ No newline at end of file
+}
+# Minimum time in seconds between two updates of the plots during the folder analysis
+FOLDER_PLOT_INTERVAL = 0.5
+
+# Optional on-disk tier of the cache of the baseline corrected spectra, shared by the single spectrum and the folder
+# analysis. It is enabled by setting the environment variable to the path of the sqlite file, otherwise the corrected
+# spectra are only cached in memory.
+BASELINE_CACHE_ENV = "IS_SCORE_BASELINE_CACHE"
+BASELINE_CACHE_PATH = os.environ.get(BASELINE_CACHE_ENV) or None
@@ -1,4 +1,3 @@
-import os
 import itertools
 
 import numpy as np
@@ -10,7 +9,8 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from IS_Score_GUI.config import *
 from IS_Score.utils import DebugCollector
 from IS_Score.IS_Score import getIS_Score
-from IS_Score_GUI.thread import PlotTask, WorkerThread
+from IS_Score_GUI.thread import PlotTask, FolderScoringThread
+from IS_Score_GUI.models.baseline_algorithms import NamedBaseline
 import matplotlib.collections as mcoll
 
 class Controller:
@@ -73,12 +73,9 @@ class Controller:
     def plotFolderData(self):
         spectra_sum = None
         n_files = 0
-        for root, dirs, files in os.walk(self.model.selectedFolder):
-            for f in files:
-                filepath = f"{self.model.selectedFolder}/{f}"
-                sp_axis, sp_data = self.model.loadSpectraFromFile(filepath)
-                spectra_sum = sp_data if spectra_sum is None else spectra_sum + sp_data
-            n_files = len(files)
+        for filepath, sp_axis, sp_data in self.model.iterFolderSpectra(self.model.selectedFolder):
+            spectra_sum = sp_data if spectra_sum is None else spectra_sum + sp_data
+            n_files += 1
         mean_spectra = spectra_sum / n_files
 
         self.model.meanSpectra = mean_spectra
@@ -89,12 +86,59 @@ class Controller:
             QMessageBox.critical(self.view, "Error", "No folder selected.")
             return
 
-        self.view.startLoadingDialog()
-        self.worker = WorkerThread(self.computeISScoreFolder)
+        baselineAlgs = self.getBaselineCorrectionAlgorithms()
+        if not baselineAlgs:
+            QMessageBox.critical(self.view, "Error", "No baseline algorithm selected.")
+            return
+
+        self.model.metricValDict = {key: [] for key in [el[1] for el in baselineAlgs]}
+        self.folderBaselineAlgs, self.folderFilenames, self.folderSpectraSum = baselineAlgs, [], None
+
+        # The baselines are applied in the worker processes, each with its own copy of the registry
+        baselines = {alg_name: NamedBaseline(alg_name, params) for params, alg_name in baselineAlgs}
+        folder = self.model.selectedFolder
+
+        self.view.startLoadingDialog(cancellable=True)
+        self.worker = FolderScoringThread(self.model.iterFolderSpectra(folder), self.model.countFolderSpectra(folder),
+                                          baselines, workers=None, interval=FOLDER_PLOT_INTERVAL,
+                                          baseline_cache=self.model.baselineCache)
+        self.worker.results.connect(self.addFolderResults)
         self.worker.progress.connect(self.view.loadingDlg.update_progress)
-        self.worker.finished_signal.connect(lambda: self.view.loadingDlg.close())
+        self.worker.finished_signal.connect(self.finishISScoreFolder)
+        self.view.loadingDlg.cancelled.connect(self.worker.cancel)
         self.worker.start()
 
+    def addFolderResults(self, batch):
+        for scored in batch:
+            self.folderFilenames.append(scored.filename)
+            if self.folderSpectraSum is None:
+                self.folderSpectraSum, self.folderAxis = scored.raw_sp, scored.sp_axis
+            else:
+                self.folderSpectraSum = self.folderSpectraSum + scored.raw_sp
+            for alg_name, is_score, error in scored.scores:
+                self.model.metricValDict[alg_name].append(is_score)
+
+        # The thread emits the results at most once per FOLDER_PLOT_INTERVAL, so the plots are redrawn at that rate
+        df_res = self.getFolderResults()
+        self.plotBoxplot(df_res)
+        self.updateOutliersTable(df_res)
+
+    def finishISScoreFolder(self, cancelled):
+        self.view.loadingDlg.accept()
+        if not self.folderFilenames:
+            return
+
+        mean_spectra = self.folderSpectraSum / len(self.folderFilenames)
+        self.plotMeanSpectra(self.folderAxis, mean_spectra, self.folderBaselineAlgs)
+        if cancelled:
+            QMessageBox.information(self.view, "Cancelled",
+                                    f"Scored {len(self.folderFilenames)} spectra before the analysis was cancelled.")
+
+    def getFolderResults(self):
+        df_res = pd.DataFrame(self.model.metricValDict).melt()
+        df_res['filename'] = self.folderFilenames * len(self.folderBaselineAlgs)
+        return df_res
+
     def updateParam(self, baselineName, paramWidget):
         args = self.model.getBaselineParams(baselineName)
         text = paramWidget.toPlainText()
@@ -222,56 +266,6 @@ class Controller:
                 algs.append(val)
         return algs
 
-    def computeISScoreFolder(self, progress_callback):
-        baselineAlgs = self.getBaselineCorrectionAlgorithms()
-
-        self.model.metricValDict = {key: [] for key in [el[1] for el in baselineAlgs]}
-        filenames = []
-
-        spectra_sum = None
-
-        for root, dirs, files in os.walk(self.model.selectedFolder):
-            cur_it, total_iteration = 0, len(files) * len(baselineAlgs)
-            for f in files:
-                filepath = f"{self.model.selectedFolder}/{f}"
-                filenames.append(filepath)
-
-                sp_axis, sp_data = self.model.loadSpectraFromFile(filepath)
-                sp = self.model.getSpectrum(sp_axis, sp_data)
-
-                spectra_sum = sp.spectral_data if spectra_sum is None else spectra_sum + sp.spectral_data
-
-                for params, alg_name in baselineAlgs:
-                    alg_func = self.model.baselineAlgorithms[alg_name.split("(")[0]]
-                    alg_func.setParams(params)
-
-                    sp_corrected = alg_func.apply(sp)
-                    #DebugCollector.activate()
-                    is_score_args = {}
-                    is_score = getIS_Score(raw_sp=sp_data,
-                                           baseline_corrected_sp=sp_corrected,
-                                           sp_axis=sp_axis, **is_score_args)
-
-                    #info = DebugCollector.all()
-                    #DebugCollector.deactivate()
-
-                    self.model.metricValDict[alg_name].append(is_score)
-                    cur_it += 1
-
-                    progress_percentage = int((cur_it / total_iteration) * 100)
-                    if progress_callback is not None:
-                        progress_callback(progress_percentage)
-
-        df_res = pd.DataFrame(self.model.metricValDict).melt()
-        df_res['filename'] = filenames * len(baselineAlgs)
-
-        mean_spectra = spectra_sum / len(filenames)
-
-        self.plotBoxplot(df_res)
-
-        self.plotMeanSpectra(sp_axis, mean_spectra, baselineAlgs)
-        self.updateOutliersTable(df_res)
-
     def checkOutlier(self, row):
         row_data = [self.view.outliersTable.item(row, col).text() for col in range(self.view.outliersTable.columnCount())]
         folder = self.view.currentFolderLabel.text().replace("Selected Folder: ", "")
@@ -304,7 +298,7 @@ class Controller:
             self.view.outliersTable.setColumnCount(3)
             for baseline_alg in df_res['variable'].unique():
                 df_alg = df_res[df_res['variable'] == baseline_alg]
-                Q1, Q3 = np.percentile(df_alg['value'], [25,75])
+                Q1, Q3 = np.nanpercentile(df_alg['value'], [25,75])
                 IQR = Q3 - Q1
                 lower_bound, upper_bound = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
                 outliers = df_alg[(df_alg['value'] < lower_bound) | (df_alg['value'] > upper_bound)]
@@ -350,14 +344,13 @@ class Controller:
             is_score_args['custom_dips'] = self.model.getCustomBandIndexList('dip')
 
 
-        DebugCollector.activate()
-
-        is_score = getIS_Score(raw_sp=self.model.spectral_data_raw,
-                               baseline_corrected_sp=self.model.baselineCorrected,
-                               sp_axis=self.model.spectral_axis, **is_score_args)
+        # The debug data of this call is kept apart from the scoring running in the background threads
+        with DebugCollector.scope() as debug:
+            is_score = getIS_Score(raw_sp=self.model.spectral_data_raw,
+                                   baseline_corrected_sp=self.model.baselineCorrected,
+                                   sp_axis=self.model.spectral_axis, **is_score_args)
 
-        info = DebugCollector.all()
-        DebugCollector.deactivate()
+        info = debug.all()
 
         self.model.spectral_data_norm = info['GENERAL']['sp_norm']
         self.model.baseline_norm = info['GENERAL']['baseline_norm']
@@ -1,3 +1,4 @@
+import ast
 import ramanspy as rp
 import ramanspy.preprocessing as rpr
 
@@ -16,6 +17,8 @@ class BaselineAlgorithm:
         self.name = name
         self.algorithm = algorithm
         self.params = params
+        # The parameters given when the algorithm was created, restored before setting new ones
+        self.defaults = dict(getattr(algorithm, "kwargs", None) or {})
 
     def getBaselineParams(self):
         return self.params
@@ -25,8 +28,16 @@ class BaselineAlgorithm:
             return None
         return [(el, PLACEHOLDERS[el]) for el in self.params]
 
+    def effectiveParams(self, params):
+        """
+        Return all the parameters the algorithm is applied with after setParams(params).
+        """
+        return {**self.defaults, **params}
+
     def setParams(self, params):
-        self.algorithm.kwargs.update(params)
+        # The parameters of a previous call must not leak into this one
+        self.algorithm.kwargs.clear()
+        self.algorithm.kwargs.update(self.effectiveParams(params))
 
     def apply(self, spectrum, axis=None):
         if axis is None:
@@ -36,7 +47,7 @@ class BaselineAlgorithm:
         return corr.spectral_data
 
     def getAlgorithm(self, params):
-        self.algorithm.kwargs.update(params)
+        self.setParams(params)
         return self.algorithm.apply
 
 
@@ -54,3 +65,63 @@ class BubbleFillAlgorithm(BaselineAlgorithm):
             raman, _ = self.algorithm(spectrum)
         return raman
 
+
+def getBaselineAlgorithms():
+    return {
+        "ASLS": BaselineAlgorithm("ASLS", rpr.baseline.ASLS(), params=["lam", "p"]),
+        "IASLS": BaselineAlgorithm("IASLS", rpr.baseline.IASLS(), params=["lam", "p"]),
+        "AIRPLS": BaselineAlgorithm("AIRPLS", rpr.baseline.AIRPLS(), params=["lam"]),
+        "DRPLS": BaselineAlgorithm("DRPLS", rpr.baseline.DRPLS(), params=["lam"]),
+        "ModPoly": BaselineAlgorithm("ModPoly", rpr.baseline.ModPoly(), params=["poly_order"]),
+        "IModPoly": BaselineAlgorithm("IModPoly", rpr.baseline.IModPoly(), params=["poly_order"]),
+        "Goldindec": BaselineAlgorithm("Goldindec", rpr.baseline.Goldindec()),
+        "IRSQR": BaselineAlgorithm("IRSQR", rpr.baseline.IRSQR()),
+        "BubbleFill": BubbleFillAlgorithm("BubbleFill", None, params=["min_bubble_widths"]),
+    }
+
+
+class NamedBaseline:
+    """
+    Picklable callable applying a baseline algorithm of the registry with fixed parameters.
+
+    The label has the same format used by the folder analysis, e.g. ``ASLS`` or ``ASLS(lam=100000.0,p=0.01)``.
+    If the parameters are given, only the name of the algorithm is read from the label. The registry is created on
+    the first call in each process.
+    """
+    _registry = None
+
+    def __init__(self, label, params=None):
+        self.label = label
+        if params is None:
+            self.name, self.params = parseBaselineLabel(label)
+        else:
+            self.name, self.params = label.partition("(")[0].strip(), dict(params)
+
+    def _algorithm(self):
+        if NamedBaseline._registry is None:
+            NamedBaseline._registry = getBaselineAlgorithms()
+        return NamedBaseline._registry[self.name]
+
+    @property
+    def cache_key(self):
+        """
+        The (algorithm, params) pair under which the corrections are stored in a BaselineCache, with all the
+        parameters the algorithm is applied with, as in the single spectrum analysis.
+        """
+        return self.name, self._algorithm().effectiveParams(self.params)
+
+    def __call__(self, raw_sp, sp_axis):
+        algorithm = self._algorithm()
+        algorithm.setParams(self.params)
+        return algorithm.apply(raw_sp, axis=sp_axis)
+
+
+def parseBaselineLabel(label):
+    name, _, param_string = label.partition("(")
+    params = {}
+    for item in param_string.rstrip(")").split(","):
+        if item.strip():
+            key, value = item.split("=", 1)
+            params[key.strip()] = ast.literal_eval(value.strip())
+    return name.strip(), params
+
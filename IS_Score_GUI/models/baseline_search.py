@@ -0,0 +1,325 @@
+import os
+import copy
+import itertools
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from IS_Score.IS_Score import analyzeSpectrum, scoreBaseline
+
+# Search range of each baseline parameter: (low, high, scale)
+SEARCH_SPACES = {
+    "lam": (1e1, 1e9, "log"),
+    "p": (1e-4, 1e-1, "log"),
+    "poly_order": (1, 12, "int"),
+    "min_bubble_widths": (2, 200, "int"),
+}
+
+
+class SearchResult(NamedTuple):
+    """
+    Best parameters found for a spectrum.
+
+    Attributes
+    ----------
+    params : dict
+        The parameters with the highest IS-Score.
+    is_score : float
+        The IS-Score of the best parameters.
+    evaluations : int
+        The number of baselines computed and scored.
+    history : list
+        The (params, is_score) pairs of all the evaluated candidates.
+    """
+    params: dict
+    is_score: float
+    evaluations: int
+    history: list
+
+
+class FolderSearchResult(NamedTuple):
+    """
+    Best parameters found for a set of spectra.
+
+    Attributes
+    ----------
+    params : dict
+        The parameters with the highest mean IS-Score over all the spectra.
+    mean_score : float
+        The mean IS-Score of the best parameters.
+    evaluations : int
+        The number of baselines computed and scored.
+    per_spectrum : list
+        For each spectrum, the (params, is_score) of the best candidate among all the ones evaluated on it. The
+        spectra of the first rung are scored with every candidate of the grid, the others only with the candidates
+        which survived the earlier rungs.
+    """
+    params: dict
+    mean_score: float
+    evaluations: int
+    per_spectrum: list
+
+
+def _toSearch(value, scale):
+    return np.log10(value) if scale == "log" else float(value)
+
+
+def _fromSearch(value, scale):
+    if scale == "log":
+        return float(10 ** value)
+    if scale == "int":
+        return int(round(value))
+    return float(value)
+
+
+def _gridValues(low, high, scale, points):
+    """
+    Return the values of a parameter sampled uniformly in the search space between low and high (search units).
+    """
+    values = [_fromSearch(v, scale) for v in np.linspace(low, high, points)]
+    # Integer parameters may collapse to the same value on narrow ranges
+    return list(dict.fromkeys(values))
+
+
+def _candidateGrid(space, bounds, points):
+    """
+    Return the Cartesian product of the parameter grids inside the current bounds.
+    """
+    names = list(space)
+    grids = [_gridValues(*bounds[name], space[name][2], points) for name in names]
+    return [dict(zip(names, values)) for values in itertools.product(*grids)]
+
+
+def _paramsKey(params):
+    return tuple(sorted(params.items()))
+
+
+def _scoreCandidates(algorithm, analysis, candidates):
+    """
+    Apply the baseline algorithm with each candidate and score it against the analysis of the raw spectrum.
+
+    A candidate for which the baseline algorithm or the scoring fails gets an IS-Score of -1.
+    """
+    scores = []
+    for params in candidates:
+        try:
+            algorithm.setParams(params)
+            corrected = algorithm.apply(np.array(analysis.raw_sp), axis=np.array(analysis.sp_axis))
+            scores.append(float(scoreBaseline(analysis, corrected, verbose=False)))
+        except Exception:
+            scores.append(-1.0)
+    return scores
+
+
+# The baseline algorithm and the analyses of the spectra in a worker process, sent once by _initWorker
+_worker_state = {}
+
+
+def _initWorker(algorithm, analyses):
+    _worker_state["algorithm"], _worker_state["analyses"] = algorithm, analyses
+
+
+def _scoreChunk(index, candidates):
+    return _scoreCandidates(_worker_state["algorithm"], _worker_state["analyses"][index], candidates)
+
+
+class _CandidateRunner:
+    """
+    Score chunks of candidates against the analyses of the spectra, inline or over a pool of processes.
+
+    The algorithm and the analyses are sent to each worker once, when the pool starts: the chunks only carry the
+    index of the analysis and the candidates.
+    """
+
+    def __init__(self, algorithm, analyses, workers, chunksize):
+        self.algorithm = copy.deepcopy(algorithm)
+        self.analyses = list(analyses)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_initWorker,
+                                                initargs=(self.algorithm, self.analyses))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def run(self, tasks):
+        """
+        Score a list of (analysis index, candidates) tasks, returning the list of scores of each task.
+        """
+        chunks = []
+        for i, (index, candidates) in enumerate(tasks):
+            for start in range(0, len(candidates), self.chunksize):
+                chunks.append((i, index, candidates[start:start + self.chunksize]))
+
+        if self.executor is None:
+            results = [_scoreCandidates(self.algorithm, self.analyses[index], chunk) for _, index, chunk in chunks]
+        else:
+            futures = [self.executor.submit(_scoreChunk, index, chunk) for _, index, chunk in chunks]
+            results = [future.result() for future in futures]
+
+        scores = [[] for _ in tasks]
+        for (i, _, _), chunk_scores in zip(chunks, results):
+            scores[i].extend(chunk_scores)
+        return scores
+
+
+def _getSpace(algorithm, space):
+    if space is not None:
+        return dict(space)
+    return {name: SEARCH_SPACES[name] for name in (algorithm.getBaselineParams() or [])}
+
+
+def searchSpectrum(algorithm, raw_sp: np.array, sp_axis: np.array, space: dict = None, points: int = 5,
+                   rounds: int = 3, workers: int = 1, chunksize: int = 4, **kwargs) -> SearchResult:
+    """
+    Search the parameters of a baseline algorithm which maximize the IS-Score of a spectrum.
+
+    The search is coarse-to-fine: each round evaluates a grid of ``points`` values per parameter, then narrows the
+    range of each parameter around the best candidate to one grid step on each side. The raw spectrum is analyzed
+    once and the analysis is shared by all the candidates.
+
+    Parameters
+    ----------
+    algorithm : BaselineAlgorithm
+        The baseline algorithm, as defined in IS_Score_GUI.models.baseline_algorithms.
+    raw_sp : np.array
+        The Raman spectrum.
+    sp_axis : np.array
+        The spectral axis.
+    space : dict, optional
+        The search range of each parameter as (low, high, scale), with scale "log", "int" or "linear". Default is
+        the range in ``SEARCH_SPACES`` of each parameter of the algorithm.
+    points : int, optional
+        The number of values of each parameter evaluated in a round.
+    rounds : int, optional
+        The number of refinement rounds.
+    workers : int, optional
+        The number of processes used to evaluate the candidates. With 1 (default) they are evaluated in the calling
+        process, with None one process per CPU is used.
+    chunksize : int, optional
+        The number of candidates sent to a process at once.
+    **kwargs
+        Optional parameters forwarded to analyzeSpectrum.
+
+    Returns
+    -------
+    result : SearchResult
+        The best parameters and the evaluated candidates.
+    """
+    space = _getSpace(algorithm, space)
+    analysis = analyzeSpectrum(raw_sp, sp_axis, **kwargs)
+    bounds = {name: (_toSearch(low, scale), _toSearch(high, scale)) for name, (low, high, scale) in space.items()}
+
+    history = {}
+    with _CandidateRunner(algorithm, [analysis], workers, chunksize) as runner:
+        for _ in range(max(1, rounds)):
+            candidates = [c for c in _candidateGrid(space, bounds, points) if _paramsKey(c) not in history]
+            if not candidates:
+                break
+
+            scores = runner.run([(0, candidates)])[0]
+            history.update((_paramsKey(c), (c, s)) for c, s in zip(candidates, scores))
+
+            best_params, _ = max(history.values(), key=lambda el: el[1])
+            new_bounds = {}
+            for name, (low, high) in bounds.items():
+                step = (high - low) / max(1, points - 1)
+                center = _toSearch(best_params[name], space[name][2])
+                full_low, full_high = (_toSearch(v, space[name][2]) for v in space[name][:2])
+                new_bounds[name] = (max(full_low, center - step), min(full_high, center + step))
+            bounds = new_bounds
+
+    best_params, best_score = max(history.values(), key=lambda el: el[1])
+    return SearchResult(best_params, best_score, len(history), list(history.values()))
+
+
+def searchFolder(algorithm, spectra, space: dict = None, points: int = 5, eta: int = 3, min_spectra: int = 1,
+                 workers: int = None, chunksize: int = 4, **kwargs) -> FolderSearchResult:
+    """
+    Search the parameters of a baseline algorithm which maximize the mean IS-Score of a set of spectra.
+
+    The search uses successive halving: all the candidates of the grid are scored on a small subset of the spectra,
+    then only the best ``1/eta`` of them are kept and scored on ``eta`` times more spectra, until all the spectra
+    are used. Each spectrum is analyzed once and its analysis is shared by all the candidates.
+
+    Parameters
+    ----------
+    algorithm : BaselineAlgorithm
+        The baseline algorithm, as defined in IS_Score_GUI.models.baseline_algorithms.
+    spectra : iterable
+        Iterable of (raw_sp, sp_axis) tuples.
+    space : dict, optional
+        The search range of each parameter as (low, high, scale). Default is the range in ``SEARCH_SPACES`` of each
+        parameter of the algorithm.
+    points : int, optional
+        The number of values of each parameter in the initial grid.
+    eta : int, optional
+        The reduction factor of the candidates at each rung.
+    min_spectra : int, optional
+        The number of spectra used in the first rung.
+    workers : int, optional
+        The number of processes used to evaluate the candidates. Default is the number of CPUs.
+    chunksize : int, optional
+        The number of candidates sent to a process at once.
+    **kwargs
+        Optional parameters forwarded to analyzeSpectrum.
+
+    Returns
+    -------
+    result : FolderSearchResult
+        The best parameters for the whole set and for each spectrum.
+    """
+    space = _getSpace(algorithm, space)
+    analyses = [analyzeSpectrum(raw_sp, sp_axis, **dict(kwargs)) for raw_sp, sp_axis in spectra]
+    if not analyses:
+        raise ValueError("No spectra to search.")
+
+    bounds = {name: (_toSearch(low, scale), _toSearch(high, scale)) for name, (low, high, scale) in space.items()}
+    candidates = _candidateGrid(space, bounds, points)
+    eta = max(2, eta)
+
+    # scores[i][j] is the IS-Score of the candidate i on the spectrum j
+    scores = [dict() for _ in candidates]
+    alive, n_spectra, evaluations = list(range(len(candidates))), max(1, min_spectra), 0
+    with _CandidateRunner(algorithm, analyses, workers, chunksize) as runner:
+        while True:
+            n_spectra = min(n_spectra, len(analyses))
+            tasks, task_spectra = [], []
+            for j in range(n_spectra):
+                missing = [i for i in alive if j not in scores[i]]
+                if missing:
+                    tasks.append((j, [candidates[i] for i in missing]))
+                    task_spectra.append((j, missing))
+
+            for (j, missing), task_scores in zip(task_spectra, runner.run(tasks)):
+                for i, s in zip(missing, task_scores):
+                    scores[i][j] = s
+                evaluations += len(missing)
+
+            if n_spectra == len(analyses):
+                break
+
+            alive.sort(key=lambda i: np.mean([scores[i][j] for j in range(n_spectra)]), reverse=True)
+            alive = alive[:max(1, len(alive) // eta)]
+            # The last candidate is scored on all the spectra
+            n_spectra = len(analyses) if len(alive) == 1 else n_spectra * eta
+
+    def meanScore(i):
+        return float(np.mean([scores[i][j] for j in range(n_spectra)]))
+
+    best = max(alive, key=meanScore)
+
+    # The best of all the candidates evaluated on each spectrum, also the ones dropped at an earlier rung
+    per_spectrum = []
+    for j in range(n_spectra):
+        i = max((i for i in range(len(candidates)) if j in scores[i]), key=lambda el: scores[el][j])
+        per_spectrum.append((candidates[i], scores[i][j]))
+
+    return FolderSearchResult(candidates[best], meanScore(best), evaluations, per_spectrum)
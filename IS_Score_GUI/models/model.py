@@ -1,10 +1,11 @@
 import numpy as np
-import pandas as pd
 import ramanspy as rp
-import ramanspy.preprocessing as rpr
 from IS_Score_GUI.models.folder_models import FolderTreeModel
-from IS_Score_GUI.models.baseline_algorithms import BaselineAlgorithm, BubbleFillAlgorithm
+from IS_Score_GUI.models.baseline_algorithms import getBaselineAlgorithms
 from IS_Score_GUI.models.custom_band import CustomBand
+from IS_Score.loader import loadSpectrumFile, listSpectraFiles, isPackedDataset, openPackedDataset
+from IS_Score.cache import BaselineCache
+from IS_Score_GUI.config import BASELINE_CACHE_PATH
 
 class Model:
     def __init__(self):
@@ -23,17 +24,10 @@ class Model:
         self.baseline_norm = None
 
 
-        self.baselineAlgorithms = {
-            "ASLS": BaselineAlgorithm("ASLS", rpr.baseline.ASLS(), params=["lam", "p"]),
-            "IASLS": BaselineAlgorithm("IASLS", rpr.baseline.IASLS(), params=["lam", "p"]),
-            "AIRPLS": BaselineAlgorithm("AIRPLS", rpr.baseline.AIRPLS(), params=["lam"]),
-            "DRPLS": BaselineAlgorithm("DRPLS", rpr.baseline.DRPLS(), params=["lam"]),
-            "ModPoly": BaselineAlgorithm("ModPoly", rpr.baseline.ModPoly(), params=["poly_order"]),
-            "IModPoly": BaselineAlgorithm("IModPoly", rpr.baseline.IModPoly(), params=["poly_order"]),
-            "Goldindec": BaselineAlgorithm("Goldindec", rpr.baseline.Goldindec()),
-            "IRSQR": BaselineAlgorithm("IRSQR", rpr.baseline.IRSQR()),
-            "BubbleFill": BubbleFillAlgorithm("BubbleFill", None, params=["min_bubble_widths"]),
-        }
+        self.baselineAlgorithms = getBaselineAlgorithms()
+        # The corrected spectra are cached in memory, and on disk if BASELINE_CACHE_PATH is set, so that the same
+        # baseline is never computed twice
+        self.baselineCache = BaselineCache(path=BASELINE_CACHE_PATH)
 
         self.customPeaks = None
         self.customDips = None
@@ -116,10 +110,15 @@ class Model:
         return [el.bandIndex for el in self.customPeaks] if band_type == "peak" else [el.bandIndex for el in self.customDips]
 
     def computeBaseline(self, **args):
-        sp = rp.Spectrum(spectral_axis=self.spectral_axis, spectral_data=self.spectral_data_raw)
+        algorithm = self.baselineAlgorithms[self.currentBaseline]
 
-        self.baselineAlgorithms[self.currentBaseline].setParams(args)
-        self.baselineCorrected = self.baselineAlgorithms[self.currentBaseline].apply(sp)
+        def correct(spectral_data, spectral_axis):
+            algorithm.setParams(args)
+            return algorithm.apply(rp.Spectrum(spectral_axis=spectral_axis, spectral_data=spectral_data))
+
+        # Keyed by all the parameters of the algorithm, as the corrections of the folder analysis
+        self.baselineCorrected = self.baselineCache.apply(correct, self.spectral_data_raw, self.spectral_axis,
+                                                          self.currentBaseline, algorithm.effectiveParams(args))
         self.baseline = self.spectral_data_raw - self.baselineCorrected
 
 
@@ -137,17 +136,26 @@ class Model:
         self.spectral_data_norm_alone = (self.spectral_data_raw - min_val) / (max_val - min_val)
 
     def loadSpectraFromFile(self, file_path):
-        spectral_axis, spectral_data = None, None
-        if file_path.endswith(".txt"):
-            tmp = np.loadtxt(file_path)
-            # The first column correspond to the spectral axis
-            tmp = pd.Series(tmp[:, 1], index=tmp[:, 0]).sort_index()
-            spectral_axis, spectral_data = tmp.index.values, tmp.values
-        elif file_path.endswith(".csv"):
-            df = pd.read_csv(file_path, header=None)
-            spectral_axis, spectral_data = df[0].values, df[1].values
-
-        return spectral_axis, spectral_data
+        # The .txt files are sorted by the spectral axis, the .csv files are kept in the order of the file
+        return loadSpectrumFile(file_path, sort=file_path.endswith(".txt"))
+
+    def countFolderSpectra(self, folder):
+        if isPackedDataset(folder):
+            return len(openPackedDataset(folder).names)
+        return len(listSpectraFiles(folder))
+
+    def iterFolderSpectra(self, folder):
+        # A packed dataset is read row by row from the memory map, with the spectral axis shared by all the rows
+        if isPackedDataset(folder):
+            dataset = openPackedDataset(folder)
+            for name, sp_data in zip(dataset.names, dataset.spectra):
+                yield f"{folder}/{name}", dataset.sp_axis, np.array(sp_data, dtype=np.float64)
+            return
+
+        for f in listSpectraFiles(folder):
+            filepath = f"{folder}/{f}"
+            sp_axis, sp_data = self.loadSpectraFromFile(filepath)
+            yield filepath, sp_axis, sp_data
 
     def getSpectrum(self, sp_axis, sp_data):
         return rp.Spectrum(spectral_axis=sp_axis, spectral_data=sp_data)
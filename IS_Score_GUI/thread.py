@@ -1,19 +1,61 @@
+import time
+
 from PyQt5.QtCore import QThread, pyqtSignal, QRunnable
+from IS_Score.pipeline import scoreSpectra
+
+class FolderScoringThread(QThread):
+    """
+    Score the spectra of a folder over a pool of processes, streaming the results back to the GUI thread.
 
-class WorkerThread(QThread):
+    The results are emitted in batches, at most one every ``interval`` seconds, so that the plots are not redrawn
+    for every spectrum. The run can be stopped with cancel: the spectra not yet started are dropped and the thread
+    ends as soon as the next spectrum is scored.
+    """
+    results = pyqtSignal(list)
     progress = pyqtSignal(int)
-    finished_signal = pyqtSignal()
+    finished_signal = pyqtSignal(bool)
 
-    def __init__(self, algorithm_function):
+    def __init__(self, spectra, n_spectra, baselines, workers=None, chunksize=1, interval=0.5, baseline_cache=None):
         super().__init__()
-        self.algorithm_function = algorithm_function
+        self.spectra = spectra
+        self.n_spectra = max(1, n_spectra)
+        self.baselines = baselines
+        self.baseline_cache = baseline_cache
+        self.workers = workers
+        self.chunksize = chunksize
+        self.interval = interval
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def source(self):
+        names = list(self.baselines)
+        for filepath, sp_axis, sp_data in self.spectra:
+            if self.isInterruptionRequested():
+                return
+            yield filepath, sp_axis, sp_data, None, names
 
     def run(self):
-        self.algorithm_function(self.report_progress)
-        self.finished_signal.emit()
+        batch, last_emit, n_done = [], time.monotonic(), 0
+        stream = scoreSpectra(self.source(), self.baselines, workers=self.workers, chunksize=self.chunksize,
+                              baseline_cache=self.baseline_cache)
+        try:
+            for scored in stream:
+                if self.isInterruptionRequested():
+                    break
+                batch.append(scored)
+                n_done += 1
+                if time.monotonic() - last_emit >= self.interval:
+                    self.results.emit(batch)
+                    self.progress.emit(int(n_done / self.n_spectra * 100))
+                    batch, last_emit = [], time.monotonic()
+        finally:
+            stream.close()
 
-    def report_progress(self, value):
-        self.progress.emit(value)
+        if batch:
+            self.results.emit(batch)
+            self.progress.emit(int(n_done / self.n_spectra * 100))
+        self.finished_signal.emit(self.isInterruptionRequested())
 
 class PlotTask(QRunnable):
     def __init__(self, plot_function, *args):
@@ -22,4 +64,4 @@ class PlotTask(QRunnable):
         self.args = args
 
     def run(self):
-        self.plot_function(*self.args)
\ No newline at end of file
+        self.plot_function(*self.args)
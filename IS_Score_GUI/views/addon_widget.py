@@ -6,7 +6,7 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 from PyQt5.QtCore import pyqtSignal
-from PyQt5.QtWidgets import QWidget, QLineEdit, QVBoxLayout, QLabel, QDialog, QProgressBar
+from PyQt5.QtWidgets import QWidget, QLineEdit, QVBoxLayout, QLabel, QDialog, QProgressBar, QPushButton
 
 
 class EmitQLineEdit(QLineEdit):
@@ -102,10 +102,12 @@ class PieChartWidget(QWidget):
 
 
 class LoadingDialog(QDialog):
-    def __init__(self, parent=None):
+    cancelled = pyqtSignal()
+
+    def __init__(self, parent=None, cancellable=False):
         super().__init__(parent)
         self.setWindowTitle("Processing...")
-        self.setFixedSize(300, 100)
+        self.setFixedSize(300, 130 if cancellable else 100)
 
         # Layout and widgets
         layout = QVBoxLayout(self)
@@ -116,6 +118,24 @@ class LoadingDialog(QDialog):
         layout.addWidget(self.label)
         layout.addWidget(self.progress_bar)
 
+        if cancellable:
+            self.cancel_button = QPushButton("Cancel")
+            self.cancel_button.clicked.connect(self.cancel)
+            layout.addWidget(self.cancel_button)
+
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def cancel(self):
+        self.cancel_button.setEnabled(False)
+        self.label.setText("Cancelling...")
+        self.cancelled.emit()
+
+    def reject(self):
+        # Closing the dialog with Esc or the close button cancels the process as well
+        if hasattr(self, "cancel_button"):
+            if self.cancel_button.isEnabled():
+                self.cancel()
+            return
+        super().reject()
+
@@ -12,6 +12,7 @@ from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QGridLayout, QListWidgetIt
 
 from PyQt5.QtWidgets import QTabWidget, QTreeView, QComboBox, QPushButton, QTableWidget
 from IS_Score_GUI.config import *
+from IS_Score.renderer import verticalLines, prominenceLines, fittingLines
 
 class IS_Score_GUI(QMainWindow):
     def __init__(self):
@@ -210,8 +211,8 @@ class IS_Score_GUI(QMainWindow):
         return widget
 
     #region: Folder Tab
-    def startLoadingDialog(self):
-        self.loadingDlg = LoadingDialog(parent=self)
+    def startLoadingDialog(self, cancellable=False):
+        self.loadingDlg = LoadingDialog(parent=self, cancellable=cancellable)
         self.loadingDlg.show()
 
     def showBoxplot(self, result_df):
@@ -402,28 +403,16 @@ class IS_Score_GUI(QMainWindow):
         ax.plot(spectral_axis, baseline_norm, color='tab:orange')
         ax.scatter(spectral_axis[dips], spectral_data_norm[dips], color='blue', s=100, marker='x')
 
-        for (s, e), fp_band in zip(dips_edges, freq_prom):
+        for s, e in dips_edges:
             ax.plot(spectral_axis[s:e], spectral_data_norm[s:e], color='m')
-            for i, fp in enumerate(fp_band):
-                ax.vlines(spectral_axis[s:e][i], ymin=spectral_data_norm[s:e][i] - fp, ymax=spectral_data_norm[s:e][i],
-                          color="lightblue", alpha=0.4)
-
-        for i, (left_edge, right_edge) in enumerate(dips_edges):
-            indexes_i = indexes[i]
-            overfitting_i, underfitting_i = overfitting[i], underfitting[i]
-
-            if len(overfitting_i) > 0:
-                ax.vlines(x=spectral_axis[left_edge:right_edge][indexes_i],
-                          ymin=baseline_norm[left_edge:right_edge][indexes_i],
-                          ymax=baseline_norm[left_edge:right_edge][indexes_i] + overfitting_i, color='red',
-                          alpha=0.4)
-
-            if len(underfitting_i) > 0:
-                ax.vlines(x=spectral_axis[left_edge:right_edge][indexes_i],
-                          ymin=baseline_norm[left_edge:right_edge][indexes_i],
-                          ymax=baseline_norm[left_edge:right_edge][indexes_i] - underfitting_i,
-                          color='tab:orange',
-                          alpha=0.4)
+
+        # One LineCollection for each kind of line instead of a vlines call per Raman shift
+        verticalLines(ax, *prominenceLines(spectral_axis, spectral_data_norm, dips_edges, freq_prom),
+                      color="lightblue", alpha=0.4)
+        verticalLines(ax, *fittingLines(spectral_axis, baseline_norm, dips_edges, indexes, overfitting, 1),
+                      color='red', alpha=0.4)
+        verticalLines(ax, *fittingLines(spectral_axis, baseline_norm, dips_edges, indexes, underfitting, -1),
+                      color='tab:orange', alpha=0.4)
         ax.set_xlabel("Raman shift (cm-1)")
         ax.set_ylabel("Normalized Intensity")
         ax.grid(alpha=0.4)
@@ -448,28 +437,16 @@ class IS_Score_GUI(QMainWindow):
         ax.plot(spectral_axis, baseline_norm, color='tab:orange')
         ax.scatter(spectral_axis[peaks], spectral_data_norm[peaks], color='green', s=100, marker='x')
 
-        for (s, e), fp_band in zip(peak_edges, freq_prom):
+        for s, e in peak_edges:
             ax.plot(spectral_axis[s:e], spectral_data_norm[s:e], color='m')
-            for i, fp in enumerate(fp_band):
-                ax.vlines(spectral_axis[s:e][i], ymin=spectral_data_norm[s:e][i] - fp, ymax=spectral_data_norm[s:e][i],
-                          color="lightblue", alpha=0.4)
-
-        for i, (left_edge, right_edge) in enumerate(peak_edges):
-            overfitting_index_i, overfitting_i = overfitting_index[i], overfitting[i]
-            underfitting_index_i, underfitting_i = underfitting_index[i], underfitting[i]
-
-            if len(overfitting_i) > 0:
-                ax.vlines(x=spectral_axis[left_edge:right_edge][overfitting_index_i],
-                          ymin=baseline_norm[left_edge:right_edge][overfitting_index_i],
-                          ymax=baseline_norm[left_edge:right_edge][overfitting_index_i] - overfitting_i, color='red',
-                          alpha=0.4)
-
-            if len(underfitting_i) > 0:
-                ax.vlines(x=spectral_axis[left_edge:right_edge][underfitting_index_i],
-                          ymin=baseline_norm[left_edge:right_edge][underfitting_index_i],
-                          ymax=baseline_norm[left_edge:right_edge][underfitting_index_i] + underfitting_i,
-                          color='tab:orange',
-                          alpha=0.4)
+
+        # One LineCollection for each kind of line instead of a vlines call per Raman shift
+        verticalLines(ax, *prominenceLines(spectral_axis, spectral_data_norm, peak_edges, freq_prom),
+                      color="lightblue", alpha=0.4)
+        verticalLines(ax, *fittingLines(spectral_axis, baseline_norm, peak_edges, overfitting_index, overfitting, -1),
+                      color='red', alpha=0.4)
+        verticalLines(ax, *fittingLines(spectral_axis, baseline_norm, peak_edges, underfitting_index, underfitting, 1),
+                      color='tab:orange', alpha=0.4)
         ax.set_xlabel("Raman shift (cm-1)")
         ax.set_ylabel("Normalized Intensity")
         ax.grid(alpha=0.4)
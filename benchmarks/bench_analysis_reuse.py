@@ -0,0 +1,58 @@
+"""
+Benchmark of the two-phase API (analyzeSpectrum + scoreBaseline) on a sweep of baselines of the same spectrum.
+
+The script checks that scoring each baseline against a shared analysis returns the same components of getIS_Score,
+then compares the time of the whole sweep with the two approaches.
+
+Run from the repository root with ``python -m benchmarks.bench_analysis_reuse``.
+"""
+import time
+import numpy as np
+from IS_Score.IS_Score import getIS_Score, analyzeSpectrum, scoreBaseline
+
+N_BASELINES = 24
+
+
+def makeBaselines(raw_sp, sp_axis, n_baselines):
+    """
+    Polynomial baselines of increasing degree and decreasing offset, mimicking a parameter sweep.
+    """
+    x = (sp_axis - sp_axis.min()) / (sp_axis.max() - sp_axis.min())
+    corrected = []
+    for i in range(n_baselines):
+        degree = 1 + i % 6
+        coefs = np.polyfit(x, raw_sp, degree)
+        baseline = np.polyval(coefs, x) * (0.8 + 0.2 * (i // 6) / max(1, (n_baselines - 1) // 6))
+        corrected.append(raw_sp - baseline)
+    return corrected
+
+
+def sweepFull(raw_sp, corrected, sp_axis):
+    return [getIS_Score(raw_sp, c, sp_axis, verbose=False, return_components=True) for c in corrected]
+
+
+def sweepReuse(raw_sp, corrected, sp_axis):
+    analysis = analyzeSpectrum(raw_sp, sp_axis)
+    return [scoreBaseline(analysis, c, verbose=False, return_components=True) for c in corrected]
+
+
+def timeSweep(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    raw_sp, sp_axis = sp[:, 1], sp[:, 0]
+    corrected = makeBaselines(raw_sp, sp_axis, N_BASELINES)
+
+    full, reuse = sweepFull(raw_sp, corrected, sp_axis), sweepReuse(raw_sp, corrected, sp_axis)
+    assert full == reuse, "The shared analysis changed the IS-Score components"
+    print(f"Components identical on {N_BASELINES} baselines")
+
+    full_time = min(timeSweep(sweepFull, raw_sp, corrected, sp_axis) for _ in range(3))
+    reuse_time = min(timeSweep(sweepReuse, raw_sp, corrected, sp_axis) for _ in range(3))
+    print(f"getIS_Score per baseline:           {full_time * 1000:.1f} ms")
+    print(f"analyzeSpectrum + scoreBaseline:    {reuse_time * 1000:.1f} ms")
+    print(f"Speed-up: {full_time / reuse_time:.2f}x")
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark of the region penalties (band_region.py) against the previous per-sample implementation.
+
+The previous implementation is reproduced below as reference. The script checks that both return the same penalties
+on the bundled example spectrum and on a synthetic spectrum with many wide bands, then compares their timing.
+
+Run from the repository root with ``python -m benchmarks.bench_band_region``.
+"""
+import sys
+import time
+import numpy as np
+from IS_Score.utils import normalizeSpectraBaseline, normalizeProminence
+from IS_Score.band_edges_detection.band_detection import findBands, getBandEdges, _validateBands, getWlenProminences
+from IS_Score.bands_penalization.band_region import getRegionPeakPenalty, getRegionDipPenalty
+
+N_REPEAT = 20
+
+
+def _legacyRamanShiftProminences(type, sp, baseline, bands, edges, prominences):
+    raman_shift_prominences = []
+    for band, prom, (left_edge, right_edge) in zip(bands, prominences, edges):
+        region_diff = np.abs(sp[left_edge:right_edge] - baseline[left_edge:right_edge])
+        if type == "peak":
+            band_prominence = prom[0][0]
+            band_diff = sp[band] - baseline[band]
+        else:
+            band_prominence = np.abs(prom[0][0] / 2)
+            band_diff = np.abs(sp[band] - baseline[band])
+        band_region_fake_prom = []
+        for i, diff in enumerate(region_diff):
+            prominence_freq = (diff * band_prominence) / band_diff
+            if (type == "dip") and (sp[left_edge:right_edge][i] - prominence_freq < 0):
+                prominence_freq = sp[left_edge:right_edge][i]
+            band_region_fake_prom.append(prominence_freq)
+        raman_shift_prominences.append(band_region_fake_prom)
+    return raman_shift_prominences
+
+
+def _legacyRegionPeakPenalty(sp, baseline, peaks, edges, prominences):
+    underfitting_penalties, overfitting_penalties = [], []
+    raman_shift_prominences = _legacyRamanShiftProminences("peak", sp, baseline, peaks, edges, prominences)
+    for peak, prom, (left_edge, right_edge), fp_band in zip(peaks, prominences, edges, raman_shift_prominences):
+        over, under = [], []
+        for i, fp in enumerate(fp_band):
+            baseline_intensity = baseline[left_edge:right_edge][i]
+            spectra_intensity = sp[left_edge:right_edge][i]
+            if (spectra_intensity - fp) < baseline_intensity:
+                over.append(np.abs((spectra_intensity - fp) - baseline_intensity))
+            if (spectra_intensity - fp) > baseline_intensity:
+                under.append(np.abs((spectra_intensity - fp) - baseline_intensity))
+        perc_over = np.percentile(over, 75) if len(over) > 0 else 0
+        perc_under = np.percentile(under, 75) if len(under) > 0 else 0
+        tmp, tmp2 = np.array(over), np.array(under)
+        overfitting_penalties.append(np.round(np.mean(tmp[tmp < perc_over]), decimals=3) if len(tmp[tmp < perc_over]) > 0 else 0)
+        underfitting_penalties.append(np.round(np.mean(tmp2[tmp2 < perc_under]), 4) if len(tmp2[tmp2 < perc_under]) > 0 else 0)
+    return np.sum(overfitting_penalties) + np.sum(underfitting_penalties)
+
+
+def _legacyRegionDipPenalty(sp, baseline, dips, edges, prominences):
+    lower_penalties, greater_penalties = [], []
+    raman_shift_prominences = _legacyRamanShiftProminences("dip", sp, baseline, dips, edges, prominences)
+    for dip, prom, (left_edge, right_edge), fp_band in zip(dips, prominences, edges, raman_shift_prominences):
+        lower, greater = [], []
+        for i, fp in enumerate(fp_band):
+            baseline_intensity = baseline[left_edge:right_edge][i]
+            spectra_intensity = sp[left_edge:right_edge][i]
+            lower.append(np.abs((spectra_intensity - fp) - baseline_intensity) if (spectra_intensity - fp) > baseline_intensity else 0)
+            greater.append(np.abs((spectra_intensity + fp) - baseline_intensity) if (spectra_intensity + fp) < baseline_intensity else 0)
+        lower_penalties.append(np.mean(lower))
+        greater_penalties.append(np.mean(greater))
+    return np.sum(lower_penalties) + np.sum(greater_penalties)
+
+
+def _syntheticSpectrum(n_samples=4000, n_bands=60, seed=0):
+    rng = np.random.RandomState(seed)
+    x = np.arange(n_samples)
+    centers = np.linspace(40, n_samples - 40, n_bands) + rng.uniform(-5, 5, n_bands)
+    widths, heights = rng.uniform(4, 12, n_bands), rng.uniform(0.2, 1.0, n_bands)
+    bands = sum(h * w ** 2 / ((x - c) ** 2 + w ** 2) for c, w, h in zip(centers, widths, heights))
+    background = 1 + 0.5 * (x / n_samples) ** 2
+    raw_sp = bands + background + rng.normal(0, 0.005, n_samples)
+    return raw_sp, raw_sp - background * 0.98
+
+
+def prepareRegions(raw_sp, corrected_sp):
+    baseline = raw_sp - corrected_sp
+    raw_sp_norm = (raw_sp - np.min(raw_sp)) / (np.max(raw_sp) - np.min(raw_sp))
+    neg_sp = (-raw_sp_norm - min(-raw_sp_norm)) / (max(-raw_sp_norm) - min(-raw_sp_norm))
+    sp_norm, baseline_norm = normalizeSpectraBaseline(raw_sp, baseline)
+    combined_min, combined_max = min(sp_norm.min(), baseline_norm.min()), max(sp_norm.max(), baseline_norm.max())
+
+    regions = {}
+    for name, sp in (("peak", raw_sp_norm), ("dip", neg_sp)):
+        bands = findBands(sp, tolerance=5)
+        bands, edges = _validateBands(bands, getBandEdges(sp, bands))
+        prominences = normalizeProminence(getWlenProminences(sp, bands, edges), combined_max, combined_min)
+        regions[name] = (sp_norm, baseline_norm, bands, edges, prominences)
+    return regions
+
+
+def bestTime(function, *args):
+    times = []
+    for _ in range(N_REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    sp_corr = np.loadtxt("bin/example/spectrum_corrected.txt")
+    datasets = {"example spectrum": (sp[:, 1], sp_corr[:, 1]), "synthetic, 60 bands": _syntheticSpectrum()}
+
+    failures = 0
+    for name, (raw_sp, corrected_sp) in datasets.items():
+        regions = prepareRegions(raw_sp, corrected_sp)
+        for kind, new, legacy in (("peak", getRegionPeakPenalty, _legacyRegionPeakPenalty),
+                                  ("dip", getRegionDipPenalty, _legacyRegionDipPenalty)):
+            args = regions[kind]
+            same = new(*args) == legacy(*args)
+            failures += not same
+            new_time, legacy_time = bestTime(new, *args), bestTime(legacy, *args)
+            n_samples = sum(e - s for s, e in args[3])
+            print(f"{name}, {kind} regions ({len(args[2])} bands, {n_samples} samples): "
+                  f"{'OK' if same else 'MISMATCH'}, vectorized {new_time * 1000:.3f} ms, "
+                  f"previous {legacy_time * 1000:.3f} ms ({legacy_time / new_time:.1f}x)")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,103 @@
+"""
+Benchmark of the baseline parameter search against the exhaustive grid.
+
+For an ASLS baseline the script compares the best IS-Score and the number of evaluations of the coarse-to-fine search
+with the ones of a dense grid over the same range, then runs the successive halving search over a small folder.
+When ramanspy is not installed, a minimal ASLS implementation with the same interface of BaselineAlgorithm is used.
+
+Run from the repository root with ``python -m benchmarks.bench_baseline_search``.
+"""
+import time
+import itertools
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+from IS_Score.IS_Score import analyzeSpectrum, scoreBaseline
+from IS_Score_GUI.models.baseline_search import searchSpectrum, searchFolder, SEARCH_SPACES
+
+DENSE_POINTS = 20
+
+
+class _ASLS:
+    """
+    Asymmetric least squares baseline with the interface of IS_Score_GUI.models.baseline_algorithms.BaselineAlgorithm.
+    """
+
+    def __init__(self):
+        self.params = {"lam": 1e5, "p": 0.01}
+
+    def getBaselineParams(self):
+        return ["lam", "p"]
+
+    def setParams(self, params):
+        self.params = {"lam": 1e5, "p": 0.01, **params}
+
+    def apply(self, spectrum, axis=None, n_iter=10):
+        n = len(spectrum)
+        D = sparse.diags([1, -2, 1], [0, -1, -2], shape=(n, n - 2))
+        penalty = self.params["lam"] * D.dot(D.transpose())
+        w = np.ones(n)
+        for _ in range(n_iter):
+            W = sparse.spdiags(w, 0, n, n)
+            baseline = spsolve(sparse.csc_matrix(W + penalty), w * spectrum)
+            w = self.params["p"] * (spectrum > baseline) + (1 - self.params["p"]) * (spectrum < baseline)
+        return spectrum - baseline
+
+
+def getAlgorithm():
+    try:
+        import ramanspy.preprocessing as rpr
+        from IS_Score_GUI.models.baseline_algorithms import BaselineAlgorithm
+        return BaselineAlgorithm("ASLS", rpr.baseline.ASLS(), params=["lam", "p"])
+    except ImportError:
+        return _ASLS()
+
+
+def denseGrid(algorithm, raw_sp, sp_axis):
+    analysis = analyzeSpectrum(raw_sp, sp_axis)
+    grids = []
+    for name in algorithm.getBaselineParams():
+        low, high, _ = SEARCH_SPACES[name]
+        grids.append([(name, v) for v in np.logspace(np.log10(low), np.log10(high), DENSE_POINTS)])
+
+    best_params, best_score = None, -np.inf
+    for values in itertools.product(*grids):
+        params = dict(values)
+        algorithm.setParams(params)
+        score = scoreBaseline(analysis, algorithm.apply(np.array(raw_sp), axis=sp_axis), verbose=False)
+        if score > best_score:
+            best_params, best_score = params, score
+    return best_params, best_score, DENSE_POINTS ** len(grids)
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    raw_sp, sp_axis = sp[:, 1], sp[:, 0]
+    algorithm = getAlgorithm()
+
+    start = time.perf_counter()
+    dense_params, dense_score, dense_evaluations = denseGrid(algorithm, raw_sp, sp_axis)
+    dense_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = searchSpectrum(algorithm, raw_sp, sp_axis, points=5, rounds=3)
+    search_time = time.perf_counter() - start
+
+    print(f"Dense grid:      score {dense_score:.4f} with {dense_evaluations} evaluations in {dense_time:.1f} s "
+          f"({dense_params})")
+    print(f"Coarse-to-fine:  score {result.is_score:.4f} with {result.evaluations} evaluations in {search_time:.1f} s "
+          f"({result.params})")
+
+    # A small folder made of the example spectrum with different slopes and noise
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, len(raw_sp))
+    folder = [(raw_sp + a * x * raw_sp.max() + rng.normal(0, 0.002 * raw_sp.max(), len(raw_sp)), sp_axis)
+              for a in np.linspace(0, 0.3, 9)]
+
+    start = time.perf_counter()
+    folder_result = searchFolder(algorithm, folder, points=5, eta=3, workers=None)
+    folder_time = time.perf_counter() - start
+    print(f"Folder search:   mean score {folder_result.mean_score:.4f} with {folder_result.evaluations} evaluations "
+          f"(full grid {25 * len(folder)}) in {folder_time:.1f} s ({folder_result.params})")
+    for i, (params, score) in enumerate(folder_result.per_spectrum):
+        print(f"  spectrum {i}: {score:.4f} {params}")
@@ -0,0 +1,93 @@
+"""
+Regression check and benchmark of the vectorized bound edges detection on spectra with many bands.
+
+For synthetic spectra with 50 to 400 Lorentzian bands the script checks that _boundEdgesDetection finds the same
+edges of the reference implementation, which moves the bound of one band at a time, then compares their timing.
+The script exits with an error if any edge differs.
+
+Run from the repository root with ``python -m benchmarks.bench_bound_edges``.
+"""
+import sys
+import time
+import numpy as np
+from scipy import signal
+from IS_Score.band_edges_detection.band_detection import _boundEdgesDetection
+
+N_REPEAT = 10
+N_BANDS = [50, 100, 200, 400]
+
+
+def loopBoundEdges(sp, bands):
+    """
+    Reference implementation of _boundEdgesDetection, with a scalar loop for each bound.
+    """
+    den_sp = signal.savgol_filter(sp, window_length=25, polyorder=3)
+    den_rel_minima = signal.argrelmin(den_sp, order=5)[0]
+
+    edges = []
+    for band in bands:
+        index_min = np.argmin(np.abs(den_rel_minima - band))
+        minima_index = den_rel_minima[index_min]
+
+        if minima_index > band:
+            left_bound = max(band - (minima_index - band), 0)
+            previous = den_rel_minima[index_min - 1] if index_min != 0 else -1
+            it = 0
+            while not np.isclose(sp[left_bound], sp[minima_index], atol=0.01) and it < 20 and left_bound != 0:
+                left_bound = left_bound + 1 if sp[left_bound] < sp[minima_index] else left_bound - 1
+                if left_bound <= 0 or previous == left_bound:
+                    break
+                it += 1
+            edges.append((left_bound, minima_index))
+        else:
+            right_bound = min(band + (band - minima_index), len(sp) - 1)
+            following = den_rel_minima[index_min + 1] if index_min + 1 < len(den_rel_minima) else -1
+            it = 0
+            while not np.isclose(sp[minima_index], sp[right_bound], atol=0.01) and it < 20 and right_bound != len(sp) - 1:
+                right_bound = right_bound + 1 if sp[right_bound] > sp[minima_index] else right_bound - 1
+                if right_bound >= len(sp) or following == right_bound:
+                    break
+                it += 1
+            edges.append((minima_index, right_bound))
+    return edges
+
+
+def syntheticSpectrum(n_bands, length, rng):
+    x = np.arange(length)
+    sp = np.zeros(length)
+    for center in np.sort(rng.uniform(0, length, n_bands)):
+        width = rng.uniform(2, 6)
+        sp += rng.uniform(0.1, 1) * width ** 2 / ((x - center) ** 2 + width ** 2)
+    sp += np.linspace(0, 0.5, length) + rng.normal(0, 0.005, length)
+    return (sp - sp.min()) / (sp.max() - sp.min())
+
+
+def bestTime(function, *args):
+    times = []
+    for _ in range(N_REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = 0
+    for n_bands in N_BANDS:
+        sp = syntheticSpectrum(n_bands, n_bands * 60, rng)
+        # findBands keeps only the bands confirmed by the smoothed spectra, here every prominent peak is bounded
+        bands = list(signal.find_peaks(sp, prominence=0.01)[0])
+
+        edges = _boundEdgesDetection(sp, bands)
+        reference = loopBoundEdges(sp, bands)
+        same = [tuple(map(int, e)) for e in edges] == [tuple(map(int, e)) for e in reference]
+        failures += not same
+
+        vectorized_time = bestTime(_boundEdgesDetection, sp, bands)
+        loop_time = bestTime(loopBoundEdges, sp, bands)
+        print(f"{len(sp)} points, {len(bands)} bands: {'OK' if same else 'MISMATCH'}, "
+              f"vectorized {vectorized_time * 1000:.2f} ms, loop {loop_time * 1000:.2f} ms "
+              f"({loop_time / vectorized_time:.1f}x)")
+
+    sys.exit(1 if failures else 0)
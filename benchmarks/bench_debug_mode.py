@@ -0,0 +1,49 @@
+"""
+Benchmark of getIS_Score with the DebugCollector enabled.
+
+The script checks that scoring in debug mode does not import matplotlib, since the figures are rendered only when
+they are accessed, then compares the timing of the normal scoring, of the debug scoring and of the rendering of
+the five debug figures.
+
+Run from the repository root with ``python -m benchmarks.bench_debug_mode``.
+"""
+import sys
+import time
+import numpy as np
+from IS_Score.IS_Score import getIS_Score
+from IS_Score.utils import DebugCollector
+
+N_REPEAT = 20
+
+
+def timeScoring(raw_sp, corrected_sp, sp_axis, debug):
+    times = []
+    for _ in range(N_REPEAT):
+        start = time.perf_counter()
+        if debug:
+            with DebugCollector.scope():
+                getIS_Score(raw_sp, corrected_sp, sp_axis, verbose=False)
+        else:
+            getIS_Score(raw_sp, corrected_sp, sp_axis, verbose=False)
+        times.append(time.perf_counter() - start)
+    return np.min(times)
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    sp_corr = np.loadtxt("bin/example/spectrum_corrected.txt")
+    raw_sp, corrected_sp, sp_axis = sp[:, 1], sp_corr[:, 1], sp[:, 0]
+
+    getIS_Score(raw_sp, corrected_sp, sp_axis, verbose=False)
+    with DebugCollector.scope() as debug:
+        getIS_Score(raw_sp, corrected_sp, sp_axis, verbose=False)
+    assert not any(m.startswith("matplotlib") for m in sys.modules), "The debug scoring imported matplotlib"
+
+    normal = timeScoring(raw_sp, corrected_sp, sp_axis, False)
+    debug_time = timeScoring(raw_sp, corrected_sp, sp_axis, True)
+    print(f"Normal scoring best: {normal * 1000:.2f} ms")
+    print(f"Debug scoring best:  {debug_time * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    figures = {category: plot["plot"] for category, plot in debug.allPlot().items()}
+    print(f"Rendering of {len(figures)} figures on first access: {(time.perf_counter() - start) * 1000:.2f} ms")
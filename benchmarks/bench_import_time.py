@@ -0,0 +1,81 @@
+"""
+Benchmark of the cold-start import time of the IS_Score package.
+
+Each measure is taken in a fresh interpreter. The absolute import time depends on the machine and is dominated by
+scipy.signal, so in the same run the script measures also the import of the required dependencies alone (numpy and
+the scipy modules imported by the package) and compares the two medians. It fails if one of the heavy optional
+dependencies (matplotlib, findpeaks, pandas) is loaded by ``import IS_Score`` or if the overhead of the package over
+its required dependencies exceeds the budget, so it can be used as a regression guard on any machine.
+
+Run from the repository root with ``python -m benchmarks.bench_import_time [--budget SECONDS] [--repeat N]``.
+"""
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+HEAVY_MODULES = ["matplotlib", "findpeaks", "pandas"]
+# The dependencies which ``import IS_Score`` must load anyway, measured as the baseline
+REQUIRED_IMPORT = "import numpy, scipy.signal, scipy.interpolate"
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _probe(statement: str) -> dict:
+    code = _PROBE % (statement, HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measureImportTime(repeat: int) -> tuple:
+    """
+    Measure the import of IS_Score and of its required dependencies alone, alternating the two in each round so
+    that both see the same state of the machine.
+
+    Returns
+    -------
+    times, baseline_times, loaded : tuple
+        The import times of IS_Score and of the required dependencies, and the heavy modules loaded by IS_Score.
+    """
+    times, baseline_times, loaded = [], [], set()
+    for _ in range(repeat):
+        baseline_times.append(_probe(REQUIRED_IMPORT)["elapsed"])
+        probe = _probe("import IS_Score")
+        times.append(probe["elapsed"])
+        loaded.update(probe["loaded"])
+    return np.array(times), np.array(baseline_times), sorted(loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import time of the IS_Score package.")
+    parser.add_argument("--budget", type=float, default=0.2,
+                        help="Maximum overhead of the median import time over the one of the required dependencies, "
+                             "in seconds. Default: 0.2.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters to measure.")
+    args = parser.parse_args()
+
+    times, baseline_times, loaded = measureImportTime(args.repeat)
+    median, baseline = float(np.median(times)), float(np.median(baseline_times))
+    overhead = median - baseline
+
+    print(f"import IS_Score: median {median * 1000:.1f} ms, min {times.min() * 1000:.1f} ms, max {times.max() * 1000:.1f} ms")
+    print(f"{REQUIRED_IMPORT}: median {baseline * 1000:.1f} ms")
+    print(f"Overhead of IS_Score over its required dependencies: {overhead * 1000:.1f} ms")
+    print(f"Heavy modules loaded at import: {loaded if loaded else 'none'}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: {', '.join(loaded)} must not be imported by 'import IS_Score'")
+        failed = True
+    if overhead > args.budget:
+        print(f"FAIL: import overhead above the budget of {args.budget * 1000:.0f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+"""
+Benchmark of the spectrum loader and of the packed dataset.
+
+The script writes a temporary folder of spectra in different formats (tab and comma separated, ascending and
+descending axis, Windows line endings, header line), checks that IS_Score.loader returns the same arrays of the
+previous np.loadtxt/pandas loader, then compares the time to read the whole folder with the two loaders and with a
+packed dataset.
+
+Run from the repository root with ``python -m benchmarks.bench_loader``.
+"""
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from IS_Score.loader import loadSpectrumFile, writePackedDataset, openPackedDataset
+
+N_FILES = 300
+
+
+def legacyLoad(file_path):
+    if file_path.endswith(".txt"):
+        tmp = np.loadtxt(file_path)
+        tmp = pd.Series(tmp[:, 1], index=tmp[:, 0]).sort_index()
+        return tmp.index.values, tmp.values
+    df = pd.read_csv(file_path, header=None)
+    return df[0].values, df[1].values
+
+
+def writeFolder(folder, sp):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(N_FILES):
+        data = sp.copy()
+        data[:, 1] += rng.normal(0, 10, len(data))
+        kind = i % 4
+        if kind == 0:
+            path = os.path.join(folder, f"sp_{i:04d}.txt")
+            np.savetxt(path, data, delimiter="\t", fmt="%.6f")
+        elif kind == 1:
+            path = os.path.join(folder, f"sp_{i:04d}.txt")
+            np.savetxt(path, data[::-1], fmt="%.6f", newline="\r\n")
+        elif kind == 2:
+            path = os.path.join(folder, f"sp_{i:04d}.csv")
+            np.savetxt(path, data, delimiter=",", fmt="%.6f")
+        else:
+            path = os.path.join(folder, f"sp_{i:04d}.txt")
+            np.savetxt(path, data, fmt="%.6f", header="raman_shift intensity")
+        paths.append(path)
+    return paths
+
+
+def timeIt(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    folder = tempfile.mkdtemp()
+    try:
+        paths = writeFolder(folder, sp)
+
+        for path in paths:
+            legacy_axis, legacy_data = legacyLoad(path)
+            axis, data = loadSpectrumFile(path, sort=path.endswith(".txt"))
+            assert np.array_equal(axis, legacy_axis) and np.array_equal(data, legacy_data), path
+        print(f"Loader identical to the legacy loader on {len(paths)} files")
+
+        legacy_time, _ = timeIt(lambda: [legacyLoad(p) for p in paths])
+        fast_time, loaded = timeIt(lambda: [loadSpectrumFile(p) for p in paths])
+        print(f"Legacy loader: {legacy_time * 1000:.1f} ms")
+        print(f"Fast loader:   {fast_time * 1000:.1f} ms ({legacy_time / fast_time:.1f}x)")
+
+        packed = os.path.join(folder, "packed")
+        writePackedDataset(packed, loaded[0][0], np.array([data for _, data in loaded]),
+                           names=[os.path.basename(p) for p in paths])
+        open_time, dataset = timeIt(openPackedDataset, packed)
+        read_time, _ = timeIt(lambda: [np.array(row) for row in dataset.spectra])
+        print(f"Packed dataset: open {open_time * 1000:.2f} ms, read all rows {read_time * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(folder)
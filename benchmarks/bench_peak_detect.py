@@ -0,0 +1,61 @@
+"""
+Regression check and benchmark of the native peakdetect used by getBandEdges.
+
+For every bundled example spectrum (and its negated version, used for the dips) the script checks that the native
+implementation finds the same peaks, valleys and band edges of the findpeaks package, then compares their timing.
+The script exits with an error if any result differs. The findpeaks package is required. The same comparison runs
+against stored reference outputs in tests/test_peak_detect.py.
+
+Run from the repository root with ``python -m benchmarks.bench_peak_detect``.
+"""
+import sys
+import glob
+import time
+import numpy as np
+from scipy import signal
+from IS_Score.band_edges_detection.band_detection import findBands, getBandEdges, _peakDetect, _findpeaksPeakDetect
+
+N_REPEAT = 10
+
+
+def loadExampleSignals():
+    signals = {}
+    for path in sorted(glob.glob("bin/example/*.txt")):
+        sp = np.loadtxt(path)[:, 1]
+        sp_norm = (sp - np.min(sp)) / (np.max(sp) - np.min(sp))
+        signals[f"{path} (peaks)"] = sp_norm
+        signals[f"{path} (dips)"] = (-sp_norm - min(-sp_norm)) / (max(-sp_norm) - min(-sp_norm))
+    return signals
+
+
+def bestTime(function, *args, **kwargs):
+    times = []
+    for _ in range(N_REPEAT):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, sp in loadExampleSignals().items():
+        den_sp = signal.savgol_filter(sp, window_length=25, polyorder=4)
+        native_peaks, native_valleys = _peakDetect(den_sp)
+        fp_peaks, fp_valleys = _findpeaksPeakDetect(den_sp)
+
+        bands = findBands(sp, tolerance=5)
+        native_edges = getBandEdges(sp, bands, peak_detector="native")
+        fp_edges = getBandEdges(sp, bands, peak_detector="findpeaks")
+
+        same = (np.array_equal(native_peaks, fp_peaks) and np.array_equal(native_valleys, fp_valleys) and
+                [tuple(map(int, e)) for e in native_edges] == [tuple(map(int, e)) for e in fp_edges])
+        failures += not same
+
+        native_time = bestTime(getBandEdges, sp, bands, peak_detector="native")
+        fp_time = bestTime(getBandEdges, sp, bands, peak_detector="findpeaks")
+        print(f"{name}: {len(bands)} bands, {len(native_valleys)} valleys, "
+              f"{'OK' if same else 'MISMATCH'}, native {native_time * 1000:.2f} ms, "
+              f"findpeaks {fp_time * 1000:.2f} ms ({fp_time / native_time:.1f}x)")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,108 @@
+"""
+Benchmark of the scoring pipeline on synthetic spectra, stage by stage.
+
+For every spectrum length L and number of bands of the grid, a synthetic spectrum is generated with
+benchmarks.synthetic and scored with getIS_Score. The script times the whole score and, with the hooks of
+IS_Score.instrumentation, each stage: the detection of the peaks and dips, of their edges and prominences, the AUC
+interpolation, the Mean Ratio smoothing and each of the seven penalties. The median times of each configuration are
+written as JSON, together with the commit and the versions of the environment, so that the runs of different commits
+can be compared with ``--compare``.
+
+Run from the repository root with ``python -m benchmarks.bench_pipeline [--output FILE] [--compare OLD_FILE]``.
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import numpy as np
+import scipy
+from IS_Score.IS_Score import getIS_Score, analyzeSpectrum
+from IS_Score.instrumentation import timeStages
+from benchmarks.synthetic import generateSpectrum
+
+LENGTHS = [500, 1000, 2000, 5000, 10000, 20000]
+N_BANDS = [5, 20, 50, 100, 200]
+# Spectra with fewer points per band than this are not realistic and are skipped
+MIN_POINTS_PER_BAND = 10
+
+
+def benchmarkConfiguration(length: int, n_bands: int, repeat: int, seed: int) -> dict:
+    spectrum = generateSpectrum(length=length, n_bands=n_bands, seed=seed)
+
+    analysis = analyzeSpectrum(spectrum.raw_sp, spectrum.sp_axis)
+
+    totals = []
+    with timeStages() as timings:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            is_score = getIS_Score(spectrum.raw_sp, spectrum.corrected_sp, spectrum.sp_axis, verbose=False)
+            totals.append(time.perf_counter() - start)
+
+    return {"length": length, "n_bands": n_bands, "seed": seed, "is_score": is_score,
+            "detected_peaks": len(analysis.peaks), "detected_dips": len(analysis.dips),
+            "total": {"median": float(np.median(totals)), "min": float(np.min(totals))},
+            "stages": {name: summary["p50"] for name, summary in timings.summary().items()}}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "scipy": scipy.__version__, "machine": platform.machine(),
+            "processor": platform.processor()}
+
+
+def compare(results: list, previous: dict):
+    """
+    Print the ratio between the median total time of each configuration and the one of a previous run.
+    """
+    old = {(r["length"], r["n_bands"]): r for r in previous["results"]}
+    print(f"\nComparison with {previous['environment'].get('commit')}:")
+    for result in results:
+        reference = old.get((result["length"], result["n_bands"]))
+        if reference is None:
+            continue
+        ratio = result["total"]["median"] / reference["total"]["median"]
+        slowest = max(result["stages"], key=lambda name: result["stages"][name] / max(reference["stages"].get(name, 0), 1e-9))
+        print(f"L={result['length']:>6} bands={result['n_bands']:>4}: {ratio:.2f}x of the previous time"
+              f"{'  <-- slower, mostly ' + slowest if ratio > 1.2 else ''}")
+
+
+def buildParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline",
+                                     description="Time the scoring pipeline stage by stage on synthetic spectra.")
+    parser.add_argument("--output", default="bench_pipeline.json", help="JSON file with the results.")
+    parser.add_argument("--compare", metavar="FILE", help="JSON file of a previous run to compare with.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=LENGTHS, help="The spectrum lengths L.")
+    parser.add_argument("--bands", type=int, nargs="+", default=N_BANDS, help="The numbers of bands.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each configuration. Default: 3.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic spectra. Default: 0.")
+    return parser
+
+
+if __name__ == "__main__":
+    args = buildParser().parse_args()
+
+    results = []
+    for length in args.lengths:
+        for n_bands in args.bands:
+            if length < n_bands * MIN_POINTS_PER_BAND:
+                continue
+            result = benchmarkConfiguration(length, n_bands, args.repeat, args.seed)
+            results.append(result)
+            slowest = max(result["stages"], key=result["stages"].get)
+            print(f"L={length:>6} bands={n_bands:>4} (found {result['detected_peaks']} peaks, "
+                  f"{result['detected_dips']} dips): {result['total']['median'] * 1000:8.2f} ms, "
+                  f"slowest stage {slowest} {result['stages'][slowest] * 1000:.2f} ms", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,76 @@
+"""
+Benchmark of the local scoring server with concurrent clients.
+
+The script starts the server on a free port of localhost, sends the same spectra from many concurrent HTTP clients
+and checks that the IS-Scores are the ones of getIS_Score on the float32 payloads. It prints the throughput of the
+server, the mean size of the micro-batches and the throughput of the sequential getIS_Score calls.
+
+Run from the repository root with ``python -m benchmarks.bench_service``.
+"""
+import sys
+import json
+import time
+import asyncio
+import numpy as np
+from IS_Score.IS_Score import getIS_Score
+from IS_Score.service import AsyncISScorer, startServer, encodePayload
+
+N_REQUESTS = 256
+N_CLIENTS = 32
+
+
+async def postScore(port, body):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b"\r\n\r\n")[2])["is_score"]
+
+
+async def runClients(frames, sp_axis):
+    async with AsyncISScorer() as scorer:
+        server = await startServer(scorer, port=0, sp_axis=sp_axis)
+        port = server.sockets[0].getsockname()[1]
+        clients = asyncio.Semaphore(N_CLIENTS)
+
+        async def client(raw, corrected):
+            async with clients:
+                return await postScore(port, encodePayload(raw, corrected))
+
+        # Warm up the worker processes
+        await asyncio.gather(*(client(raw, corrected) for raw, corrected in frames[:N_CLIENTS]))
+        n_batches = scorer.n_batches
+
+        start = time.perf_counter()
+        scores = await asyncio.gather(*(client(raw, corrected) for raw, corrected in frames))
+        elapsed = time.perf_counter() - start
+        server.close()
+        await server.wait_closed()
+        return scores, elapsed, scorer.n_batches - n_batches
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    sp_corr = np.loadtxt("bin/example/spectrum_corrected.txt")
+    sp_axis = sp[:, 0]
+    rng = np.random.default_rng(0)
+    noise = [rng.normal(0, 0.002 * np.ptp(sp[:, 1]), len(sp_axis)) for _ in range(N_REQUESTS)]
+    frames = [(sp[:, 1] + n, sp_corr[:, 1] + n) for n in noise]
+
+    scores, elapsed, n_batches = asyncio.run(runClients(frames, sp_axis))
+
+    # The server receives float32 values
+    sp_axis32 = sp_axis.astype(np.float32).astype(np.float64)
+    start = time.perf_counter()
+    expected = [getIS_Score(raw.astype(np.float32).astype(np.float64), corrected.astype(np.float32).astype(np.float64),
+                            sp_axis32, verbose=False) for raw, corrected in frames]
+    sequential = time.perf_counter() - start
+
+    print(f"{N_REQUESTS} requests from {N_CLIENTS} concurrent clients in {elapsed:.2f} s: "
+          f"{N_REQUESTS / elapsed:.1f} spectra/s, {N_REQUESTS / n_batches:.1f} spectra per batch")
+    print(f"Sequential getIS_Score: {N_REQUESTS / sequential:.1f} spectra/s")
+    mismatches = sum(a != b for a, b in zip(scores, expected))
+    print(f"Mismatches with getIS_Score: {mismatches}")
+    sys.exit(1 if mismatches else 0)
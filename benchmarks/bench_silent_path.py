@@ -0,0 +1,83 @@
+"""
+Benchmark of the silent path of getIS_Score (``verbose=False``, ``return_components=True``).
+
+The script checks in a fresh interpreter that the silent path never writes to stdout, never builds the output table
+and never imports matplotlib, then compares its timing with the verbose path.
+
+Run from the repository root with ``python -m benchmarks.bench_silent_path``.
+"""
+import io
+import sys
+import json
+import time
+import contextlib
+import subprocess
+import numpy as np
+from IS_Score.IS_Score import getIS_Score, ISScoreComponents
+
+N_REPEAT = 20
+EXAMPLE = ("bin/example/spectrum.txt", "bin/example/spectrum_corrected.txt")
+
+# Run in a fresh interpreter, so the modules imported by the first call of the silent path are seen
+_PROBE = """
+import io, sys, json, contextlib
+import numpy as np
+import IS_Score.IS_Score as is_score_module
+from IS_Score.IS_Score import getIS_Score, ISScoreComponents
+
+class ForbiddenStream(io.TextIOBase):
+    def write(self, s):
+        raise AssertionError("The silent path wrote to stdout")
+
+def forbiddenTable(data):
+    raise AssertionError("The silent path built the output table")
+
+sp, sp_corr = np.loadtxt(%r), np.loadtxt(%r)
+modules_before = set(sys.modules)
+is_score_module.printOutputTable = forbiddenTable
+with contextlib.redirect_stdout(ForbiddenStream()):
+    result = getIS_Score(sp[:, 1], sp_corr[:, 1], sp[:, 0], verbose=False, return_components=True)
+
+assert isinstance(result, ISScoreComponents)
+assert "matplotlib" not in sys.modules, "The silent path imported matplotlib"
+print(json.dumps({"result": result._asdict(), "new_modules": sorted(set(sys.modules) - modules_before)}))
+""" % EXAMPLE
+
+
+def checkSilentPath() -> tuple:
+    """
+    Score the example spectrum on the silent path in a fresh interpreter, failing if it writes to stdout, builds
+    the output table or imports matplotlib.
+
+    Returns
+    -------
+    result, new_modules : tuple
+        The components of the IS-Score and the modules imported by the call.
+    """
+    process = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True)
+    if process.returncode != 0:
+        raise AssertionError(f"The silent path check failed:\n{process.stderr}")
+    probe = json.loads(process.stdout.strip().splitlines()[-1])
+    return ISScoreComponents(**probe["result"]), probe["new_modules"]
+
+
+def timeCalls(raw_sp, corrected_sp, sp_axis, **kwargs):
+    times = []
+    for _ in range(N_REPEAT):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            getIS_Score(raw_sp, corrected_sp, sp_axis, **kwargs)
+            times.append(time.perf_counter() - start)
+    return np.min(times)
+
+
+if __name__ == "__main__":
+    sp, sp_corr = np.loadtxt(EXAMPLE[0]), np.loadtxt(EXAMPLE[1])
+    raw_sp, corrected_sp, sp_axis = sp[:, 1], sp_corr[:, 1], sp[:, 0]
+
+    result, new_modules = checkSilentPath()
+
+    print(f"Silent path result: {result}")
+    print(f"Modules imported by the silent path: {new_modules}")
+    print(f"Verbose path best: {timeCalls(raw_sp, corrected_sp, sp_axis) * 1000:.2f} ms")
+    print(f"Silent path best:  {timeCalls(raw_sp, corrected_sp, sp_axis, verbose=False, return_components=True) * 1000:.2f} ms")
@@ -0,0 +1,77 @@
+"""
+Benchmark of the StreamingISScorer on a simulated acquisition.
+
+The frames are made of the example spectrum with a slowly changing fluorescence background and noise. Halfway
+through the series the bands are shifted, so that the drift test has to trip. Every frame is scored with the
+streaming scorer and with the full getIS_Score pipeline, the script prints the median latency of both, the number
+of full detections and the differences of the scores. It exits with an error if the differences exceed
+MAX_DIFFERENCE or MEAN_DIFFERENCE.
+
+The largest differences do not come from the warm frames drifting away: on a few frames getIS_Score itself detects
+a different number of dips on the noise, so its score jumps by a similar amount between two consecutive frames of the
+same signal. The script prints that jump as well.
+
+Run from the repository root with ``python -m benchmarks.bench_streaming``.
+"""
+import sys
+import time
+import numpy as np
+from IS_Score.IS_Score import getIS_Score
+from IS_Score.streaming import StreamingISScorer
+
+N_FRAMES = 200
+SHIFT_FRAME = N_FRAMES // 2
+# Tolerances on the difference between the streaming and the cold scores, above the observed 0.133 and 0.006
+MAX_DIFFERENCE = 0.15
+MEAN_DIFFERENCE = 0.01
+
+
+def simulateFrames(raw_sp, corrected_sp, rng):
+    """
+    Return the raw and baseline corrected frames: the baseline of the example changes slowly over time.
+    """
+    baseline = raw_sp - corrected_sp
+    x = np.linspace(0, 1, len(raw_sp))
+    frames = []
+    for i in range(N_FRAMES):
+        signal = corrected_sp if i < SHIFT_FRAME else np.roll(corrected_sp, 15)
+        signal = signal * (1 + 0.02 * np.sin(i / 10))
+        drift = baseline * (1 + 0.05 * np.sin(i / 25)) + 0.02 * np.ptp(raw_sp) * x * np.cos(i / 30)
+        noise = rng.normal(0, 0.002 * np.ptp(raw_sp), len(raw_sp))
+        frames.append((signal + drift + noise, signal + noise))
+    return frames
+
+
+if __name__ == "__main__":
+    sp = np.loadtxt("bin/example/spectrum.txt")
+    sp_corr = np.loadtxt("bin/example/spectrum_corrected.txt")
+    raw_sp, corrected_sp, sp_axis = sp[:, 1], sp_corr[:, 1], sp[:, 0]
+    frames = simulateFrames(raw_sp, corrected_sp, np.random.default_rng(0))
+
+    scorer = StreamingISScorer(sp_axis)
+    streaming_times, cold_times, differences, cold_scores = [], [], [], []
+    for raw, corrected in frames:
+        start = time.perf_counter()
+        streaming_score = scorer.score(raw, corrected)
+        streaming_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cold_score = getIS_Score(raw, corrected, sp_axis, verbose=False)
+        cold_times.append(time.perf_counter() - start)
+        differences.append(abs(streaming_score - cold_score))
+        cold_scores.append(cold_score)
+
+    print(f"{N_FRAMES} frames of {len(sp_axis)} points, bands shifted at frame {SHIFT_FRAME}")
+    print(f"Full detections: {scorer.n_detections}")
+    print(f"Median latency: streaming {np.median(streaming_times) * 1000:.2f} ms, "
+          f"cold {np.median(cold_times) * 1000:.2f} ms ({np.median(cold_times) / np.median(streaming_times):.1f}x)")
+    print(f"IS-Score difference from the cold path: max {max(differences):.4f}, mean {np.mean(differences):.4f}")
+    # The frames around the shift differ because of the signal, not of the noise
+    cold_jumps = np.abs(np.diff(cold_scores))
+    cold_jumps[SHIFT_FRAME - 1] = 0
+    print(f"Largest change of the cold score between consecutive frames: {cold_jumps.max():.4f}")
+
+    failed = max(differences) > MAX_DIFFERENCE or np.mean(differences) > MEAN_DIFFERENCE
+    if failed:
+        print(f"FAIL: the difference exceeds the tolerance (max {MAX_DIFFERENCE}, mean {MEAN_DIFFERENCE})")
+    sys.exit(1 if failed else 0)
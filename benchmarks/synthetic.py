@@ -0,0 +1,132 @@
+"""
+Generator of synthetic Raman spectra for the benchmarks.
+
+A spectrum is made of Lorentzian and/or Gaussian bands on a fluorescence background, either a low order polynomial
+or a decaying exponential, with Gaussian noise. The background is known, so the ideal baseline corrected spectrum is
+returned together with the raw one. The same seed always returns the same spectrum.
+
+.. code-block:: python
+
+    from benchmarks.synthetic import generateSpectrum
+
+    spectrum = generateSpectrum(length=2000, n_bands=50, background="exponential", noise=0.01, seed=0)
+    getIS_Score(spectrum.raw_sp, spectrum.corrected_sp, spectrum.sp_axis)
+"""
+from typing import NamedTuple
+import numpy as np
+
+BAND_SHAPES = ("lorentzian", "gaussian", "mixed")
+BACKGROUNDS = ("polynomial", "exponential")
+
+
+class SyntheticSpectrum(NamedTuple):
+    """
+    A synthetic Raman spectrum with its known background.
+
+    Attributes
+    ----------
+    sp_axis : np.array
+        The spectral axis, in cm-1.
+    raw_sp : np.array
+        The spectrum: bands, background and noise.
+    corrected_sp : np.array
+        The ideal baseline corrected spectrum: the raw spectrum minus the background.
+    background : np.array
+        The fluorescence background.
+    centers : np.array
+        The index of the center of each band, sorted.
+    """
+    sp_axis: np.array
+    raw_sp: np.array
+    corrected_sp: np.array
+    background: np.array
+    centers: np.array
+
+
+def lorentzian(x: np.array, center: float, width: float) -> np.array:
+    """
+    Lorentzian band with unit height and full width at half maximum `width`.
+    """
+    return (width / 2) ** 2 / ((x - center) ** 2 + (width / 2) ** 2)
+
+
+def gaussian(x: np.array, center: float, width: float) -> np.array:
+    """
+    Gaussian band with unit height and full width at half maximum `width`.
+    """
+    return np.exp(-4 * np.log(2) * (x - center) ** 2 / width ** 2)
+
+
+def _background(x: np.array, kind: str, degree: int, rng: np.random.Generator) -> np.array:
+    """
+    Fluorescence background in the range 0-1 over the normalized axis x in the range 0-1.
+    """
+    if kind == "polynomial":
+        # A random polynomial, shifted to be positive: the typical broad and smooth fluorescence
+        coefficients = rng.uniform(-1, 1, degree + 1)
+        background = np.polynomial.polynomial.polyval(x, coefficients)
+    elif kind == "exponential":
+        background = np.exp(-x / rng.uniform(0.2, 0.8))
+    else:
+        raise ValueError(f"Invalid background {kind}: use one of {BACKGROUNDS}.")
+    background = background - background.min()
+    return background / background.max() if background.max() > 0 else background
+
+
+def generateSpectrum(length: int = 1000, n_bands: int = 20, band_shape: str = "mixed",
+                     background: str = "polynomial", degree: int = 3, fluorescence: float = 2.0,
+                     noise: float = 0.005, width_range: tuple = (5.0, 20.0), axis_range: tuple = (200.0, 3200.0),
+                     seed: int = None) -> SyntheticSpectrum:
+    """
+    Generate a synthetic Raman spectrum.
+
+    Parameters
+    ----------
+    length : int, optional
+        The number of points L of the spectrum. Default is 1000.
+    n_bands : int, optional
+        The number of bands. Default is 20.
+    band_shape : str, optional
+        "lorentzian", "gaussian" or "mixed" (default), which draws the shape of each band at random.
+    background : str, optional
+        "polynomial" (default) or "exponential".
+    degree : int, optional
+        The degree of the polynomial background. Default is 3.
+    fluorescence : float, optional
+        The height of the background relative to the tallest band. Default is 2.
+    noise : float, optional
+        The standard deviation of the Gaussian noise relative to the tallest band. Default is 0.005.
+    width_range : tuple, optional
+        The range of the full width at half maximum of the bands, in cm-1. Default is 5-20 cm-1.
+    axis_range : tuple, optional
+        The range of the spectral axis, in cm-1. Default is 200-3200 cm-1.
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    spectrum : SyntheticSpectrum
+        The spectral axis, the raw and the ideal baseline corrected spectrum, the background and the band centers.
+    """
+    if band_shape not in BAND_SHAPES:
+        raise ValueError(f"Invalid band shape {band_shape}: use one of {BAND_SHAPES}.")
+
+    rng = np.random.default_rng(seed)
+    sp_axis = np.linspace(axis_range[0], axis_range[1], length)
+    # Keep the bands away from the ends of the spectrum, where their edges would be cut
+    margin = 0.02 * (axis_range[1] - axis_range[0])
+    centers = np.sort(rng.uniform(axis_range[0] + margin, axis_range[1] - margin, n_bands))
+
+    bands = np.zeros(length)
+    for center in centers:
+        shape = band_shape if band_shape != "mixed" else ("lorentzian", "gaussian")[rng.integers(2)]
+        profile = lorentzian if shape == "lorentzian" else gaussian
+        bands += rng.uniform(0.1, 1) * profile(sp_axis, center, rng.uniform(*width_range))
+    bands /= bands.max()
+
+    x = (sp_axis - axis_range[0]) / (axis_range[1] - axis_range[0])
+    fluorescence_background = fluorescence * _background(x, background, degree, rng)
+    corrected_sp = bands + rng.normal(0, noise, length)
+
+    return SyntheticSpectrum(sp_axis, corrected_sp + fluorescence_background, corrected_sp, fluorescence_background,
+                             np.searchsorted(sp_axis, centers))
@@ -0,0 +1,90 @@
+"""
+Regression tests of the native peakdetect used by getBandEdges.
+
+The peaks, valleys and band edges of seeded synthetic signals and of the bundled example spectrum are compared with
+reference outputs stored in ``tests/data/peak_detect_reference.json``, which match the ones of the findpeaks package.
+If findpeaks is installed, the native implementation is also compared with it directly.
+
+Run from the repository root with ``python -m pytest tests``. To regenerate the reference outputs after an intended
+change of the detection, run ``python -m tests.test_peak_detect``.
+"""
+import json
+import pathlib
+import numpy as np
+import pytest
+from scipy import signal
+from IS_Score.band_edges_detection.band_detection import findBands, getBandEdges, _peakDetect
+
+REFERENCE_PATH = pathlib.Path(__file__).parent / "data" / "peak_detect_reference.json"
+EXAMPLE_PATH = pathlib.Path(__file__).parent.parent / "bin" / "example" / "spectrum.txt"
+SEEDS = range(8)
+
+
+def _normalize(sp: np.array) -> np.array:
+    return (sp - np.min(sp)) / (np.max(sp) - np.min(sp))
+
+
+def _syntheticSignal(seed: int) -> np.array:
+    """
+    Gaussian bands on a sloped background with noise, with a length and a number of bands drawn from the seed.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.arange(rng.integers(300, 2000))
+    sp = 0.5 * x / len(x)
+    for center, width, height in zip(rng.uniform(0, len(x), rng.integers(3, 40)), rng.uniform(2, 20, 40),
+                                     rng.uniform(0.05, 1, 40)):
+        sp = sp + height * np.exp(-(x - center) ** 2 / (2 * width ** 2))
+    return _normalize(sp + rng.normal(0, 0.005, len(x)))
+
+
+def loadSignals() -> dict:
+    """
+    Return the test signals, each one with its negated version used for the dips.
+    """
+    signals = {f"seed {seed}": _syntheticSignal(seed) for seed in SEEDS}
+    signals["example"] = _normalize(np.loadtxt(EXAMPLE_PATH)[:, 1])
+    signals.update({f"{name} (dips)": _normalize(-sp) for name, sp in list(signals.items())})
+    return signals
+
+
+def detect(sp: np.array, **kwargs) -> dict:
+    """
+    Return the peaks and valleys of the smoothed signal and the edges of its bands, as lists of int.
+    """
+    peaks, valleys = _peakDetect(signal.savgol_filter(sp, window_length=25, polyorder=4))
+    edges = getBandEdges(sp, findBands(sp, tolerance=5), **kwargs)
+    return {"peaks": [int(p) for p in peaks], "valleys": [int(v) for v in valleys],
+            "edges": [[int(left), int(right)] for left, right in edges]}
+
+
+SIGNALS = loadSignals()
+
+
+@pytest.fixture(scope="module")
+def reference():
+    with open(REFERENCE_PATH) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("name", SIGNALS)
+def test_matches_reference(name, reference):
+    assert detect(SIGNALS[name]) == reference[name]
+
+
+@pytest.mark.parametrize("name", SIGNALS)
+def test_matches_findpeaks(name):
+    pytest.importorskip("findpeaks")
+    from IS_Score.band_edges_detection.band_detection import _findpeaksPeakDetect
+
+    sp = SIGNALS[name]
+    den_sp = signal.savgol_filter(sp, window_length=25, polyorder=4)
+    native_peaks, native_valleys = _peakDetect(den_sp)
+    fp_peaks, fp_valleys = _findpeaksPeakDetect(den_sp)
+    assert np.array_equal(native_peaks, fp_peaks) and np.array_equal(native_valleys, fp_valleys)
+    assert detect(sp)["edges"] == detect(sp, peak_detector="findpeaks")["edges"]
+
+
+if __name__ == "__main__":
+    with open(REFERENCE_PATH, "w") as f:
+        json.dump({name: detect(sp) for name, sp in SIGNALS.items()}, f)
+    print(f"Reference outputs of {len(SIGNALS)} signals written to {REFERENCE_PATH}")